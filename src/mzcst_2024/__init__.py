@@ -34,20 +34,29 @@ from . import radar  # cst.radar
 from . import results  # cst.results
 from . import units  # cst.units
 from . import (  # cst.asymptotic; _global,
+    antenna,
     common,
     component,
     construction_curve,
     construction_face,
     curves,
+    dispersion,
     group,
+    layout,
     material,
+    material_library,
     math_,
+    network,
     plot,
     profiles_to_shapes,
+    result_cache,
+    result_extraction,
     shape_operations,
     shapes,
     solver,
     sources_and_ports,
+    tessellation,
+    touchstone,
     transformations_and_picks,
 )
 from ._global import BaseObject, Parameter, Units, VbaObject, change_solver_type
@@ -0,0 +1,371 @@
+"""参数扫描中全部run的天线指标。
+
+反射系数`S p,p`先用`ResultModule.load_tensor`读为(R, F)数组，再对所有run一次性计算：
+谐振频率、最小回波损耗、最小驻波比，以及低于阈值（默认-10 dB）的每个频带。频带边界
+在相邻频点之间线性插值，多频带天线的每个频带分别给出。频率单位与结果的x轴相同。
+
+Example::
+
+    kpi = antenna.analyze_sweep(project.get_3d())
+    table = kpi.table()                 # 每个run一行，含参数列
+    rows = kpi.select(w_cross=1.0)      # 按参数值筛选
+    kpi.bandwidth_at(2.45)[rows]
+"""
+
+import logging
+import re
+import typing
+
+import numpy
+
+from . import touchstone
+from .results import ParameterTable, SweepTensor
+
+_logger = logging.getLogger(__name__)
+
+__all__: list[str] = [
+    "AntennaKPI",
+    "analyze_sweep",
+    "compute_kpis",
+    "find_reflection",
+    "vswr",
+]
+
+# 部分版本的结果名写作`S(1,1)`
+_S_PAREN = re.compile(r"^S\((\d+),(\d+)\)$")
+
+
+def vswr(s_db: numpy.ndarray) -> numpy.ndarray:
+    """由反射系数（dB）计算驻波比，全反射时为inf。"""
+    gamma = numpy.power(10.0, numpy.asarray(s_db, dtype=numpy.float64) / 20)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        out = (1 + gamma) / (1 - gamma)
+    return numpy.where(gamma >= 1, numpy.inf, out)
+
+
+class AntennaKPI(typing.NamedTuple):
+    """参数扫描的天线指标，每个run一行。
+
+    频带按频率从低到高排列，列数为各run中频带数的最大值，不足处为NaN。与扫描区间
+    端点相连的频带以端点作为边界。
+
+    Attributes:
+        run_ids (numpy.ndarray): run id，形状为(R,)。
+        parameters (numpy.ndarray): 各run参数值的结构化数组，形状为(R,)。
+        frequency (numpy.ndarray): 频率，形状为(F,)。
+        s_db (numpy.ndarray): 反射系数（dB），形状为(R, F)，缺失处为NaN。
+        resonance (numpy.ndarray): 谐振频率（反射最小处），形状为(R,)。
+        min_s_db (numpy.ndarray): 最小反射系数（dB），形状为(R,)。
+        band_lower (numpy.ndarray): 频带下边界，形状为(R, B)。
+        band_upper (numpy.ndarray): 频带上边界，形状为(R, B)。
+        band_resonance (numpy.ndarray): 频带内的谐振频率，形状为(R, B)。
+        band_min_s_db (numpy.ndarray): 频带内的最小反射系数（dB），形状为(R, B)。
+        threshold_db (float): 频带阈值（dB）。
+    """
+
+    run_ids: numpy.ndarray
+    parameters: numpy.ndarray
+    frequency: numpy.ndarray
+    s_db: numpy.ndarray
+    resonance: numpy.ndarray
+    min_s_db: numpy.ndarray
+    band_lower: numpy.ndarray
+    band_upper: numpy.ndarray
+    band_resonance: numpy.ndarray
+    band_min_s_db: numpy.ndarray
+    threshold_db: float
+
+    @property
+    def return_loss(self) -> numpy.ndarray:
+        """最大回波损耗（dB），形状为(R,)。"""
+        return -self.min_s_db
+
+    @property
+    def vswr_min(self) -> numpy.ndarray:
+        """最小驻波比，形状为(R,)。"""
+        return vswr(self.min_s_db)
+
+    @property
+    def n_bands(self) -> numpy.ndarray:
+        """每个run的频带数，形状为(R,)。"""
+        return numpy.count_nonzero(~numpy.isnan(self.band_lower), axis=1)
+
+    @property
+    def bandwidth(self) -> numpy.ndarray:
+        """各频带带宽，形状为(R, B)。"""
+        return self.band_upper - self.band_lower
+
+    @property
+    def center(self) -> numpy.ndarray:
+        """各频带中心频率，形状为(R, B)。"""
+        return (self.band_upper + self.band_lower) / 2
+
+    @property
+    def fractional_bandwidth(self) -> numpy.ndarray:
+        """各频带相对带宽，形状为(R, B)。"""
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            return self.bandwidth / self.center
+
+    def band_index(self, frequency: float) -> numpy.ndarray:
+        """包含指定频率的频带序号，形状为(R,)，不在任何频带内时为-1。"""
+        inside = (self.band_lower <= frequency) & (self.band_upper >= frequency)
+        if not inside.shape[1]:
+            return numpy.full(len(self.run_ids), -1)
+        return numpy.where(inside.any(axis=1), inside.argmax(axis=1), -1)
+
+    def bandwidth_at(self, frequency: float) -> numpy.ndarray:
+        """包含指定频率的频带带宽，形状为(R,)，不在频带内时为0。"""
+        if not self.band_lower.shape[1]:
+            return numpy.zeros(len(self.run_ids))
+        band = self.band_index(frequency)
+        rows = numpy.arange(len(self.run_ids))
+        width = self.bandwidth[rows, numpy.maximum(band, 0)]
+        return numpy.where(band >= 0, width, 0.0)
+
+    def select(self, *, rtol: float = 1e-9, **conditions) -> numpy.ndarray:
+        """按参数值筛选run，条件写法见`ParameterTable.where`。
+
+        Returns:
+            numpy.ndarray: 满足条件的行号。
+        """
+        run_ids = ParameterTable(self.run_ids, self.parameters).where(
+            rtol=rtol, **conditions
+        )
+        return numpy.flatnonzero(numpy.isin(self.run_ids, run_ids))
+
+    def table(self) -> numpy.ndarray:
+        """汇总为结构化数组，每个run一行。
+
+        列依次为`run_id`、各参数、`resonance`、`min_s_db`、`return_loss`、`vswr_min`、
+        `n_bands`，以及每个频带的`band{k}_lower`、`band{k}_upper`、`band{k}_bandwidth`
+        和`band{k}_resonance`（k从1开始）。
+
+        Returns:
+            numpy.ndarray: 结构化数组，形状为(R,)。
+        """
+        columns: dict[str, numpy.ndarray] = {"run_id": self.run_ids}
+        for name in self.parameters.dtype.names or ():
+            columns[name] = self.parameters[name]
+        columns.update(
+            resonance=self.resonance,
+            min_s_db=self.min_s_db,
+            return_loss=self.return_loss,
+            vswr_min=self.vswr_min,
+            n_bands=self.n_bands,
+        )
+        bandwidth = self.bandwidth
+        for k in range(self.band_lower.shape[1]):
+            columns[f"band{k + 1}_lower"] = self.band_lower[:, k]
+            columns[f"band{k + 1}_upper"] = self.band_upper[:, k]
+            columns[f"band{k + 1}_bandwidth"] = bandwidth[:, k]
+            columns[f"band{k + 1}_resonance"] = self.band_resonance[:, k]
+        out = numpy.empty(
+            len(self.run_ids),
+            dtype=[(n, numpy.asarray(c).dtype) for n, c in columns.items()],
+        )
+        for n, c in columns.items():
+            out[n] = c
+        return out
+
+    def bands(self, row: int) -> list[dict]:
+        """一个run的全部频带。
+
+        Args:
+            row (int): 行号。
+
+        Returns:
+            list[dict]: 每个频带的`lower_freq`、`upper_freq`、`bandwidth`、
+                `fractional_bandwidth`、`resonance`和`min_value`。
+        """
+        out = []
+        for k in range(int(self.n_bands[row])):
+            lo = float(self.band_lower[row, k])
+            hi = float(self.band_upper[row, k])
+            out.append(
+                {
+                    "lower_freq": lo,
+                    "upper_freq": hi,
+                    "bandwidth": hi - lo,
+                    "fractional_bandwidth": float(
+                        self.fractional_bandwidth[row, k]
+                    ),
+                    "resonance": float(self.band_resonance[row, k]),
+                    "min_value": float(self.band_min_s_db[row, k]),
+                }
+            )
+        return out
+
+
+def _crossing(
+    f: numpy.ndarray,
+    y: numpy.ndarray,
+    rows: numpy.ndarray,
+    i0: numpy.ndarray,
+    threshold: float,
+) -> numpy.ndarray:
+    """在`i0`和`i0 + 1`之间线性插值`y`等于阈值处的频率。"""
+    y0, y1 = y[rows, i0], y[rows, i0 + 1]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        w = (threshold - y0) / (y1 - y0)
+    return f[i0] + numpy.clip(w, 0, 1) * (f[i0 + 1] - f[i0])
+
+
+def compute_kpis(
+    tensor: SweepTensor, *, threshold_db: float = -10.0, db: bool = False
+) -> AntennaKPI:
+    """一次性计算扫描中全部run的天线指标。
+
+    Args:
+        tensor (SweepTensor): 反射系数，见`ResultModule.load_tensor`。
+        threshold_db (float, optional): 频带阈值（dB）. Defaults to -10.0.
+        db (bool, optional): 数据是否已经是dB值. Defaults to False.
+
+    Raises:
+        ValueError: 没有频点。
+
+    Returns:
+        AntennaKPI: 天线指标。
+    """
+    f = numpy.asarray(tensor.x, dtype=numpy.float64)
+    data = numpy.asarray(tensor.data)
+    if db:
+        s_db = data.real.astype(numpy.float64)
+    else:
+        with numpy.errstate(divide="ignore"):
+            s_db = 20 * numpy.log10(numpy.abs(data))
+    s_db = numpy.where(tensor.mask, s_db, numpy.nan)
+    n_runs, n_f = s_db.shape
+    if not n_f:
+        raise ValueError("no frequency points in the sweep tensor.")
+    rows = numpy.arange(n_runs)
+
+    # 谐振
+    valid = ~numpy.isnan(s_db)
+    has_data = valid.any(axis=1)
+    i_min = numpy.where(valid, s_db, numpy.inf).argmin(axis=1)
+    resonance = numpy.where(has_data, f[i_min], numpy.nan)
+    min_s_db = numpy.where(has_data, s_db[rows, i_min], numpy.nan)
+
+    # 频带：低于阈值的连续频点，NaN处断开
+    below = valid & (s_db < threshold_db)
+    edges = numpy.diff(
+        numpy.pad(below.astype(numpy.int8), ((0, 0), (1, 1))), axis=1
+    )
+    r_start, k_start = numpy.nonzero(edges == 1)
+    r_stop, k_stop = numpy.nonzero(edges == -1)
+    n_bands = numpy.bincount(r_start, minlength=n_runs)
+    width = int(n_bands.max()) if n_runs else 0
+    slot = numpy.arange(len(r_start)) - (numpy.cumsum(n_bands) - n_bands)[
+        r_start
+    ]
+
+    # 边界插值，与扫描端点相连或邻点缺失时取频点本身
+    lower = f[k_start]
+    inner = k_start > 0
+    lower = numpy.where(
+        inner,
+        _crossing(
+            f, s_db, r_start, numpy.maximum(k_start - 1, 0), threshold_db
+        )
+        if n_f > 1
+        else lower,
+        lower,
+    )
+    lower = numpy.where(numpy.isnan(lower), f[k_start], lower)
+    last = k_stop - 1
+    upper = f[last]
+    inner = k_stop < n_f
+    upper = numpy.where(
+        inner,
+        _crossing(f, s_db, r_stop, numpy.minimum(last, n_f - 2), threshold_db)
+        if n_f > 1
+        else upper,
+        upper,
+    )
+    upper = numpy.where(numpy.isnan(upper), f[last], upper)
+
+    # 每个频带内的最小值：按（频带, 值）排序后取每段第一个
+    band_of = numpy.full((n_runs, n_f), -1)
+    band_of[below] = numpy.cumsum(edges[:, :-1] == 1)[below.ravel()] - 1
+    flat = numpy.flatnonzero(below)
+    seg = band_of.ravel()[flat]
+    order = numpy.lexsort((s_db.ravel()[flat], seg))
+    first = order[numpy.searchsorted(seg[order], numpy.arange(len(r_start)))]
+    best = flat[first]
+
+    def scatter(values: numpy.ndarray) -> numpy.ndarray:
+        out = numpy.full((n_runs, width), numpy.nan)
+        out[r_start, slot] = values
+        return out
+
+    _logger.info(
+        "KPIs of %d runs computed, %d bands found.", n_runs, len(r_start)
+    )
+    return AntennaKPI(
+        run_ids=numpy.asarray(tensor.run_ids),
+        parameters=tensor.parameters,
+        frequency=f,
+        s_db=s_db,
+        resonance=resonance,
+        min_s_db=min_s_db,
+        band_lower=scatter(lower),
+        band_upper=scatter(upper),
+        band_resonance=scatter(f[best % n_f]),
+        band_min_s_db=scatter(s_db.ravel()[best]),
+        threshold_db=threshold_db,
+    )
+
+
+def find_reflection(
+    rm: typing.Any, port: int = 1, filter_: str = "0D/1D"
+) -> str:
+    """查找端口反射系数`S p,p`（或`S(p,p)`）的树路径，只在`S-Parameters`文件夹中查找。
+
+    Args:
+        rm (results.ResultModule): 结果子模块。
+        port (int, optional): 端口号. Defaults to 1.
+        filter_ (str, optional): 树路径过滤器. Defaults to "0D/1D".
+
+    Raises:
+        ValueError: 没有该结果。
+
+    Returns:
+        str: 树路径。
+    """
+    for treepath in rm.get_tree_items(filter_):
+        if "S-Parameters" not in treepath:
+            continue
+        name = re.split(r"[\\/]", treepath)[-1].replace(" ", "")
+        m = touchstone._S_ITEM.match(name) or _S_PAREN.match(name)
+        if m and int(m.group(1)) == port and int(m.group(2)) == port:
+            return treepath
+    raise ValueError(f"no S{port},{port} result found.")
+
+
+def analyze_sweep(
+    rm: typing.Any,
+    treepath: str = None,
+    run_ids: typing.Sequence[int] = None,
+    *,
+    port: int = 1,
+    threshold_db: float = -10.0,
+    x: numpy.ndarray = None,
+) -> AntennaKPI:
+    """读取参数扫描的反射系数并计算天线指标。
+
+    Args:
+        rm (results.ResultModule): 结果子模块。
+        treepath (str, optional): 反射系数的树路径. Defaults to `port`的`S p,p`.
+        run_ids (Sequence[int], optional): run id. Defaults to 全部参数扫描的run
+            （没有时为0）.
+        port (int, optional): 端口号. Defaults to 1.
+        threshold_db (float, optional): 频带阈值（dB）. Defaults to -10.0.
+        x (numpy.ndarray, optional): 公共频率轴. Defaults to 各run中最长的频点.
+
+    Returns:
+        AntennaKPI: 天线指标。
+    """
+    if treepath is None:
+        treepath = find_reflection(rm, port)
+    tensor = rm.load_tensor(treepath, run_ids, x=x)
+    return compute_kpis(tensor, threshold_db=threshold_db)
@@ -5,6 +5,8 @@ __all__: list[str] = [
     "OPERATION_SUCCESS",
     "OPERATION_FAILED",
     "quoted",
+    "format_numbers",
+    "vba_array",
 ]
 
 import logging
@@ -16,6 +18,8 @@ import typing
 from enum import Enum
 from re import L
 
+import numpy
+
 NEW_LINE: str = "\n"
 OPERATION_SUCCESS: str = r"Operation Success: %s"
 OPERATION_FAILED: str = r"Operation Failed: %s"
@@ -35,6 +39,59 @@ def quoted(s: str) -> str:
     return '"' + s + '"'
 
 
+def format_numbers(values: typing.Any) -> numpy.ndarray:
+    """把数组中的元素批量格式化为VBA可以直接使用的字面量。
+
+    数值按`%.15g`格式化；字符串（如参数表达式）和`Parameter`对象加双引号。
+
+    Args:
+        values (Any): 数组或可迭代对象。
+
+    Returns:
+        numpy.ndarray: 一维字符串数组。
+    """
+    arr = numpy.asarray(values)
+    if arr.dtype.kind in "iub":
+        return numpy.char.mod("%d", arr.astype(numpy.int64).ravel())
+    if arr.dtype.kind == "f":
+        if not numpy.all(numpy.isfinite(arr)):
+            raise ValueError("values must be finite numbers.")
+        return numpy.char.mod("%.15g", arr.ravel())
+    items = [getattr(v, "name", v) for v in arr.ravel().tolist()]
+    return numpy.char.add(
+        numpy.char.add('"', numpy.asarray(items, dtype=str)), '"'
+    )
+
+
+def vba_array(name: str, values: typing.Any, *, max_line: int = 900) -> list[str]:
+    """生成声明并填充一个VBA数组的代码。
+
+    为了不超过VBA单行长度的限制（1023字符），赋值语句用冒号连接后按`max_line`分行。
+
+    Args:
+        name (str): 数组变量名。
+        values (Any): 数组元素，见`format_numbers`。
+        max_line (int, optional): 每行的最大字符数. Defaults to 900.
+
+    Returns:
+        list[str]: VBA代码行。
+    """
+    items = format_numbers(values)
+    n = items.size
+    if n == 0:
+        raise ValueError(f"VBA array {name} is empty.")
+    stmts = numpy.char.add(
+        numpy.char.add(f"{name}(", numpy.arange(n).astype(str)),
+        numpy.char.add(") = ", items),
+    )
+    width = int(numpy.char.str_len(stmts).max()) + 2
+    per_line = max(1, max_line // width)
+    lines = [f"Dim {name}({n - 1})"]
+    for i in range(0, n, per_line):
+        lines.append(": ".join(stmts[i : i + per_line].tolist()))
+    return lines
+
+
 def create_folder(path: str):
     """Create a folder in the specified `path` if `path` does not exist.
 
@@ -1,5 +1,6 @@
 """定义 `Component` 类和与其相关的方法。"""
 
+import bisect
 import logging
 import typing
 
@@ -7,7 +8,7 @@ from . import interface
 from ._global import BaseObject, Parameter
 from .common import NEW_LINE, quoted
 
-__all__: list[str] = []
+__all__: list[str] = ["Component", "ComponentTree"]
 
 _logger = logging.getLogger(__name__)
 
@@ -108,6 +109,8 @@ class Component(BaseObject):
     def create(
         self,
         modeler: interface.Model3D,
+        *,
+        tree: "ComponentTree" = None,
     ) -> "Component":
         """创建 Component。
 
@@ -115,10 +118,16 @@ class Component(BaseObject):
 
         Args:
             modeler (interface.Model3D): 建模器
+            tree (ComponentTree, optional): 部件索引。给定时只在索引中登记路径，不写入
+                历史记录，由实体的`create(modeler, tree=tree)`（或`tree.ensure_for`）
+                在放入第一个实体前创建.
 
         Returns:
             Component: self
         """
+        if tree is not None:
+            tree.declare([self.name])
+            return self
         sCommand = [f'Component.New "{self.name}"']
         cmd = NEW_LINE.join(sCommand)
         title = f"new component: {self.name}"
@@ -179,12 +188,15 @@ class Component(BaseObject):
         self,
         modeler: interface.Model3D,
         sub_component_name: str | typing.Iterable[str],
+        *,
+        tree: "ComponentTree" = None,
     ) -> "Component":
         """创建子组件。
 
         Args:
             modeler (interface.Model3D): 建模器。
             sub_component_name (str): 子组件名称。
+            tree (ComponentTree, optional): 部件索引，见`create`.
 
         Returns:
             Component: 新创建的子组件。
@@ -198,7 +210,206 @@ class Component(BaseObject):
                 f"sub_component_name must be str or Iterable[str], got {type(sub_component_name)}"
             )
         
-        return Component(new_comp_name).create(modeler)
+        return Component(new_comp_name).create(modeler, tree=tree)
+
+
+class ComponentTree:
+    """部件层级索引：每个部件路径只在第一个实体放入时创建一次，并支持按子树批量操作。
+
+    路径按字典序保存在有序列表中，子树`a/b`对应区间`["a/b/", "a/b0")`（`"0"`是`"/"`
+    的下一个字符），用二分查找即可定位。
+
+    Example::
+
+        tree = ComponentTree()
+        Component("unit_0_0").create(modeler, tree=tree)  # 只登记
+        brick.create(modeler, tree=tree)  # 先创建缺失的部件，再创建实体
+        tree.ensure_for(modeler, [substrate, trace])  # 一条历史记录创建缺失的部件
+        tree.hide(modeler, ["unit_0_0", "unit_0_1"])
+    """
+
+    def __init__(self, existing: typing.Iterable[str] = ()):
+        self._index: list[str] = []
+        self._created: set[str] = set()
+        for path in existing:
+            for node in self._ancestors(str(path)):
+                self._add(node)
+                self._created.add(node)
+        return
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, path: str) -> bool:
+        path = str(path)
+        i = bisect.bisect_left(self._index, path)
+        return i < len(self._index) and self._index[i] == path
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._index)
+
+    @staticmethod
+    def _ancestors(path: str) -> list[str]:
+        parts = [p for p in path.split("/") if p]
+        return ["/".join(parts[: i + 1]) for i in range(len(parts))]
+
+    def _add(self, path: str) -> None:
+        i = bisect.bisect_left(self._index, path)
+        if i == len(self._index) or self._index[i] != path:
+            self._index.insert(i, path)
+        return
+
+    def is_created(self, path: str) -> bool:
+        return str(path) in self._created
+
+    def declare(self, paths: typing.Iterable[str]) -> list[str]:
+        """登记部件路径（含上级部件）但不创建，第一个实体放入时由`ensure`创建。
+
+        Args:
+            paths (Iterable[str]): 部件路径。
+
+        Returns:
+            list[str]: 本次新登记的部件路径。
+        """
+        declared = []
+        for path in paths:
+            for node in self._ancestors(str(path)):
+                if node not in self:
+                    self._add(node)
+                    declared.append(node)
+        return declared
+
+    def subtree(
+        self, path: str, *, include_root: bool = True
+    ) -> typing.Iterator[str]:
+        """按字典序遍历子树中的所有路径。
+
+        Args:
+            path (str): 子树的根。
+            include_root (bool, optional): 是否包含根本身. Defaults to True.
+
+        Returns:
+            Iterator[str]: 部件路径。
+        """
+        path = str(path).strip("/")
+        if include_root and path in self:
+            yield path
+        lo = bisect.bisect_left(self._index, path + "/")
+        hi = bisect.bisect_left(self._index, path + "0")
+        yield from self._index[lo:hi]
+
+    def roots(self, paths: typing.Iterable[str]) -> list[str]:
+        """去掉已被其它路径包含的子路径，只保留最上层的路径。"""
+        result: list[str] = []
+        for p in sorted({str(p).strip("/") for p in paths}):
+            if not result or not p.startswith(result[-1] + "/"):
+                result.append(p)
+        return result
+
+    def ensure(
+        self, modeler: "interface.Model3D", paths: typing.Iterable[str]
+    ) -> list[str]:
+        """在一条历史记录中创建尚未创建的部件（含上级部件），已创建的不会重复创建。
+
+        Args:
+            modeler (interface.Model3D): 建模器。
+            paths (Iterable[str]): 部件路径。
+
+        Returns:
+            list[str]: 本次新创建的部件路径。
+        """
+        missing = sorted(
+            {
+                node
+                for path in paths
+                for node in self._ancestors(str(path))
+                if node not in self._created
+            }
+        )
+        if not missing:
+            return []
+        sCommand = [f'Component.New "{p}"' for p in missing]
+        title = f"new components: {missing[0]}"
+        if len(missing) > 1:
+            title += f" (+{len(missing) - 1})"
+        modeler.add_to_history(title, NEW_LINE.join(sCommand))
+        for p in missing:
+            self._add(p)
+            self._created.add(p)
+        _logger.info("%s", title)
+        return missing
+
+    def ensure_for(
+        self, modeler: "interface.Model3D", solids: typing.Iterable[typing.Any]
+    ) -> list[str]:
+        """在放入实体之前创建它们所在的部件。
+
+        Args:
+            modeler (interface.Model3D): 建模器。
+            solids (Iterable[Solid]): 实体，需有`component`属性。
+
+        Returns:
+            list[str]: 本次新创建的部件路径。
+        """
+        return self.ensure(modeler, (s.component for s in solids))
+
+    def _bulk(
+        self,
+        modeler: "interface.Model3D",
+        method: str,
+        verb: str,
+        paths: typing.Iterable[str],
+    ) -> list[str]:
+        roots = [p for p in self.roots(paths) if p in self._created]
+        if roots:
+            sCommand = [f'Component.{method} "{p}"' for p in roots]
+            title = f"{verb} components: {roots[0]}"
+            if len(roots) > 1:
+                title += f" (+{len(roots) - 1})"
+            modeler.add_to_history(title, NEW_LINE.join(sCommand))
+            _logger.info("%s", title)
+        return roots
+
+    def hide(
+        self, modeler: "interface.Model3D", paths: typing.Iterable[str]
+    ) -> list[str]:
+        """在一条历史记录中隐藏若干部件及其子部件。
+
+        Returns:
+            list[str]: 实际操作的（最上层）部件路径。
+        """
+        return self._bulk(modeler, "HideComponent", "hide", paths)
+
+    def show(
+        self, modeler: "interface.Model3D", paths: typing.Iterable[str]
+    ) -> list[str]:
+        """在一条历史记录中显示若干部件及其子部件。
+
+        Returns:
+            list[str]: 实际操作的（最上层）部件路径。
+        """
+        return self._bulk(modeler, "ShowComponent", "show", paths)
+
+    def delete(
+        self, modeler: "interface.Model3D", paths: typing.Iterable[str]
+    ) -> list[str]:
+        """在一条历史记录中删除若干部件，并从索引中移除其子树。
+
+        Returns:
+            list[str]: 实际删除的（最上层）部件路径。
+        """
+        paths = self.roots(paths)
+        roots = self._bulk(modeler, "Delete", "delete", paths)
+        # 只登记未创建的部件不需要删除，但同样从索引中移除
+        for root in paths:
+            self._created -= set(self.subtree(root))
+            lo = bisect.bisect_left(self._index, root + "/")
+            hi = bisect.bisect_left(self._index, root + "0")
+            del self._index[lo:hi]
+            i = bisect.bisect_left(self._index, root)
+            if i < len(self._index) and self._index[i] == root:
+                del self._index[i]
+        return roots
 
 
 def join(iterable: typing.Iterable[str]) -> str:
@@ -4,12 +4,20 @@
 import logging
 import typing
 
+import numpy
+
 # CST 库
 import cst  # type:ignore
 from cst import interface  # type:ignore
 
 # 自己的库
-from .common import NEW_LINE, OPERATION_FAILED, OPERATION_SUCCESS, quoted
+from .common import (
+    NEW_LINE,
+    OPERATION_FAILED,
+    OPERATION_SUCCESS,
+    format_numbers,
+    quoted,
+)
 from ._global import BaseObject, Parameter
 from .shape_operations import Solid
 
@@ -124,3 +132,201 @@ class Line(BaseObject):
 
     # endregion
     # ↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑
+
+
+def decimate(points: numpy.ndarray, tolerance: float) -> numpy.ndarray:
+    """用Ramer-Douglas-Peucker算法抽稀折线，保留首尾两点。
+
+    每一步对当前区间内的所有点一次性计算到弦的距离，距离小于`tolerance`的点被删除。
+
+    Args:
+        points (numpy.ndarray): 形状为(N, 2)或(N, 3)的点列。
+        tolerance (float): 允许的最大偏差。
+
+    Returns:
+        numpy.ndarray: 抽稀后的点列。
+    """
+    pts = numpy.asarray(points, dtype=float)
+    n = len(pts)
+    if n < 3 or tolerance <= 0:
+        return pts
+    keep = numpy.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        seg = pts[first + 1 : last] - pts[first]
+        chord = pts[last] - pts[first]
+        length = numpy.linalg.norm(chord)
+        if length == 0:
+            dist = numpy.linalg.norm(seg, axis=1)
+        else:
+            proj = seg @ chord / length**2
+            dist = numpy.linalg.norm(
+                seg - numpy.outer(proj, chord), axis=1
+            )
+        i = int(numpy.argmax(dist))
+        if dist[i] > tolerance:
+            mid = first + 1 + i
+            keep[mid] = True
+            stack += [(first, mid), (mid, last)]
+    return pts[keep]
+
+
+class _PointCurve(BaseObject):
+    """由点列定义的曲线的基类。
+
+    Attributes:
+        name (str): 曲线名。
+        curve (str): 所在的曲线组名。
+        points (numpy.ndarray): 点列，形状为(N, dim)。
+    """
+
+    _vba_object: str = ""
+    _dim: int = 2
+
+    def __init__(
+        self,
+        name: str,
+        curve: str,
+        points: numpy.ndarray,
+        *,
+        tolerance: float = 0.0,
+    ):
+        super().__init__()
+        pts = numpy.asarray(points, dtype=float)
+        if pts.ndim != 2 or pts.shape[1] != self._dim or len(pts) < 2:
+            raise ValueError(
+                f"{type(self).__name__} expects an (N, {self._dim}) array "
+                + f"with N >= 2, got shape {pts.shape}."
+            )
+        self._name = name
+        self._curve = curve
+        self._points = decimate(pts, tolerance) if tolerance > 0 else pts
+        self._history_title = (
+            f'define curve {self._vba_object.lower()}: "{self.full_name}"'
+        )
+        return
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def curve(self) -> str:
+        return self._curve
+
+    @property
+    def points(self) -> numpy.ndarray:
+        return self._points
+
+    @property
+    def full_name(self) -> str:
+        """返回曲线的全名
+
+        Returns:
+            str: 曲线的全名，形式为`curve:name`
+        """
+        return f"{self.curve}:{self.name}"
+
+    def point_lines(self) -> list[str]:
+        """生成`.Point`/`.LineTo`语句。
+
+        Returns:
+            list[str]: VBA代码行。
+        """
+        return point_lines(self._points, first=".Point", rest=".LineTo")
+
+    def vba(self) -> list[str]:
+        """生成定义曲线的完整With语句块。
+
+        Returns:
+            list[str]: VBA代码行。
+        """
+        return [
+            f"With {self._vba_object}",
+            ".Reset",
+            f'.Name "{self.name}"',
+            f'.Curve "{self.curve}"',
+            *self.point_lines(),
+            ".Create",
+            "End With",
+        ]
+
+    def create(self, modeler: "interface.Model3D") -> "_PointCurve":
+        """定义曲线，所有点都写在同一条历史记录里。
+
+        Args:
+            modeler (interface.Model3D): 建模环境。
+
+        Returns:
+            self: 对象自身的引用。
+        """
+        modeler.add_to_history(self._history_title, NEW_LINE.join(self.vba()))
+        _logger.info(
+            "curve %s %s created with %d points.",
+            self._vba_object.lower(),
+            self.full_name,
+            len(self._points),
+        )
+        return self
+
+
+class Polygon(_PointCurve):
+    """二维多边形曲线，位于当前工作坐标系的uv平面内。
+
+    首尾点相同即为闭合多边形，可用于`ExtrudeCurve`。
+    """
+
+    _vba_object = "Polygon"
+    _dim = 2
+
+
+class Spline(_PointCurve):
+    """经过给定点的二维样条曲线，位于当前工作坐标系的uv平面内。"""
+
+    _vba_object = "Spline"
+    _dim = 2
+
+
+class Polygon3D(_PointCurve):
+    """三维多边形曲线。"""
+
+    _vba_object = "Polygon3D"
+    _dim = 3
+
+    def point_lines(self) -> list[str]:
+        return point_lines(self._points, first=".Point", rest=".Point")
+
+    def vba(self) -> list[str]:
+        lines = super().vba()
+        lines.insert(2, ".Version 10")
+        return lines
+
+
+def point_lines(
+    points: numpy.ndarray, *, first: str = ".Point", rest: str = ".LineTo"
+) -> list[str]:
+    """把点列批量格式化为`.Point "x", "y"`形式的语句。
+
+    Args:
+        points (numpy.ndarray): 形状为(N, dim)的点列。
+        first (str, optional): 第一个点使用的方法. Defaults to ".Point".
+        rest (str, optional): 其余点使用的方法. Defaults to ".LineTo".
+
+    Returns:
+        list[str]: VBA代码行。
+    """
+    pts = numpy.asarray(points, dtype=float)
+    coords = format_numbers(pts).reshape(pts.shape)
+    body = coords[:, 0]
+    for j in range(1, pts.shape[1]):
+        body = numpy.char.add(numpy.char.add(body, '", "'), coords[:, j])
+    methods = numpy.full(len(pts), rest, dtype=object)
+    methods[0] = first
+    lines = numpy.char.add(
+        numpy.char.add(methods.astype(str), ' "'), numpy.char.add(body, '"')
+    )
+    return lines.tolist()
@@ -0,0 +1,523 @@
+"""在本地拟合色散材料模型，把极点直接写入`Material`，避免CST每次重建历史时重新拟合。
+
+时间约定与CST相同（`exp(jωt)`），有耗材料的介电常数写作`ε = ε' - jε''`。频率使用
+材料单位（`SetMaterialUnit`，默认GHz），模型中的角频率为`ω = 2πf`，时间常数的单位为
+频率单位的倒数。
+
+支持的模型：
+
+- `debye`：`ε(ω) = ε∞ + (εs - ε∞) / (1 + jωτ)`，对应`DispModelEps "Debye1st"`。
+- `lorentz`：`ε(ω) = ε∞ + (εs - ε∞)ω0² / (ω0² + jωδ - ω²)`，对应`DispModelEps "Lorentz"`。
+- `general`：任意阶有理函数（矢量拟合），`χ(s) = Σ β0 / (α0 + s) + Σ (β0 + β1·s) / (α0 + α1·s + s²)`，
+  对应`AddDispEpsPole1stOrder`和`AddDispEpsPole2ndOrder`。
+
+拟合结果按数据的哈希缓存在内存中，指定`cache_dir`时也缓存到JSON文件。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import typing
+
+import numpy
+
+from ._global import Units
+from .material import Material
+
+_logger = logging.getLogger(__name__)
+
+__all__: list[str] = [
+    "DispersionFit",
+    "fit_debye",
+    "fit_lorentz",
+    "fit_general",
+    "fit",
+    "dispersive_material",
+]
+
+_CACHE: dict[str, "DispersionFit"] = {}
+# 拟合算法改变时递增，使文件缓存中的旧结果失效
+_CACHE_VERSION: int = 2
+
+
+class DispersionFit(typing.NamedTuple):
+    """色散模型的拟合结果。
+
+    Attributes:
+        model (str): `"debye"`、`"lorentz"`或`"general"`。
+        eps_infinity (float): 高频介电常数。
+        coefficients (tuple[float, ...]): Debye为(εs, τ)，Lorentz为(εs, ω0, δ)。
+        first_order (tuple[tuple[float, float], ...]): 一阶项(α0, β0)。
+        second_order (tuple[tuple[float, float, float, float], ...]): 二阶项(α0, α1, β0, β1)。
+        rms_error (float): 相对均方根误差。
+        unit (str): 频率单位。
+    """
+
+    model: str
+    eps_infinity: float
+    coefficients: tuple = ()
+    first_order: tuple = ()
+    second_order: tuple = ()
+    rms_error: float = 0.0
+    unit: str = "GHz"
+
+    def evaluate(self, frequency: numpy.ndarray) -> numpy.ndarray:
+        """计算拟合模型在给定频率（材料单位）上的复介电常数。"""
+        s = 2j * numpy.pi * numpy.asarray(frequency, dtype=float)
+        eps = numpy.full(s.shape, self.eps_infinity, dtype=complex)
+        if self.model == "debye":
+            eps_s, tau = self.coefficients
+            eps += (eps_s - self.eps_infinity) / (1 + s * tau)
+        elif self.model == "lorentz":
+            eps_s, w0, delta = self.coefficients
+            eps += (
+                (eps_s - self.eps_infinity) * w0**2 / (w0**2 + s * delta + s**2)
+            )
+        for a0, b0 in self.first_order:
+            eps += b0 / (a0 + s)
+        for a0, a1, b0, b1 in self.second_order:
+            eps += (b0 + b1 * s) / (a0 + a1 * s + s**2)
+        return eps
+
+    def properties(self) -> dict[str, str | list[str]]:
+        """生成`Material`的色散属性。
+
+        Returns:
+            dict[str, str | list[str]]: 属性名及对应的值。
+        """
+        props: dict[str, str | list[str]] = {
+            "EpsInfinity": f'"{self.eps_infinity:.15g}"',
+        }
+        if self.model == "debye":
+            props["DispModelEps"] = '"Debye1st"'
+        elif self.model == "lorentz":
+            props["DispModelEps"] = '"Lorentz"'
+        else:
+            props["DispModelEps"] = '"None"'
+            props["UseGeneralDispersionEps"] = '"True"'
+            props["DispersiveFittingSchemeEps"] = (
+                '"General 2nd"' if self.second_order else '"General 1st"'
+            )
+        for i, c in enumerate(self.coefficients, start=1):
+            props[f"DispCoeff{i}Eps"] = f'"{c:.15g}"'
+        if self.first_order:
+            props["AddDispEpsPole1stOrder"] = [
+                ", ".join(f'"{v:.15g}"' for v in term)
+                for term in self.first_order
+            ]
+        if self.second_order:
+            props["AddDispEpsPole2ndOrder"] = [
+                ", ".join(f'"{v:.15g}"' for v in term)
+                for term in self.second_order
+            ]
+        return props
+
+
+def _prepare(
+    frequency: typing.Any, eps: typing.Any
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    f = numpy.asarray(frequency, dtype=float).ravel()
+    e = numpy.asarray(eps, dtype=complex).ravel()
+    if f.shape != e.shape or f.size < 3:
+        raise ValueError(
+            "frequency and eps must be 1-D arrays of equal length >= 3."
+        )
+    if numpy.any(f <= 0):
+        raise ValueError("frequencies must be positive.")
+    return f, e
+
+
+def _rms(fit: DispersionFit, f: numpy.ndarray, e: numpy.ndarray) -> float:
+    err = numpy.abs(fit.evaluate(f) - e) / numpy.maximum(numpy.abs(e), 1e-12)
+    return float(numpy.sqrt(numpy.mean(err**2)))
+
+
+def _linear_fit(
+    basis: numpy.ndarray, e: numpy.ndarray
+) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """对每个候选基函数g（形状(K, F)）同时求解 e ≈ a + b·g（a、b为实数）。
+
+    Returns:
+        a、b和残差平方和，形状均为(K,)。
+    """
+    g = numpy.concatenate([basis.real, basis.imag], axis=-1)
+    y = numpy.concatenate([e.real, e.imag])
+    one = numpy.concatenate([numpy.ones(len(e)), numpy.zeros(len(e))])
+    s11 = one @ one
+    s12 = g @ one
+    s22 = numpy.einsum("kf,kf->k", g, g)
+    t1 = one @ y
+    t2 = g @ y
+    det = s11 * s22 - s12**2
+    det = numpy.where(numpy.abs(det) > 1e-300, det, numpy.inf)
+    a = (s22 * t1 - s12 * t2) / det
+    b = (s11 * t2 - s12 * t1) / det
+    residual = ((a[:, None] * one + b[:, None] * g - y) ** 2).sum(axis=-1)
+    return a, b, residual
+
+
+def fit_debye(
+    frequency: typing.Any,
+    eps: typing.Any,
+    *,
+    unit: str = "GHz",
+    grid: int = 256,
+    refine: int = 4,
+) -> DispersionFit:
+    """拟合一阶Debye模型。对候选τ批量求解线性最小二乘，再逐级加密网格。
+
+    Args:
+        frequency (Any): 频率（材料单位）。
+        eps (Any): 复介电常数`ε' - jε''`。
+        unit (str, optional): 频率单位. Defaults to "GHz".
+        grid (int, optional): 每级网格的候选数. Defaults to 256.
+        refine (int, optional): 加密次数. Defaults to 4.
+
+    Returns:
+        DispersionFit: 拟合结果。
+    """
+    f, e = _prepare(frequency, eps)
+    w = 2 * numpy.pi * f
+    lo, hi = numpy.log(0.01 / w.max()), numpy.log(100 / w.min())
+    for _ in range(refine + 1):
+        tau = numpy.exp(numpy.linspace(lo, hi, grid))
+        a, b, res = _linear_fit(1 / (1 + 1j * w[None] * tau[:, None]), e)
+        k = int(numpy.argmin(res))
+        step = (hi - lo) / (grid - 1)
+        lo, hi = numpy.log(tau[k]) - 2 * step, numpy.log(tau[k]) + 2 * step
+    result = DispersionFit(
+        "debye", float(a[k]), (float(a[k] + b[k]), float(tau[k])), unit=unit
+    )
+    return result._replace(rms_error=_rms(result, f, e))
+
+
+def _lorentz_basis(
+    w: numpy.ndarray, w0: numpy.ndarray, delta: numpy.ndarray
+) -> numpy.ndarray:
+    w0, delta = w0[:, None], delta[:, None]
+    return w0**2 / (w0**2 + 1j * w[None] * delta - w[None] ** 2)
+
+
+def _refine_lorentz(
+    w: numpy.ndarray,
+    e: numpy.ndarray,
+    w0: float,
+    delta: float,
+    *,
+    iterations: int = 100,
+) -> tuple[float, float]:
+    """以网格结果为初值，用Levenberg-Marquardt在log(ω0)、log(δ)上局部优化。
+
+    每一步的εs、ε∞仍由线性最小二乘得到（变量投影），只迭代两个非线性参数。
+    """
+
+    def residual(theta: numpy.ndarray) -> numpy.ndarray:
+        g = _lorentz_basis(w, *numpy.exp(theta)[:, None])
+        a, b, _ = _linear_fit(g, e)
+        r = a[0] + b[0] * g[0] - e
+        return numpy.concatenate([r.real, r.imag])
+
+    theta = numpy.log([w0, delta])
+    r = residual(theta)
+    cost = r @ r
+    lam = 1e-3
+    h = 1e-7
+    for _ in range(iterations):
+        J = numpy.column_stack(
+            [(residual(theta + h * d) - r) / h for d in numpy.eye(2)]
+        )
+        A = J.T @ J
+        gradient = J.T @ r
+        while True:
+            try:
+                step = numpy.linalg.solve(
+                    A + lam * numpy.diag(numpy.diag(A) + 1e-30), -gradient
+                )
+            except numpy.linalg.LinAlgError:
+                step = numpy.zeros(2)
+            r_new = residual(theta + step)
+            cost_new = r_new @ r_new
+            if cost_new < cost or lam > 1e12:
+                break
+            lam *= 10
+        if not cost_new < cost:
+            break
+        converged = cost - cost_new <= 1e-12 * cost
+        theta, r, cost = theta + step, r_new, cost_new
+        lam = max(lam / 10, 1e-12)
+        if converged or numpy.abs(step).max() < 1e-12:
+            break
+    w0, delta = numpy.exp(theta)
+    return float(w0), float(delta)
+
+
+def fit_lorentz(
+    frequency: typing.Any,
+    eps: typing.Any,
+    *,
+    unit: str = "GHz",
+    grid: int = 64,
+    refine: int = 5,
+) -> DispersionFit:
+    """拟合Lorentz模型。
+
+    对候选(ω0, δ)二维网格批量求解线性最小二乘并逐级加密网格，再以最优网格点为初值
+    局部优化(ω0, δ)，避免尖锐谐振落在网格点之间。
+
+    Args:
+        frequency (Any): 频率（材料单位）。
+        eps (Any): 复介电常数`ε' - jε''`。
+        unit (str, optional): 频率单位. Defaults to "GHz".
+        grid (int, optional): 每个方向的候选数. Defaults to 64.
+        refine (int, optional): 加密次数. Defaults to 5.
+
+    Returns:
+        DispersionFit: 拟合结果。
+    """
+    f, e = _prepare(frequency, eps)
+    w = 2 * numpy.pi * f
+    bounds = numpy.log(
+        [[w.min() / 10, w.max() * 10], [w.min() / 1e3, w.max() * 10]]
+    )
+    for _ in range(refine + 1):
+        w0 = numpy.exp(numpy.linspace(*bounds[0], grid))
+        delta = numpy.exp(numpy.linspace(*bounds[1], grid))
+        W0, D = (x.ravel() for x in numpy.meshgrid(w0, delta, indexing="ij"))
+        a, b, res = _linear_fit(_lorentz_basis(w, W0, D), e)
+        k = int(numpy.argmin(res))
+        steps = (bounds[:, 1] - bounds[:, 0]) / (grid - 1)
+        centre = numpy.log([W0[k], D[k]])
+        bounds = numpy.column_stack([centre - 2 * steps, centre + 2 * steps])
+    w0, delta = _refine_lorentz(w, e, W0[k], D[k])
+    a, b, _ = _linear_fit(
+        _lorentz_basis(w, numpy.array([w0]), numpy.array([delta])), e
+    )
+    result = DispersionFit(
+        "lorentz",
+        float(a[0]),
+        (float(a[0] + b[0]), w0, delta),
+        unit=unit,
+    )
+    return result._replace(rms_error=_rms(result, f, e))
+
+
+def _vf_basis(s: numpy.ndarray, poles: numpy.ndarray) -> numpy.ndarray:
+    """矢量拟合的实数化基函数。
+
+    实极点为1/(s-p)，共轭极点对为(1/(s-p) + 1/(s-p*), j/(s-p) - j/(s-p*))。
+    """
+    columns = []
+    for p in poles:
+        if p.imag == 0:
+            columns.append(1 / (s - p.real))
+        else:
+            u, v = 1 / (s - p), 1 / (s - p.conjugate())
+            columns += [u + v, 1j * u - 1j * v]
+    return numpy.column_stack(columns)
+
+
+def _vf_state(poles: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """极点的实数状态空间形式(A, b)。"""
+    n = sum(1 if p.imag == 0 else 2 for p in poles)
+    A = numpy.zeros((n, n))
+    b = numpy.zeros(n)
+    i = 0
+    for p in poles:
+        if p.imag == 0:
+            A[i, i], b[i] = p.real, 1.0
+            i += 1
+        else:
+            A[i : i + 2, i : i + 2] = [[p.real, p.imag], [-p.imag, p.real]]
+            b[i] = 2.0
+            i += 2
+    return A, b
+
+
+def _stack(M: numpy.ndarray) -> numpy.ndarray:
+    return numpy.concatenate([M.real, M.imag])
+
+
+def fit_general(
+    frequency: typing.Any,
+    eps: typing.Any,
+    order: int = 4,
+    *,
+    unit: str = "GHz",
+    iterations: int = 20,
+) -> DispersionFit:
+    """用矢量拟合（Gustavsen-Semlyen）得到任意阶的一阶/二阶极点模型。
+
+    Args:
+        frequency (Any): 频率（材料单位）。
+        eps (Any): 复介电常数`ε' - jε''`。
+        order (int, optional): 模型阶数（极点个数）. Defaults to 4.
+        unit (str, optional): 频率单位. Defaults to "GHz".
+        iterations (int, optional): 极点迭代次数. Defaults to 20.
+
+    Returns:
+        DispersionFit: 拟合结果，复极点对转为二阶项，实极点转为一阶项。
+    """
+    f, e = _prepare(frequency, eps)
+    if order < 1:
+        raise ValueError("order must be >= 1.")
+    s = 2j * numpy.pi * f
+    w = numpy.abs(s)
+    beta = numpy.linspace(w.min(), w.max(), max(order // 2, 1) + 2)[1:-1]
+    poles = list(-beta / 100 + 1j * beta)[: order // 2]
+    if order % 2:
+        poles.append(complex(-numpy.sqrt(w.min() * w.max()), 0.0))
+    poles = numpy.array(poles, dtype=complex)
+    for _ in range(iterations):
+        phi = _vf_basis(s, poles)
+        A = numpy.column_stack([phi, numpy.ones(len(s)), -e[:, None] * phi])
+        x = numpy.linalg.lstsq(_stack(A), _stack(e), rcond=None)[0]
+        c_sigma = x[phi.shape[1] + 1 :]
+        a_mat, b_vec = _vf_state(poles)
+        zeros = numpy.linalg.eigvals(a_mat - numpy.outer(b_vec, c_sigma))
+        # 翻转不稳定极点，每对共轭极点只保留虚部为正的一个
+        zeros = numpy.where(zeros.real > 0, -zeros.conjugate(), zeros)
+        real = numpy.abs(zeros.imag) <= 1e-9 * numpy.abs(zeros)
+        zeros = numpy.where(real, zeros.real + 0j, zeros)
+        poles = zeros[zeros.imag >= 0]
+    phi = _vf_basis(s, poles)
+    A = numpy.column_stack([phi, numpy.ones(len(s))])
+    x = numpy.linalg.lstsq(_stack(A), _stack(e), rcond=None)[0]
+    first, second, i = [], [], 0
+    for p in poles:
+        if p.imag == 0:
+            first.append((float(-p.real), float(x[i])))
+            i += 1
+        else:
+            r = complex(x[i], x[i + 1])
+            second.append(
+                (
+                    float(abs(p) ** 2),
+                    float(-2 * p.real),
+                    float(-2 * (r * p.conjugate()).real),
+                    float(2 * r.real),
+                )
+            )
+            i += 2
+    result = DispersionFit(
+        "general",
+        float(x[-1]),
+        first_order=tuple(first),
+        second_order=tuple(second),
+        unit=unit,
+    )
+    return result._replace(rms_error=_rms(result, f, e))
+
+
+_FITTERS: dict[str, typing.Callable[..., DispersionFit]] = {
+    "debye": fit_debye,
+    "lorentz": fit_lorentz,
+    "general": fit_general,
+}
+
+
+def _data_hash(
+    model: str, f: numpy.ndarray, e: numpy.ndarray, options: dict
+) -> str:
+    h = hashlib.sha1()
+    h.update(
+        repr((_CACHE_VERSION, model, sorted(options.items()))).encode("utf-8")
+    )
+    h.update(numpy.ascontiguousarray(f).tobytes())
+    h.update(numpy.ascontiguousarray(e).tobytes())
+    return h.hexdigest()
+
+
+def fit(
+    frequency: typing.Any,
+    eps: typing.Any,
+    model: str = "general",
+    *,
+    cache_dir: str = None,
+    **options,
+) -> DispersionFit:
+    """按数据哈希缓存的拟合入口。
+
+    Args:
+        frequency (Any): 频率（材料单位）。
+        eps (Any): 复介电常数`ε' - jε''`。
+        model (str, optional): `"debye"`、`"lorentz"`或`"general"`. Defaults to "general".
+        cache_dir (str, optional): 磁盘缓存目录，`None`表示只缓存在内存中.
+        **options: 传给对应拟合函数的参数，如`order`、`unit`。
+
+    Returns:
+        DispersionFit: 拟合结果。
+    """
+    if model not in _FITTERS:
+        raise ValueError(f"unknown dispersion model: {model}")
+    f, e = _prepare(frequency, eps)
+    key = _data_hash(model, f, e, options)
+    path = None if cache_dir is None else os.path.join(cache_dir, f"{key}.json")
+    result = _CACHE.get(key)
+    if result is None and path is not None and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as fp:
+            data = json.load(fp)
+        result = DispersionFit(
+            data["model"],
+            data["eps_infinity"],
+            tuple(data["coefficients"]),
+            tuple(tuple(t) for t in data["first_order"]),
+            tuple(tuple(t) for t in data["second_order"]),
+            data["rms_error"],
+            data["unit"],
+        )
+    if result is None:
+        result = _FITTERS[model](f, e, **options)
+        _logger.info(
+            "%s dispersion fitted, rms error %.3g.", model, result.rms_error
+        )
+    if path is not None and not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(result._asdict(), fp)
+    _CACHE[key] = result
+    return result
+
+
+def dispersive_material(
+    name: str,
+    frequency: typing.Any,
+    eps: typing.Any,
+    model: str = "general",
+    *,
+    folder: str = "",
+    properties: dict[str, str] = None,
+    cache_dir: str = None,
+    units: Units = None,
+    **options,
+) -> Material:
+    """拟合测量数据并生成带有预先计算的极点的材料。
+
+    Args:
+        name (str): 材料名。
+        frequency (Any): 频率（材料单位）。
+        eps (Any): 复介电常数`ε' - jε''`。
+        model (str, optional): 色散模型. Defaults to "general".
+        folder (str, optional): 材料文件夹. Defaults to "".
+        properties (dict[str, str], optional): 其它属性，如颜色.
+        cache_dir (str, optional): 磁盘缓存目录.
+        units (Units, optional): 项目单位，`SetMaterialUnit`使用其中的长度单位，未指定
+            `unit`时也使用其中的频率单位. Defaults to `Units()`.
+        **options: 传给`fit`的参数。
+
+    Returns:
+        Material: 材料。
+    """
+    units = Units() if units is None else units
+    options.setdefault("unit", units.frequency)
+    result = fit(frequency, eps, model, cache_dir=cache_dir, **options)
+    props: dict[str, str | list[str]] = {
+        "FrqType": '"all"',
+        "Type": '"Normal"',
+        "SetMaterialUnit": f'"{result.unit}", "{units.length}"',
+        "Epsilon": f'"{result.evaluate([0.0])[0].real:.15g}"',
+        "Mu": '"1.0"',
+    }
+    props.update(result.properties())
+    props.update(properties or {})
+    return Material(name, folder, properties=props)
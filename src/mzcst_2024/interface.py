@@ -10,12 +10,13 @@ the associated applications (`prj.model3d`)."""
 
 import logging
 import os
-from typing import Dict, List, Union
+from typing import Callable, Dict, List, Union
 
 import cst
 import cst.interface
 
 from . import _global
+from .common import NEW_LINE
 
 _logger = logging.getLogger(__name__)
 
@@ -33,6 +34,30 @@ class Model3D:
             modeler (cst.interface.Model3D): 建模器对象。
         """
         self.model3d = modeler
+        # 由`solver.hf.define_frequency_range`记录的频率范围(fmin, fmax)
+        self.frequency_range: tuple = None
+        # 启动求解器前调用的检查函数，见`set_solver_guard`
+        self._solver_guard: Callable[["Model3D"], object] = None
+        return
+
+    def set_solver_guard(
+        self, guard: Callable[["Model3D"], object] = None
+    ) -> None:
+        """设置启动求解器前的检查函数，检查函数抛出异常时不会启动求解器。
+
+        Args:
+            guard (Callable[[Model3D], object], optional): 检查函数，`None`表示取消.
+                例如`solver.mesh.MeshEstimator.check`.
+
+        Returns:
+            None
+        """
+        self._solver_guard = guard
+        return
+
+    def _check_solver_guard(self) -> None:
+        if self._solver_guard is not None:
+            self._solver_guard(self)
         return
 
     def abort_solver(self, *, timeout: int = None) -> None:
@@ -62,6 +87,22 @@ class Model3D:
         """
         return self.model3d.add_to_history(header, vba_code, timeout=timeout)
 
+    def execute_vba_code(self, vba_code: str, *, timeout: int = None) -> str:
+        """直接执行一段临时的VBA代码，不写入历史记录，重建历史时也不会重放。
+
+        代码中没有`Sub Main`时会自动包装。适用于绘图、导出等不影响模型的操作。
+
+        Args:
+            vba_code (str): VBA代码。
+            timeout (int, optional): 执行时间限制. Defaults to None.
+
+        Returns:
+            str: CST返回的结果。
+        """
+        return self.model3d._execute_vba_code(
+            _as_sub_main(vba_code), timeout=timeout
+        )
+
     def get_active_solver_name(self, *, timeout: int = None) -> str:
         """Returns the currently active solver name.
 
@@ -91,6 +132,7 @@ class Model3D:
         return self.model3d.resume_solver(timeout)
 
     def run_solver(self, *, timeout: int = None) -> None:
+        self._check_solver_guard()
         return self.model3d.run_solver(timeout)
 
     def start_solver(self, *, timeout: int = None) -> None:
@@ -104,6 +146,7 @@ class Model3D:
         Returns:
             None:
         """
+        self._check_solver_guard()
         return self.model3d.start_solver(timeout=timeout)
 
     def get_solver_run_info(self, *, timeout: int = None) -> dict:
@@ -172,6 +215,55 @@ class Model3D:
         return
 
 
+def _as_sub_main(vba_code: str) -> str:
+    if "sub main" in vba_code.lower():
+        return vba_code
+    return NEW_LINE.join(["Sub Main", vba_code, "End Sub"])
+
+
+def run_vba(
+    modeler: "Model3D",
+    header: str,
+    vba_code: str,
+    *,
+    record_history: bool = False,
+    timeout: int = None,
+) -> None:
+    """执行临时VBA代码（绘图、导出等）。
+
+    默认不写入历史记录；`record_history`为`True`或CST版本不支持直接执行时，改用
+    `add_to_history`。
+
+    Args:
+        modeler (Model3D): 建模环境，也可以是`cst.interface.Model3D`。
+        header (str): 历史记录标题（仅在写入历史记录时使用）。
+        vba_code (str): VBA代码。
+        record_history (bool, optional): 是否写入历史记录. Defaults to False.
+        timeout (int, optional): 执行时间限制. Defaults to None.
+
+    Returns:
+        None
+    """
+    if not record_history:
+        if isinstance(modeler, Model3D):
+            target = modeler.model3d
+        else:
+            target = modeler
+        if hasattr(target, "_execute_vba_code"):
+            target._execute_vba_code(_as_sub_main(vba_code), timeout=timeout)
+            _logger.info("executed without history: %s", header)
+            return
+        _logger.warning(
+            "direct VBA execution is not available, %s goes to history.",
+            header,
+        )
+    if timeout is None:
+        modeler.add_to_history(header, vba_code)
+    else:
+        modeler.add_to_history(header, vba_code, timeout=timeout)
+    return
+
+
 class Schematic:
     def __init__(self):
         pass
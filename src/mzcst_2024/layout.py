@@ -0,0 +1,470 @@
+"""把同一层（相同z范围、相同材料）上的矩形和直角多边形在本地合并，每个连通区域只生成
+一个`Pointlist`挤压实体。
+
+FSS单元等版图通常由多个`Brick`走线经`Solid.add`拼接而成，每个单元需要5个实体和4次布尔
+运算；合并后每个连通区域只需要1个实体，孔洞用挤压实体相减。
+
+Example::
+
+    lc = layout.LayoutCompiler("fss", "PEC", "0", "t")
+    lc.add_rectangles(x0, x1, y0, y1)
+    lc.create(modeler)
+"""
+
+import logging
+import typing
+
+import numpy
+
+from . import interface, tessellation
+from .common import NEW_LINE, OPERATION_SUCCESS
+from .component import ComponentTree
+from .profiles_to_shapes import Extrude
+
+_logger = logging.getLogger(__name__)
+
+__all__: list[str] = ["Region", "LayoutCompiler", "union_regions"]
+
+
+class Region(typing.NamedTuple):
+    """合并后的一个连通区域。
+
+    Attributes:
+        outer (numpy.ndarray): 外边界，逆时针，形状为(N, 2)，不重复首点。
+        holes (list[numpy.ndarray]): 孔洞边界，顺时针。
+    """
+
+    outer: numpy.ndarray
+    holes: list[numpy.ndarray]
+
+
+#######################################
+# region 二维布尔并
+# ↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓
+
+# 方向编号：0: +x, 1: +y, 2: -x, 3: -y
+_STEPS = numpy.array([[1, 0], [0, 1], [-1, 0], [0, -1]])
+
+
+def _fill_rectangles(
+    filled: numpy.ndarray,
+    xs: numpy.ndarray,
+    ys: numpy.ndarray,
+    rects: numpy.ndarray,
+) -> None:
+    """用二维差分数组把矩形批量栅格化到压缩坐标网格上。"""
+    i0 = numpy.searchsorted(xs, rects[:, 0])
+    i1 = numpy.searchsorted(xs, rects[:, 1])
+    j0 = numpy.searchsorted(ys, rects[:, 2])
+    j1 = numpy.searchsorted(ys, rects[:, 3])
+    diff = numpy.zeros((len(xs), len(ys)), dtype=numpy.int64)
+    numpy.add.at(diff, (i0, j0), 1)
+    numpy.add.at(diff, (i1, j0), -1)
+    numpy.add.at(diff, (i0, j1), -1)
+    numpy.add.at(diff, (i1, j1), 1)
+    filled |= diff.cumsum(0).cumsum(1)[:-1, :-1] > 0
+    return
+
+
+def _fill_polygon(
+    filled: numpy.ndarray,
+    xs: numpy.ndarray,
+    ys: numpy.ndarray,
+    points: numpy.ndarray,
+) -> None:
+    """按奇偶规则把直角多边形栅格化：只检测其包围盒内的网格中心。"""
+    i0, i1 = numpy.searchsorted(xs, [points[:, 0].min(), points[:, 0].max()])
+    j0, j1 = numpy.searchsorted(ys, [points[:, 1].min(), points[:, 1].max()])
+    cx = 0.5 * (xs[i0:i1] + xs[i0 + 1 : i1 + 1])
+    cy = 0.5 * (ys[j0:j1] + ys[j0 + 1 : j1 + 1])
+    # 只有竖直边会与向+x方向的水平射线相交
+    a, b = points, numpy.roll(points, -1, axis=0)
+    vertical = a[:, 0] == b[:, 0]
+    ex = a[vertical, 0]
+    ey0 = numpy.minimum(a[vertical, 1], b[vertical, 1])
+    ey1 = numpy.maximum(a[vertical, 1], b[vertical, 1])
+    crosses_y = (cy[:, None] > ey0) & (cy[:, None] < ey1)  # (ny, e)
+    right_of = ex[None, :] > cx[:, None]  # (nx, e)
+    count = right_of.astype(numpy.int64) @ crosses_y.T.astype(numpy.int64)
+    filled[i0:i1, j0:j1] |= (count % 2).astype(bool)
+    return
+
+
+def _label(filled: numpy.ndarray) -> numpy.ndarray:
+    """四连通区域标记（最小编号传播），空白处为-1。"""
+    labels = numpy.where(
+        filled, numpy.arange(filled.size).reshape(filled.shape), filled.size
+    )
+    while True:
+        padded = numpy.pad(labels, 1, constant_values=filled.size)
+        neighbour = numpy.minimum.reduce(
+            [
+                labels,
+                padded[:-2, 1:-1],
+                padded[2:, 1:-1],
+                padded[1:-1, :-2],
+                padded[1:-1, 2:],
+            ]
+        )
+        neighbour = numpy.where(filled, neighbour, filled.size)
+        # 指针跳跃，加速长条形区域的收敛
+        flat = numpy.append(neighbour.ravel(), filled.size)
+        neighbour = numpy.where(filled, flat[flat[neighbour]], filled.size)
+        if numpy.array_equal(neighbour, labels):
+            break
+        labels = neighbour
+    return numpy.where(filled, labels, -1)
+
+
+def _boundary_edges(
+    filled: numpy.ndarray,
+) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """提取所有边界有向边（区域在左侧）。
+
+    Returns:
+        起点网格坐标(E, 2)、方向(E,)、所属网格(E, 2)。
+    """
+    padded = numpy.pad(filled, 1)
+    core = padded[1:-1, 1:-1]
+    starts, dirs, cells = [], [], []
+    # (方向, 相邻网格偏移, 起点相对网格左下角的偏移)
+    for d, (di, dj), (oi, oj) in (
+        (0, (0, -1), (0, 0)),  # 下边
+        (1, (1, 0), (1, 0)),  # 右边
+        (2, (0, 1), (1, 1)),  # 上边
+        (3, (-1, 0), (0, 1)),  # 左边
+    ):
+        other = numpy.roll(padded, (-di, -dj), axis=(0, 1))[1:-1, 1:-1]
+        ij = numpy.argwhere(core & ~other)
+        starts.append(ij + (oi, oj))
+        dirs.append(numpy.full(len(ij), d))
+        cells.append(ij)
+    return (
+        numpy.concatenate(starts),
+        numpy.concatenate(dirs),
+        numpy.concatenate(cells),
+    )
+
+
+def _trace_loops(
+    starts: numpy.ndarray, dirs: numpy.ndarray, shape: tuple[int, int]
+) -> list[tuple[int, numpy.ndarray]]:
+    """把有向边连成闭合环路，只保留拐角顶点。
+
+    在两个区域对角相接的顶点上优先左转，保证环路不会跨越对角相接的网格。
+
+    Returns:
+        list[tuple[int, numpy.ndarray]]: (首条边编号, 顶点网格坐标)。
+    """
+    width = shape[1] + 1
+    key = starts[:, 0] * width + starts[:, 1]
+    order = numpy.argsort(key, kind="stable")
+    sorted_key = key[order]
+    end = key + _STEPS[dirs] @ (width, 1)
+    lo = numpy.searchsorted(sorted_key, end, side="left")
+    hi = numpy.searchsorted(sorted_key, end, side="right")
+    used = numpy.zeros(len(starts), dtype=bool)
+    loops = []
+    for e0 in range(len(starts)):
+        if used[e0]:
+            continue
+        corners = []
+        e = e0
+        while True:
+            used[e] = True
+            d = dirs[e]
+            cand = order[lo[e] : hi[e]]  # 终点处的出边（至多两条）
+            nxt = None
+            for turn in (1, 0, 3):
+                for c in cand:
+                    if dirs[c] == (d + turn) % 4 and (not used[c] or c == e0):
+                        nxt = c
+                        break
+                if nxt is not None:
+                    break
+            if dirs[nxt] != d:
+                corners.append(starts[nxt])
+            if nxt == e0:
+                break
+            e = nxt
+        loops.append((e0, numpy.array(corners)))
+    return loops
+
+
+def _area(points: numpy.ndarray) -> float:
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(x @ numpy.roll(y, -1) - numpy.roll(x, -1) @ y)
+
+
+def union_regions(
+    rectangles: numpy.ndarray = None,
+    polygons: typing.Iterable[numpy.ndarray] = (),
+    *,
+    decimals: int = 9,
+) -> list[Region]:
+    """计算矩形和直角多边形的并集，按四连通区域输出边界。
+
+    所有顶点坐标先按`decimals`取整后做坐标压缩，再在压缩网格上做栅格化、连通区域
+    标记和边界追踪，结果是精确的。
+
+    Args:
+        rectangles (numpy.ndarray, optional): 形状为(N, 4)的`(xmin, xmax, ymin, ymax)`。
+        polygons (Iterable[numpy.ndarray], optional): 直角多边形点列，每条边平行于坐标轴。
+        decimals (int, optional): 坐标取整的小数位数. Defaults to 9.
+
+    Returns:
+        list[Region]: 连通区域，按外边界左下角排序。
+    """
+    rects = (
+        numpy.zeros((0, 4))
+        if rectangles is None
+        else numpy.round(
+            numpy.asarray(rectangles, dtype=float).reshape(-1, 4), decimals
+        )
+    )
+    rects = numpy.column_stack(
+        [
+            numpy.minimum(rects[:, 0], rects[:, 1]),
+            numpy.maximum(rects[:, 0], rects[:, 1]),
+            numpy.minimum(rects[:, 2], rects[:, 3]),
+            numpy.maximum(rects[:, 2], rects[:, 3]),
+        ]
+    )
+    rects = rects[(rects[:, 0] < rects[:, 1]) & (rects[:, 2] < rects[:, 3])]
+    polys = [
+        numpy.round(numpy.asarray(p, dtype=float)[:, :2], decimals)
+        for p in polygons
+    ]
+    for p in polys:
+        a, b = p, numpy.roll(p, -1, axis=0)
+        if not numpy.all((a[:, 0] == b[:, 0]) | (a[:, 1] == b[:, 1])):
+            raise ValueError("only rectilinear polygons can be merged.")
+    if len(rects) == 0 and not polys:
+        return []
+    xs = numpy.unique(
+        numpy.concatenate([rects[:, :2].ravel()] + [p[:, 0] for p in polys])
+    )
+    ys = numpy.unique(
+        numpy.concatenate([rects[:, 2:].ravel()] + [p[:, 1] for p in polys])
+    )
+    filled = numpy.zeros((len(xs) - 1, len(ys) - 1), dtype=bool)
+    if len(rects):
+        _fill_rectangles(filled, xs, ys, rects)
+    for p in polys:
+        _fill_polygon(filled, xs, ys, p)
+
+    labels = _label(filled)
+    starts, dirs, cells = _boundary_edges(filled)
+    outers: dict[int, numpy.ndarray] = {}
+    holes: dict[int, list[numpy.ndarray]] = {}
+    for e0, corners in _trace_loops(starts, dirs, filled.shape):
+        label = int(labels[tuple(cells[e0])])
+        points = numpy.column_stack([xs[corners[:, 0]], ys[corners[:, 1]]])
+        if _area(points) > 0:
+            outers[label] = points
+        else:
+            holes.setdefault(label, []).append(points)
+    regions = [Region(outers[k], holes.get(k, [])) for k in outers]
+    regions.sort(key=lambda r: (r.outer[:, 1].min(), r.outer[:, 0].min()))
+    return regions
+
+
+# ↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑
+# endregion
+#######################################
+
+
+class LayoutCompiler:
+    """收集同一层上的走线，合并后一次性生成挤压实体。
+
+    Attributes:
+        component (str): 部件名称。
+        material (str): 材料名称。
+        z_min (str | float): 层的下表面。
+        z_max (str | float): 层的上表面。
+        name (str): 生成实体的名称前缀。
+        decimals (int): 坐标取整的小数位数。
+    """
+
+    def __init__(
+        self,
+        component: str,
+        material: str,
+        z_min: str | float,
+        z_max: str | float,
+        *,
+        name: str = "trace",
+        decimals: int = 9,
+    ):
+        self._component = str(component)
+        self._material = str(material)
+        self._z_min = z_min
+        self._z_max = z_max
+        self._name = name
+        self._decimals = decimals
+        self._rects: list[numpy.ndarray] = []
+        self._polygons: list[numpy.ndarray] = []
+        self._n_inputs = 0
+        self._regions: list[Region] = None
+        return
+
+    @property
+    def component(self) -> str:
+        return self._component
+
+    @property
+    def material(self) -> str:
+        return self._material
+
+    @property
+    def n_inputs(self) -> int:
+        return self._n_inputs
+
+    def add_rectangles(
+        self,
+        x_min: typing.Any,
+        x_max: typing.Any,
+        y_min: typing.Any,
+        y_max: typing.Any,
+    ) -> "LayoutCompiler":
+        """批量添加矩形，参数为数值或可广播的数组。
+
+        Returns:
+            self (LayoutCompiler): self。
+        """
+        rects = numpy.stack(
+            numpy.broadcast_arrays(x_min, x_max, y_min, y_max), -1
+        ).reshape(-1, 4)
+        self._rects.append(rects.astype(float))
+        self._n_inputs += len(rects)
+        self._regions = None
+        return self
+
+    def add_polygon(self, points: numpy.ndarray) -> "LayoutCompiler":
+        """添加一个直角多边形（每条边平行于x轴或y轴）。
+
+        Args:
+            points (numpy.ndarray): 形状为(N, 2)的点列，首尾可以重复。
+
+        Returns:
+            self (LayoutCompiler): self。
+        """
+        pts = numpy.asarray(points, dtype=float)[:, :2]
+        if len(pts) > 1 and numpy.array_equal(pts[0], pts[-1]):
+            pts = pts[:-1]
+        self._polygons.append(pts)
+        self._n_inputs += 1
+        self._regions = None
+        return self
+
+    def add_bricks(
+        self,
+        bricks: typing.Iterable[typing.Any],
+        parameters: dict[str, typing.Any] = None,
+    ) -> "LayoutCompiler":
+        """添加位于本层的`Brick`（不会在CST中创建这些立方体）。
+
+        Args:
+            bricks (Iterable[Brick]): 立方体，部件、材料和z范围必须与本层相同。
+            parameters (dict[str, Any], optional): 参数表，见`math_.evaluate`.
+
+        Returns:
+            self (LayoutCompiler): self。
+        """
+        bricks = list(bricks)
+        z = tessellation.evaluate_many((self._z_min, self._z_max), parameters)
+        for b in bricks:
+            if b.component != self._component or b.material != self._material:
+                raise ValueError(
+                    f"brick {b.component}:{b.name} is not on layer "
+                    + f"{self._component}/{self._material}."
+                )
+        columns = [
+            tessellation.evaluate_many(
+                (getattr(b, a) for b in bricks), parameters
+            )
+            for a in ("xmin", "xmax", "ymin", "ymax", "zmin", "zmax")
+        ]
+        if len(bricks) and not (
+            numpy.allclose(numpy.minimum(columns[4], columns[5]), z[0])
+            and numpy.allclose(numpy.maximum(columns[4], columns[5]), z[1])
+        ):
+            raise ValueError("all bricks must span the z range of the layer.")
+        return self.add_rectangles(*columns[:4])
+
+    def regions(self) -> list[Region]:
+        """计算并缓存合并后的连通区域。"""
+        if self._regions is None:
+            rects = numpy.concatenate(self._rects) if self._rects else None
+            self._regions = union_regions(
+                rects, self._polygons, decimals=self._decimals
+            )
+        return self._regions
+
+    def _height(self) -> str:
+        if isinstance(self._z_min, (int, float)) and isinstance(
+            self._z_max, (int, float)
+        ):
+            return repr(float(self._z_max - self._z_min))
+        return f"({self._z_max})-({self._z_min})"
+
+    def extrudes(self) -> tuple[list[Extrude], list[tuple[Extrude, Extrude]]]:
+        """生成挤压实体（尚未在CST中创建）。
+
+        Returns:
+            tuple: 每个区域的外边界实体，以及(外边界实体, 孔洞实体)组成的相减列表。
+        """
+        height = self._height()
+        origin = ("0.0", "0.0", str(self._z_min))
+        solids, subtractions = [], []
+        for k, region in enumerate(self.regions()):
+            name = f"{self._name}_{k}"
+            outer = Extrude.from_polygon(
+                name, self._component, self._material, region.outer, height,
+                origin=origin,
+            )  # fmt: skip
+            solids.append(outer)
+            for h, hole in enumerate(region.holes):
+                cut = Extrude.from_polygon(
+                    f"{name}_hole{h}", self._component, self._material,
+                    hole[::-1], height, origin=origin,
+                )  # fmt: skip
+                subtractions.append((outer, cut))
+        return solids, subtractions
+
+    def create(
+        self, modeler: "interface.Model3D", *, tree: ComponentTree = None
+    ) -> list[Extrude]:
+        """在同一条历史记录中创建所有合并后的实体，并减去孔洞。
+
+        Args:
+            modeler (interface.Model3D): 建模环境。
+            tree (ComponentTree, optional): 部件索引。给定时先创建尚未创建的部件.
+
+        Returns:
+            list[Extrude]: 每个连通区域一个挤压实体。
+        """
+        solids, subtractions = self.extrudes()
+        if not solids:
+            _logger.warning("layout %s is empty.", self._name)
+            return []
+        sCommand = []
+        for s in solids:
+            sCommand += s.vba()
+        for outer, cut in subtractions:
+            sCommand += cut.vba()
+            sCommand.append(
+                f'Solid.Subtract "{outer.full_name}", "{cut.full_name}"'
+            )
+            outer.history.append(
+                f"boolean subtract shapes: {outer.full_name}, {cut.full_name}"
+            )
+        title = f"define layout: {self._component}:{self._name}"
+        if tree is not None:
+            tree.ensure(modeler, [self._component])
+        modeler.add_to_history(title, NEW_LINE.join(sCommand))
+        _logger.info(
+            OPERATION_SUCCESS,
+            f"{title} ({self._n_inputs} primitives -> {len(solids)} solids)",
+        )
+        return solids
@@ -1,13 +1,16 @@
 """定义 `Material` 类和与其相关的方法。"""
 
 import enum
+import hashlib
 import logging
+import typing
+import weakref
 
 from . import interface  # type:ignore
 from ._global import BaseObject
 from .common import NEW_LINE, quoted
 
-__all__: list[str] = []
+__all__: list[str] = ["Material", "MaterialRegistry"]
 
 _logger = logging.getLogger(__name__)
 
@@ -29,7 +32,9 @@ class Material(BaseObject):
     Attributes:
         name (str): 材料名。
         folder (str): 文件夹。
-        properties (dict[str, str]): 材料属性名及对应的值。
+        properties (dict[str, str | list[str]]): 材料属性名及对应的值，列表表示重复调用。
+        lines (list[tuple[str, str]]): 按顺序排列的`(方法, 参数)`。给定时按此顺序生成
+            VBA，用于`.FrqType`等分段交替出现的定义（如材料库中的`.mtd`文件）。
         vba (list[str]): 构造材料的完整vba代码。
 
     Default Settings::
@@ -71,12 +76,16 @@ class Material(BaseObject):
         name: str,
         folder: str = "",
         *,
-        properties: dict[str, str] = None,
+        properties: dict[str, str | list[str]] = None,
+        lines: list[tuple[str, str]] = None,
         vba: list[str] = None,
     ):
         super().__init__(attributes=properties, vba=vba)
         self._name: str = name
         self._folder: str = folder
+        self._lines: list[tuple[str, str]] = (
+            [(k, v) for k, v in lines] if lines else None
+        )
         # self._properties: dict[str, str] = properties
         self._history_title = f"define material: {self.full_name}"
         return
@@ -149,6 +158,10 @@ class Material(BaseObject):
     def properties(self) -> dict[str, str]:
         return self._attributes
 
+    @property
+    def lines(self) -> list[tuple[str, str]]:
+        return self._lines
+
     @property
     def full_name(self) -> str:
         """返回材料的名称和保存文件夹。
@@ -200,26 +213,215 @@ class Material(BaseObject):
         if not self._attributes:
             _logger.error("No valid properties.")
         else:
-            scmd1 = [
-                "With Material ",
-                ".Reset ",
-                f'.Name "{self.name}"',
-                f'.Folder "{self.folder}"',
-            ]
-            cmd1 = NEW_LINE.join(scmd1)
-            scmd2 = []
-            for k, v in self._attributes.items():
-                scmd2.append("." + k + " " + v)
-            cmd2 = NEW_LINE.join(scmd2)
-            scmd3 = [
-                ".Create",
-                "End With",
-            ]
-            cmd3 = NEW_LINE.join(scmd3)
-            cmd = NEW_LINE.join((cmd1, cmd2, cmd3))
+            cmd = NEW_LINE.join(self.vba())
             modeler.add_to_history(self._history_title, cmd)
         return self
 
+    def vba(self) -> list[str]:
+        """生成定义材料的完整With语句块。
+
+        Returns:
+            list[str]: VBA代码行。
+        """
+        scmd1 = [
+            "With Material ",
+            ".Reset ",
+            f'.Name "{self.name}"',
+            f'.Folder "{self.folder}"',
+        ]
+        scmd2 = []
+        if self._lines:
+            scmd2 = ["." + k + " " + v for k, v in self._lines]
+        else:
+            for k, v in self._attributes.items():
+                # 列表表示重复的方法调用，例如多个`AddDispEpsPole1stOrder`
+                for item in v if isinstance(v, list) else [v]:
+                    scmd2.append("." + k + " " + item)
+        scmd3 = [
+            ".Create",
+            "End With",
+        ]
+        return scmd1 + scmd2 + scmd3
+
+    def fingerprint(self) -> str:
+        """归一化属性后的哈希值，属性相同（忽略大小写、空白和数值写法）的材料哈希相同。
+
+        `lines`和`properties`归一化为同一种表示：按`FrqType`分段，段内的普通属性排序，
+        `Add*`方法（色散极点、拟合数据等）保持原有顺序，因此两种方式定义的同一材料哈希相同。
+
+        Returns:
+            str: 十六进制的SHA-1摘要。
+        """
+        if self._lines:
+            pairs = list(self._lines)
+        else:
+            pairs = [
+                (k, item)
+                for k, v in (self._attributes or {}).items()
+                for item in (v if isinstance(v, list) else [v])
+            ]
+        items = _canonical_items(pairs)
+        return hashlib.sha1(repr(items).encode("utf-8")).hexdigest()
+
+
+def _canonical_items(pairs: list[tuple[str, str]]) -> list[tuple]:
+    """把`(方法, 参数)`序列归一化为与书写顺序无关的表示。
+
+    `FrqType`之后的方法属于该频率类型的分段（默认`"all"`），同一频率类型的分段合并；
+    普通属性后设置的覆盖先设置的，`Add*`方法按出现顺序累加。
+
+    Returns:
+        list[tuple]: `(频率类型, 排序后的普通属性, 有序的Add*调用)`，按频率类型排序。
+    """
+    sections: dict[tuple, tuple[dict, list]] = {}
+    frq = ("all",)
+    for k, v in pairs:
+        method, value = k.lower(), _normalise_value(v)
+        if method == "frqtype":
+            frq = value
+            continue
+        attributes, ordered = sections.setdefault(frq, ({}, []))
+        if method.startswith("add"):
+            ordered.append((method, value))
+        else:
+            attributes[method] = value
+    return sorted(
+        (frq, sorted(attributes.items()), ordered)
+        for frq, (attributes, ordered) in sections.items()
+    )
+
+
+def _normalise_value(value: typing.Any) -> tuple:
+    """把属性值`' "1.0", "GHz"'`归一化为`(1.0, "ghz")`。"""
+    values = value if isinstance(value, (list, tuple)) else [value]
+    tokens = []
+    for v in values:
+        for t in str(v).split(","):
+            t = t.strip().strip('"').strip()
+            try:
+                tokens.append(float(t))
+            except ValueError:
+                tokens.append(t.lower())
+    return tuple(tokens)
+
+
+class MaterialRegistry:
+    """按名称去重的材料注册表，每个项目中每种材料只定义一次。
+
+    同名但属性不同的材料会引发`ValueError`；同名且属性相同的重复定义记为冗余，
+    `register`返回最先注册的材料。异名但属性相同的材料仍按各自的名称在CST中定义，
+    只在报告中记为`identical`，以便调用方合并材料。
+
+    Example::
+
+        registry = MaterialRegistry()
+        sub = registry.register(rogers_RT5880_lossy)
+        registry.define(modeler)
+    """
+
+    def __init__(self):
+        self._by_name: dict[str, Material] = {}
+        self._by_hash: dict[str, str] = {}
+        self._redundant: dict[str, int] = {}
+        self._identical: dict[str, str] = {}
+        # 每个建模环境中已经定义的材料全名
+        self._defined: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        return
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def __iter__(self) -> typing.Iterator[Material]:
+        return iter(self._by_name.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def get(self, name: str) -> Material:
+        """按全名（`folder/name`）查找材料。"""
+        return self._by_name[name]
+
+    def register(self, material: Material) -> Material:
+        """注册材料。
+
+        Args:
+            material (Material): 材料。
+
+        Raises:
+            ValueError: 已有同名材料但属性不同。
+
+        Returns:
+            Material: 已注册的同名材料，或`material`本身。
+        """
+        key = material.fingerprint()
+        name = material.full_name
+        existing = self._by_name.get(name)
+        if existing is not None:
+            if existing.fingerprint() != key:
+                raise ValueError(
+                    f"material {name} is already registered with other "
+                    "properties."
+                )
+            self._redundant[name] = self._redundant.get(name, 0) + 1
+            return existing
+        self._by_name[name] = material
+        first = self._by_hash.setdefault(key, name)
+        if first != name:
+            self._identical[name] = first
+            _logger.warning(
+                "material %s is identical to %s; both will be defined.",
+                name,
+                first,
+            )
+        return material
+
+    def register_many(
+        self, materials: typing.Iterable[Material]
+    ) -> list[Material]:
+        return [self.register(m) for m in materials]
+
+    def define(self, modeler: "interface.Model3D") -> list[Material]:
+        """在一条历史记录中定义所有尚未在该建模环境中定义的材料。
+
+        Args:
+            modeler (interface.Model3D): 建模环境。
+
+        Returns:
+            list[Material]: 本次新定义的材料。
+        """
+        defined = self._defined.setdefault(modeler, set())
+        pending = [
+            m
+            for n, m in self._by_name.items()
+            if n not in defined and m.properties
+        ]
+        if not pending:
+            return []
+        sCommand = []
+        for m in pending:
+            sCommand += m.vba()
+        names = ", ".join(m.full_name for m in pending[:3])
+        if len(pending) > 3:
+            names += f" (+{len(pending) - 3})"
+        title = f"define materials: {names}"
+        modeler.add_to_history(title, NEW_LINE.join(sCommand))
+        defined.update(m.full_name for m in pending)
+        _logger.info("%d materials defined.", len(pending))
+        return pending
+
+    def report(self) -> dict[str, typing.Any]:
+        """冗余定义报告。
+
+        Returns:
+            dict[str, Any]: `distinct`（属性不同的材料数）、`redundant`
+                （材料名 -> 重复次数）、`identical`（材料名 -> 属性相同的先注册材料名）。
+        """
+        return {
+            "distinct": len(self._by_hash),
+            "redundant": dict(self._redundant),
+            "identical": dict(self._identical),
+        }
+
 
 # 自带的材料
 PEC_: str = "PEC"
@@ -0,0 +1,311 @@
+"""读取CST材料库（`.mtd`文件），并用JSON索引缓存解析结果。
+
+索引按文件的修改时间和大小判断是否需要重新解析，因此包含数千种材料的材料库在第二次
+加载时只需读取一个JSON文件。材料只在`get`时才构造为`Material`对象，只有实际使用的
+材料才会写入项目。
+
+Example::
+
+    lib = MaterialLibrary(r"C:/Program Files/CST Studio Suite 2024/Library/Materials")
+    lib.search("rogers 5880")
+    fr4 = lib.get("FR-4 (lossy)")
+    lib.define(modeler, ["FR-4 (lossy)", "Copper (annealed)"])
+"""
+
+import hashlib
+import json
+import logging
+import os
+import typing
+
+from . import interface
+from .material import Material, MaterialRegistry
+
+_logger = logging.getLogger(__name__)
+
+__all__: list[str] = ["MaterialLibrary", "parse_mtd"]
+
+_INDEX_VERSION: int = 2
+# 由`Material`自动生成的方法，不作为属性保存
+_SKIPPED_METHODS: set[str] = {"reset", "create", "name", "folder"}
+
+
+def parse_mtd(text: str) -> dict[str, typing.Any]:
+    """解析`.mtd`文件的内容。
+
+    `[Definition]`段中的每一行`.Method args`按文件顺序保存在`lines`中，定义材料时按此
+    顺序生成VBA（`.FrqType "static"`和`.FrqType "all"`等分段交替出现，顺序不能改变）。
+    同时汇总为`properties`供查询，重复调用的方法（如`AddDispEpsPole1stOrder`、
+    `AddDispersionFitValueEps`）保存为列表；其它段保存为文本。
+
+    Args:
+        text (str): 文件内容。
+
+    Returns:
+        dict[str, Any]: 包含`name`、`properties`、`lines`和其它各段（小写段名）的字典。
+    """
+    sections: dict[str, list[str]] = {}
+    current = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("[") and stripped.endswith("]"):
+            current = stripped[1:-1].strip().lower()
+            sections.setdefault(current, [])
+        elif current is not None:
+            sections[current].append(line.rstrip())
+
+    properties: dict[str, typing.Any] = {}
+    lines: list[list[str]] = []
+    for line in sections.pop("definition", []):
+        stripped = line.strip()
+        if not stripped.startswith("."):
+            continue
+        method, _, args = stripped[1:].partition(" ")
+        if method.lower() in _SKIPPED_METHODS:
+            continue
+        args = args.strip()
+        lines.append([method, args])
+        if method in properties:
+            previous = properties[method]
+            if not isinstance(previous, list):
+                properties[method] = previous = [previous]
+            previous.append(args)
+        else:
+            properties[method] = args
+
+    entry = {k: "\n".join(v).strip() for k, v in sections.items()}
+    title = entry.pop("title", "").splitlines()
+    entry["name"] = title[0].strip() if title else ""
+    entry["properties"] = properties
+    entry["lines"] = lines
+    return entry
+
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as f:
+        data = f.read()
+    for encoding in ("utf-8-sig", "gbk", "latin-1"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("latin-1")
+
+
+def _default_index_path(root: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()
+    return os.path.join(
+        os.path.expanduser("~"),
+        ".cache",
+        "mzcst_2024",
+        f"mtd-{digest[:16]}.json",
+    )
+
+
+class MaterialLibrary:
+    """CST材料库。
+
+    Attributes:
+        root (str): 材料库目录，递归查找其中的`.mtd`文件。
+        index_path (str, optional): 索引文件路径. Defaults to `~/.cache/mzcst_2024/`下的文件.
+    """
+
+    def __init__(self, root: str, *, index_path: str = None):
+        self._root = os.path.abspath(root)
+        self._index_path = index_path or _default_index_path(root)
+        # 相对路径 -> 解析结果（含mtime和size）
+        self._files: dict[str, dict[str, typing.Any]] = {}
+        # 材料名 -> 相对路径
+        self._names: dict[str, str] = {}
+        self._materials: dict[str, Material] = {}
+        self.refresh()
+        return
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    @property
+    def index_path(self) -> str:
+        return self._index_path
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def names(self) -> list[str]:
+        return sorted(self._names)
+
+    def _load_index(self) -> dict[str, dict[str, typing.Any]]:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if (
+            index.get("version") != _INDEX_VERSION
+            or index.get("root") != self._root
+        ):
+            return {}
+        return index.get("files", {})
+
+    def _save_index(self) -> None:
+        folder = os.path.dirname(self._index_path)
+        try:
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            tmp = self._index_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": _INDEX_VERSION,
+                        "root": self._root,
+                        "files": self._files,
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp, self._index_path)
+        except OSError as e:
+            _logger.warning("material index not saved: %s", e)
+        return
+
+    def refresh(self) -> "MaterialLibrary":
+        """扫描材料库目录，只重新解析修改过的文件。
+
+        Returns:
+            self (MaterialLibrary): self。
+        """
+        cached = self._load_index()
+        files: dict[str, dict[str, typing.Any]] = {}
+        n_parsed = 0
+        for folder, _, filenames in os.walk(self._root):
+            for filename in filenames:
+                if not filename.lower().endswith(".mtd"):
+                    continue
+                path = os.path.join(folder, filename)
+                rel = os.path.relpath(path, self._root)
+                st = os.stat(path)
+                entry = cached.get(rel)
+                if (
+                    entry is None
+                    or entry.get("mtime") != st.st_mtime
+                    or entry.get("size") != st.st_size
+                ):
+                    entry = parse_mtd(_read_text(path))
+                    if not entry["name"]:
+                        entry["name"] = os.path.splitext(filename)[0]
+                    entry["mtime"] = st.st_mtime
+                    entry["size"] = st.st_size
+                    n_parsed += 1
+                files[rel] = entry
+        changed = n_parsed > 0 or set(files) != set(cached)
+        self._files = files
+        self._names = {}
+        for rel in sorted(files):
+            name = files[rel]["name"]
+            if name in self._names:
+                _logger.warning(
+                    "duplicate material %s in %s and %s.",
+                    name,
+                    self._names[name],
+                    rel,
+                )
+                continue
+            self._names[name] = rel
+        self._materials = {}
+        if changed:
+            self._save_index()
+        _logger.info(
+            "material library %s: %d materials, %d files parsed.",
+            self._root,
+            len(self._names),
+            n_parsed,
+        )
+        return self
+
+    def entry(self, name: str) -> dict[str, typing.Any]:
+        """材料的原始解析结果（属性和`.mtd`中的其它各段）。"""
+        return self._files[self._names[name]]
+
+    def get(self, name: str, folder: str = "") -> Material:
+        """按名称构造材料对象。
+
+        Args:
+            name (str): 材料名（`.mtd`中的`[Title]`）。
+            folder (str, optional): 项目中的材料文件夹. Defaults to "".
+
+        Returns:
+            Material: 材料。
+        """
+        key = f"{folder}/{name}"
+        if key not in self._materials:
+            entry = self.entry(name)
+            properties = {
+                k: list(v) if isinstance(v, list) else v
+                for k, v in entry["properties"].items()
+            }
+            self._materials[key] = Material(
+                name,
+                folder,
+                properties=properties,
+                lines=[tuple(line) for line in entry.get("lines", [])],
+            )
+        return self._materials[key]
+
+    def search(self, query: str, *, limit: int = None) -> list[str]:
+        """按名称和描述搜索材料，多个关键词之间为“与”的关系，不区分大小写。
+
+        Args:
+            query (str): 关键词，以空格分隔。
+            limit (int, optional): 最多返回的结果数. Defaults to None.
+
+        Returns:
+            list[str]: 材料名，名称中匹配的排在前面。
+        """
+        words = query.lower().split()
+        in_name, in_text = [], []
+        for name, rel in sorted(self._names.items()):
+            entry = self._files[rel]
+            lowered = name.lower()
+            text = " ".join(
+                [lowered, rel.lower()]
+                + [
+                    str(v).lower()
+                    for k, v in entry.items()
+                    if k
+                    not in ("properties", "lines", "name", "mtime", "size")
+                ]
+            )
+            if all(w in lowered for w in words):
+                in_name.append(name)
+            elif all(w in text for w in words):
+                in_text.append(name)
+        result = in_name + in_text
+        return result if limit is None else result[:limit]
+
+    def define(
+        self,
+        modeler: "interface.Model3D",
+        names: typing.Iterable[str],
+        *,
+        registry: MaterialRegistry = None,
+        folder: str = "",
+    ) -> list[Material]:
+        """在一条历史记录中定义材料库中的若干材料。
+
+        Args:
+            modeler (interface.Model3D): 建模环境。
+            names (Iterable[str]): 材料名。
+            registry (MaterialRegistry, optional): 材料注册表，已定义的材料不会重复定义.
+            folder (str, optional): 项目中的材料文件夹. Defaults to "".
+
+        Returns:
+            list[Material]: 与`names`对应的材料。
+        """
+        registry = MaterialRegistry() if registry is None else registry
+        materials = registry.register_many(self.get(n, folder) for n in names)
+        registry.define(modeler)
+        return materials
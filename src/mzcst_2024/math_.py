@@ -1,7 +1,11 @@
 """Module for Mathematical Functions and Constants."""
 
 
+import ast
 import logging
+import typing
+
+import numpy
 
 from ._global import Parameter
 from .common import NEW_LINE, OPERATION_FAILED, OPERATION_SUCCESS, quoted
@@ -294,3 +298,140 @@ def bracket(x: Parameter | str) -> Parameter:
 
 # endregion
 # ↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑
+
+
+#######################################
+# region Local Evaluation
+# ↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓
+
+# CST表达式中的函数和常量（不区分大小写）到numpy实现的映射。
+_FUNCTIONS: dict[str, typing.Callable] = {
+    "sin": numpy.sin,
+    "cos": numpy.cos,
+    "tan": numpy.tan,
+    "sind": lambda x: numpy.sin(numpy.deg2rad(x)),
+    "cosd": lambda x: numpy.cos(numpy.deg2rad(x)),
+    "tand": lambda x: numpy.tan(numpy.deg2rad(x)),
+    "asin": numpy.arcsin,
+    "acos": numpy.arccos,
+    "atn": numpy.arctan,
+    "asind": lambda x: numpy.rad2deg(numpy.arcsin(x)),
+    "acosd": lambda x: numpy.rad2deg(numpy.arccos(x)),
+    "atnd": lambda x: numpy.rad2deg(numpy.arctan(x)),
+    "atn2": numpy.arctan2,
+    "atn2d": lambda y, x: numpy.rad2deg(numpy.arctan2(y, x)),
+    "sinh": numpy.sinh,
+    "cosh": numpy.cosh,
+    "tanh": numpy.tanh,
+    "asinh": numpy.arcsinh,
+    "acosh": numpy.arccosh,
+    "sqr": numpy.sqrt,
+    "exp": numpy.exp,
+    "log": numpy.log,
+    "abs": numpy.abs,
+    "sgn": numpy.sign,
+    "int": numpy.floor,
+    "fix": numpy.trunc,
+}
+_CONSTANTS: dict[str, float] = {
+    "pi": numpy.pi,
+    "eps0": 8.8541878128e-12,
+    "mu0": 1.25663706212e-06,
+    "clight": 299792458.0,
+    "chargeelementary": 1.602176634e-19,
+    "masselectron": 9.1093837015e-31,
+    "massproton": 1.67262192369e-27,
+    "constantboltzmann": 1.380649e-23,
+    "true": 1.0,
+    "false": 0.0,
+}
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.Pow,
+    ast.USub,
+    ast.UAdd,
+)
+
+
+def evaluate(
+    expression: "str | int | float | Parameter",
+    variables: "dict[str, typing.Any] | None" = None,
+) -> typing.Any:
+    """在本地用numpy计算CST表达式的值。
+
+    变量可以是数值、numpy数组或其它表达式（会被递归求值），名称不区分大小写。表达式
+    中的`^`按乘方处理，函数名与CST一致，如`Sqr`、`Atn`、`SinD`。
+
+    Args:
+        expression (str | int | float | Parameter): 表达式。
+        variables (dict[str, Any], optional): 变量表. Defaults to None.
+
+    Returns:
+        Any: 标量或与变量形状广播一致的数组。
+    """
+    table = {str(k).lower(): v for k, v in (variables or {}).items()}
+    return _evaluate(expression, table, ())
+
+
+def _evaluate(expression, table: dict, stack: tuple) -> typing.Any:
+    if isinstance(expression, Parameter):
+        expression = expression.expression
+    if not isinstance(expression, str):
+        return expression
+    tree = ast.parse(expression.strip().replace("^", "**"), mode="eval")
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(
+                f"unsupported syntax in expression: {expression!r}"
+            )
+        if isinstance(node, ast.Call) and not isinstance(node.func, ast.Name):
+            raise ValueError(
+                f"unsupported syntax in expression: {expression!r}"
+            )
+
+    namespace: dict[str, typing.Any] = {"__builtins__": {}}
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Name) or node.id in namespace:
+            continue
+        key = node.id.lower()
+        if key in table:
+            if key in stack:
+                raise ValueError(
+                    f"circular definition of parameter: {node.id}"
+                )
+            namespace[node.id] = _evaluate(table[key], table, stack + (key,))
+        elif key in _FUNCTIONS:
+            namespace[node.id] = _FUNCTIONS[key]
+        elif key in _CONSTANTS:
+            namespace[node.id] = _CONSTANTS[key]
+        else:
+            raise NameError(f"undefined parameter: {node.id}")
+    return eval(compile(tree, "<cst expression>", "eval"), namespace)
+
+
+def parameter_table(
+    parameters: typing.Iterable[Parameter],
+) -> dict[str, str]:
+    """把`Parameter`列表转为`evaluate`使用的变量表。
+
+    Args:
+        parameters (Iterable[Parameter]): 参数列表。
+
+    Returns:
+        dict[str, str]: 参数名到表达式的映射。
+    """
+    return {p.name: p.expression for p in parameters}
+
+
+# endregion
+# ↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑
@@ -0,0 +1,330 @@
+"""作用于整个S参数张量的网络参数工具。
+
+所有函数都接受形状为(..., N, N)的数组，前面的维度可以是频率(F,)，也可以是参数扫描的
+(R, F)，使用NumPy的批量线性代数一次计算全部频点和全部run。参考阻抗`z0`可以是标量、
+(N,)或与矩阵前导维度对应的(..., N)，可以为复数（采用Kurokawa功率波定义）。
+
+Example::
+
+    frequency, s, z0 = network.load_sweep(project.get_3d())   # (R, F, N, N)
+    s75 = network.renormalize(s, z0, 75.0)
+    z = network.s_to_z(s, z0)
+    sdd = network.mixed_mode(s, [(0, 1), (2, 3)])[..., :2, :2]
+"""
+
+import logging
+import typing
+
+import numpy
+
+from . import touchstone
+
+_logger = logging.getLogger(__name__)
+
+__all__: list[str] = [
+    "abcd_to_s",
+    "abcd_to_z",
+    "cascade",
+    "deembed",
+    "load_sweep",
+    "mixed_mode",
+    "renormalize",
+    "s_to_abcd",
+    "s_to_y",
+    "s_to_z",
+    "y_to_s",
+    "z_to_abcd",
+    "z_to_s",
+]
+
+ArrayLike = typing.Any
+
+
+def _z0(z0: ArrayLike, shape: tuple[int, ...]) -> numpy.ndarray:
+    """把参考阻抗广播为(..., N)。"""
+    return numpy.broadcast_to(
+        numpy.asarray(z0, dtype=numpy.complex128), shape[:-1]
+    )
+
+
+def _scale(z: numpy.ndarray) -> numpy.ndarray:
+    """功率波定义中的F = 1 / (2 sqrt(|Re z|))。"""
+    return 0.5 / numpy.sqrt(numpy.abs(z.real))
+
+
+def _eye(n: int) -> numpy.ndarray:
+    return numpy.eye(n, dtype=numpy.complex128)
+
+
+def s_to_z(s: ArrayLike, z0: ArrayLike = 50.0) -> numpy.ndarray:
+    """S参数转换为Z参数。
+
+    Args:
+        s (ArrayLike): S参数，形状为(..., N, N)。
+        z0 (ArrayLike, optional): 参考阻抗. Defaults to 50.0.
+
+    Returns:
+        numpy.ndarray: Z参数。
+    """
+    s = numpy.asarray(s, dtype=numpy.complex128)
+    z = _z0(z0, s.shape)
+    f = _scale(z)
+    # Z = F^-1 (I - S)^-1 (S G + G*) F
+    rhs = s * z[..., None, :] + numpy.conj(z)[..., :, None] * _eye(
+        s.shape[-1]
+    )
+    x = numpy.linalg.solve(_eye(s.shape[-1]) - s, rhs)
+    return x * f[..., None, :] / f[..., :, None]
+
+
+def z_to_s(z: ArrayLike, z0: ArrayLike = 50.0) -> numpy.ndarray:
+    """Z参数转换为S参数。
+
+    Args:
+        z (ArrayLike): Z参数，形状为(..., N, N)。
+        z0 (ArrayLike, optional): 参考阻抗. Defaults to 50.0.
+
+    Returns:
+        numpy.ndarray: S参数。
+    """
+    z = numpy.asarray(z, dtype=numpy.complex128)
+    r = _z0(z0, z.shape)
+    f = _scale(r)
+    eye = _eye(z.shape[-1])
+    # S = F (Z - G*) (Z + G)^-1 F^-1，右乘逆矩阵用转置后的solve计算
+    a = z - numpy.conj(r)[..., :, None] * eye
+    b = z + r[..., :, None] * eye
+    x = numpy.swapaxes(
+        numpy.linalg.solve(
+            numpy.swapaxes(b, -1, -2), numpy.swapaxes(a, -1, -2)
+        ),
+        -1,
+        -2,
+    )
+    return x * f[..., :, None] / f[..., None, :]
+
+
+def s_to_y(s: ArrayLike, z0: ArrayLike = 50.0) -> numpy.ndarray:
+    """S参数转换为Y参数。"""
+    return numpy.linalg.inv(s_to_z(s, z0))
+
+
+def y_to_s(y: ArrayLike, z0: ArrayLike = 50.0) -> numpy.ndarray:
+    """Y参数转换为S参数。"""
+    return z_to_s(numpy.linalg.inv(numpy.asarray(y, dtype=complex)), z0)
+
+
+def renormalize(
+    s: ArrayLike, z0: ArrayLike, z0_new: ArrayLike
+) -> numpy.ndarray:
+    """把S参数换算到新的参考阻抗。
+
+    Args:
+        s (ArrayLike): S参数，形状为(..., N, N)。
+        z0 (ArrayLike): 原参考阻抗。
+        z0_new (ArrayLike): 新参考阻抗。
+
+    Returns:
+        numpy.ndarray: 新参考阻抗下的S参数。
+    """
+    return z_to_s(s_to_z(s, z0), z0_new)
+
+
+def _check_two_port(a: numpy.ndarray) -> None:
+    if a.shape[-2:] != (2, 2):
+        raise ValueError(f"two-port data expected, got shape {a.shape}")
+    return
+
+
+def _matrix(a, b, c, d) -> numpy.ndarray:
+    return numpy.stack(
+        [numpy.stack([a, b], axis=-1), numpy.stack([c, d], axis=-1)], axis=-2
+    )
+
+
+def z_to_abcd(z: ArrayLike) -> numpy.ndarray:
+    """二端口Z参数转换为ABCD参数。"""
+    z = numpy.asarray(z, dtype=numpy.complex128)
+    _check_two_port(z)
+    z11, z12, z21, z22 = z[..., 0, 0], z[..., 0, 1], z[..., 1, 0], z[..., 1, 1]
+    det = z11 * z22 - z12 * z21
+    return _matrix(z11 / z21, det / z21, 1 / z21, z22 / z21)
+
+
+def abcd_to_z(abcd: ArrayLike) -> numpy.ndarray:
+    """二端口ABCD参数转换为Z参数。"""
+    abcd = numpy.asarray(abcd, dtype=numpy.complex128)
+    _check_two_port(abcd)
+    a, b = abcd[..., 0, 0], abcd[..., 0, 1]
+    c, d = abcd[..., 1, 0], abcd[..., 1, 1]
+    det = a * d - b * c
+    return _matrix(a / c, det / c, 1 / c, d / c)
+
+
+def s_to_abcd(s: ArrayLike, z0: ArrayLike = 50.0) -> numpy.ndarray:
+    """二端口S参数转换为ABCD参数（Frickey公式，适用于复参考阻抗）。"""
+    s = numpy.asarray(s, dtype=numpy.complex128)
+    _check_two_port(s)
+    z = _z0(z0, s.shape)
+    z1, z2 = z[..., 0], z[..., 1]
+    s11, s12, s21, s22 = s[..., 0, 0], s[..., 0, 1], s[..., 1, 0], s[..., 1, 1]
+    den = 2 * s21 * numpy.sqrt(z1.real * z2.real)
+    p1 = numpy.conj(z1) + s11 * z1
+    p2 = numpy.conj(z2) + s22 * z2
+    return _matrix(
+        (p1 * (1 - s22) + s12 * s21 * z1) / den,
+        (p1 * p2 - s12 * s21 * z1 * z2) / den,
+        ((1 - s11) * (1 - s22) - s12 * s21) / den,
+        ((1 - s11) * p2 + s12 * s21 * z2) / den,
+    )
+
+
+def abcd_to_s(abcd: ArrayLike, z0: ArrayLike = 50.0) -> numpy.ndarray:
+    """二端口ABCD参数转换为S参数（Frickey公式，适用于复参考阻抗）。"""
+    abcd = numpy.asarray(abcd, dtype=numpy.complex128)
+    _check_two_port(abcd)
+    z = _z0(z0, abcd.shape)
+    z1, z2 = z[..., 0], z[..., 1]
+    a, b = abcd[..., 0, 0], abcd[..., 0, 1]
+    c, d = abcd[..., 1, 0], abcd[..., 1, 1]
+    den = a * z2 + b + c * z1 * z2 + d * z1
+    root = 2 * numpy.sqrt(z1.real * z2.real)
+    return _matrix(
+        (a * z2 + b - c * numpy.conj(z1) * z2 - d * numpy.conj(z1)) / den,
+        (a * d - b * c) * root / den,
+        root / den,
+        (-a * numpy.conj(z2) + b - c * z1 * numpy.conj(z2) + d * z1) / den,
+    )
+
+
+def _port_z0(z0: ArrayLike, s: numpy.ndarray) -> numpy.ndarray:
+    return _z0(z0, s.shape)
+
+
+def cascade(
+    networks: typing.Sequence[ArrayLike],
+    z0: typing.Sequence[ArrayLike] | ArrayLike = 50.0,
+) -> numpy.ndarray:
+    """级联若干二端口网络（前一个的端口2接后一个的端口1）。
+
+    Args:
+        networks (Sequence[ArrayLike]): S参数，每个形状为(..., 2, 2)，前导维度可广播。
+        z0 (Sequence[ArrayLike] | ArrayLike, optional): 参考阻抗，可以为每个网络分别
+            指定. Defaults to 50.0.
+
+    Returns:
+        numpy.ndarray: 级联后的S参数，参考阻抗为第一个网络的端口1和最后一个网络的端口2。
+    """
+    networks = [numpy.asarray(s, dtype=numpy.complex128) for s in networks]
+    if not networks:
+        raise ValueError("no network to cascade.")
+    if not isinstance(z0, (list, tuple)):
+        z0 = [z0] * len(networks)
+    total = None
+    for s, z in zip(networks, z0):
+        abcd = s_to_abcd(s, z)
+        total = abcd if total is None else total @ abcd
+    first = _port_z0(z0[0], networks[0])
+    last = _port_z0(z0[-1], networks[-1])
+    ports = numpy.stack(
+        numpy.broadcast_arrays(first[..., 0], last[..., 1]), axis=-1
+    )
+    return abcd_to_s(total, ports)
+
+
+def deembed(
+    s: ArrayLike,
+    left: ArrayLike = None,
+    right: ArrayLike = None,
+    z0: ArrayLike = 50.0,
+) -> numpy.ndarray:
+    """从二端口测量结果中去除两侧夹具：DUT = L^-1 · T · R^-1（ABCD矩阵）。
+
+    Args:
+        s (ArrayLike): 含夹具的S参数，形状为(..., 2, 2)。
+        left (ArrayLike, optional): 端口1一侧夹具的S参数. Defaults to None.
+        right (ArrayLike, optional): 端口2一侧夹具的S参数. Defaults to None.
+        z0 (ArrayLike, optional): 参考阻抗. Defaults to 50.0.
+
+    Returns:
+        numpy.ndarray: DUT的S参数。
+    """
+    total = s_to_abcd(s, z0)
+    if left is not None:
+        total = numpy.linalg.solve(s_to_abcd(left, z0), total)
+    if right is not None:
+        r = s_to_abcd(right, z0)
+        total = numpy.swapaxes(
+            numpy.linalg.solve(
+                numpy.swapaxes(r, -1, -2), numpy.swapaxes(total, -1, -2)
+            ),
+            -1,
+            -2,
+        )
+    return abcd_to_s(total, z0)
+
+
+def mixed_mode(
+    s: ArrayLike, pairs: typing.Sequence[tuple[int, int]]
+) -> numpy.ndarray:
+    """单端S参数转换为混合模S参数。
+
+    每对端口`(p, n)`（从0开始）组成一个差分端口，两个端口的参考阻抗应相同。结果按
+    `[d1, ..., dP, c1, ..., cP]`排列，即`[[Sdd, Sdc], [Scd, Scc]]`。
+
+    Args:
+        s (ArrayLike): 单端S参数，形状为(..., N, N)。
+        pairs (Sequence[tuple[int, int]]): 差分端口对（正端, 负端）。
+
+    Returns:
+        numpy.ndarray: 混合模S参数，形状为(..., 2P, 2P)。
+    """
+    s = numpy.asarray(s, dtype=numpy.complex128)
+    n = s.shape[-1]
+    p = len(pairs)
+    m = numpy.zeros((2 * p, n))
+    for k, (pos, neg) in enumerate(pairs):
+        m[k, pos], m[k, neg] = 1.0, -1.0
+        m[p + k, pos], m[p + k, neg] = 1.0, 1.0
+    m /= numpy.sqrt(2.0)
+    return m @ s @ m.T
+
+
+def load_sweep(
+    rm: typing.Any,
+    run_ids: typing.Sequence[int] = None,
+    **kwargs,
+) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """读取参数扫描中每个run的S矩阵。
+
+    参考阻抗来自各端口`S i,i`结果的`get_ref_imp_data`。
+
+    Args:
+        rm (results.ResultModule): 结果子模块。
+        run_ids (Sequence[int], optional): run id. Defaults to 全部参数扫描的run（没有时为0）.
+        **kwargs: 见`touchstone.from_results`。
+
+    Raises:
+        ValueError: 各run的频点不一致。
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: 频率(F,)、S参数
+            (R, F, N, N)和参考阻抗(R, F, N)。
+    """
+    if run_ids is None:
+        run_ids = [r for r in rm.get_all_run_ids() if r != 0] or [0]
+    sweeps = [touchstone.from_results(rm, r, **kwargs) for r in run_ids]
+    frequency = sweeps[0].frequency
+    for r, ts in zip(run_ids, sweeps):
+        if len(ts.frequency) != len(frequency) or not numpy.allclose(
+            ts.frequency, frequency
+        ):
+            raise ValueError(f"run {r} has a different frequency grid.")
+    _logger.info(
+        "%d runs of %d-port data loaded.", len(sweeps), sweeps[0].n_ports
+    )
+    return (
+        frequency,
+        numpy.stack([ts.data for ts in sweeps]),
+        numpy.stack([ts.z0 for ts in sweeps]),
+    )
@@ -28,7 +28,15 @@ class Plot(BaseObject):
         return
 
     @staticmethod
-    def reset_view(modeler: interface.Model3D) -> None:
+    def reset_view(
+        modeler: interface.Model3D, *, record_history: bool = False
+    ) -> None:
+        """恢复透视视图并缩放到整个模型，默认不写入历史记录。
+
+        Args:
+            modeler (interface.Model3D): 建模环境。
+            record_history (bool, optional): 是否写入历史记录. Defaults to False.
+        """
         reset_view = [
             "With Plot",
             ".DrawBox True",
@@ -37,14 +45,20 @@ class Plot(BaseObject):
             ".ZoomToStructure",
             "End With",
         ]
-        modeler.add_to_history("reset view", NEW_LINE.join(reset_view))
+        interface.run_vba(
+            modeler,
+            "reset view",
+            NEW_LINE.join(reset_view),
+            record_history=record_history,
+        )
         return
     
-    def create_from_attributes(self, modeler):
-        """从属性列表新建`Plot`对象。
+    def create_from_attributes(self, modeler, *, record_history: bool = False):
+        """从属性列表设置`Plot`对象，默认不写入历史记录。
 
         Args:
             modeler (interface.Model3D): 建模环境。
+            record_history (bool, optional): 是否写入历史记录. Defaults to False.
 
         Returns:
             self (BaseObject): self
@@ -65,7 +79,9 @@ class Plot(BaseObject):
             ]
             cmd3 = NEW_LINE.join(scmd3)
             cmd = NEW_LINE.join((cmd1, cmd2, cmd3))
-            modeler.add_to_history(self._history_title, cmd)
+            interface.run_vba(
+                modeler, self._history_title, cmd, record_history=record_history
+            )
         return self
 
 
@@ -2,8 +2,12 @@ import ast
 import logging
 import typing
 
-from . import interface
+import numpy
+
+from . import interface, tessellation
 from .common import NEW_LINE, OPERATION_FAILED, OPERATION_SUCCESS, quoted
+from .component import ComponentTree
+from .curves import Polygon, _PointCurve, point_lines
 from .shape_operations import Solid
 
 _logger = logging.getLogger(__name__)
@@ -17,15 +21,58 @@ class Extrude(Solid):
         material: str = "Vacuum",
         *,
         properties: dict[str, str] = None,
+        points: numpy.ndarray = None,
     ):
         super().__init__(name, component, material,properties=properties)
+        self._points = None if points is None else _closed(points)
         self._history_title = f"define extrude: {self._component}:{self._name}"
 
-    def create(self, modeler: "interface.Model3D") -> "Extrude":
+    @classmethod
+    def from_polygon(
+        cls,
+        name: str,
+        component: str,
+        material: str,
+        polygon: Polygon | numpy.ndarray,
+        height: str,
+        *,
+        twist: str = "0.0",
+        taper: str = "0.0",
+        origin: tuple[str, str, str] = ("0.0", "0.0", "0.0"),
+        uvector: tuple[str, str, str] = ("1.0", "0.0", "0.0"),
+        vvector: tuple[str, str, str] = ("0.0", "1.0", "0.0"),
+    ) -> "Extrude":
+        """以`Pointlist`模式从多边形构造挤压实体，所有顶点写在同一个With语句块内。
+
+        Args:
+            polygon (Polygon | numpy.ndarray): 多边形或(N, 2)点列，未闭合时自动闭合。
+            height (str): 挤压高度。
+
+        Returns:
+            Extrude: 挤压实体（尚未在CST中创建）。
+        """
+        pts = polygon.points if isinstance(polygon, Polygon) else polygon
+        properties = {
+            "Mode": '"Pointlist"',
+            "Height": f'"{height}"',
+            "Twist": f'"{twist}"',
+            "Taper": f'"{taper}"',
+            "Origin": ", ".join(quoted(str(v)) for v in origin),
+            "Uvector": ", ".join(quoted(str(v)) for v in uvector),
+            "Vvector": ", ".join(quoted(str(v)) for v in vvector),
+        }
+        return cls(
+            name, component, material, properties=properties, points=pts
+        )
+
+    def create(
+        self, modeler: "interface.Model3D", *, tree: ComponentTree = None
+    ) -> "Extrude":
         """从属性列表新建挤压实体。
 
         Args:
             modeler (interface.Model3D): 建模环境。
+            tree (ComponentTree, optional): 部件索引。给定时先创建尚未创建的部件.
 
         Returns:
             self (Extrude): self。
@@ -33,23 +80,179 @@ class Extrude(Solid):
         if not self._properties:
             _logger.error("No valid properties.")
         else:
-            scmd1 = [
-                "With Extrude",
-                ".Reset",
-                f'.Name "{self._name}"',
-                f'.Component "{self._component}"',
-                f'.Material "{self._material}"',
-            ]
-            cmd1 = NEW_LINE.join(scmd1)
-            scmd2 = []
-            for k, v in self._properties.items():
-                scmd2.append("." + k + " " + v)
-            cmd2 = NEW_LINE.join(scmd2)
-            scmd3 = [
-                ".Create",
-                "End With",
-            ]
-            cmd3 = NEW_LINE.join(scmd3)
-            cmd = NEW_LINE.join((cmd1, cmd2, cmd3))
+            if tree is not None:
+                tree.ensure(modeler, [self._component])
+            cmd = NEW_LINE.join(self.vba())
             modeler.add_to_history(self._history_title, cmd)
         return self
+
+    def vba(self) -> list[str]:
+        """生成定义挤压实体的完整With语句块，便于和其它实体合并到同一条历史记录。
+
+        Returns:
+            list[str]: VBA代码行。
+        """
+        scmd1 = [
+            "With Extrude",
+            ".Reset",
+            f'.Name "{self._name}"',
+            f'.Component "{self._component}"',
+            f'.Material "{self._material}"',
+        ]
+        scmd2 = []
+        for k, v in self._properties.items():
+            scmd2.append("." + k + " " + v)
+        if self._points is not None:
+            scmd2 += point_lines(self._points)
+        scmd3 = [
+            ".Create",
+            "End With",
+        ]
+        return scmd1 + scmd2 + scmd3
+
+    def to_mesh(
+        self, parameters: dict[str, typing.Any] = None
+    ) -> "tessellation.TriangleMesh":
+        """在本地把`Pointlist`模式的挤压实体离散为三角面片（忽略扭转和锥角）。
+
+        Args:
+            parameters (dict[str, Any], optional): 参数表，见`math_.evaluate`.
+
+        Returns:
+            tessellation.TriangleMesh: 离散后的网格。
+        """
+        if self._points is None:
+            raise ValueError(
+                f"extrude {self.full_name} has no point list to tessellate."
+            )
+        props = self._properties
+        vectors = {
+            k: tessellation.evaluate_many(_split_arguments(props[k]), parameters)
+            for k in ("Origin", "Uvector", "Vvector")
+            if k in props
+        }
+        height = tessellation.evaluate_many(
+            _split_arguments(props["Height"]), parameters
+        )[0]
+        return tessellation.extrude_polygon(
+            self._points,
+            height,
+            origin=vectors.get("Origin", (0.0, 0.0, 0.0)),
+            u_vector=vectors.get("Uvector", (1.0, 0.0, 0.0)),
+            v_vector=vectors.get("Vvector", (0.0, 1.0, 0.0)),
+        )
+
+
+class ExtrudeCurve(Solid):
+    """This object is used to create a new extrude shape from a planar curve.
+
+    Attributes:
+        curve (str | _PointCurve): 闭合的平面曲线或其全名（`curve:name`）。
+        thickness (str): 挤压厚度。
+        twist (str): 扭转角。
+        taper (str): 锥角。
+        delete_profile (bool): 挤压后是否删除曲线。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        component: str,
+        material: str,
+        curve: "str | _PointCurve",
+        thickness: str,
+        *,
+        twist: str = "0.0",
+        taper: str = "0.0",
+        delete_profile: bool = True,
+    ):
+        super().__init__(name, component, material)
+        self._curve = curve
+        self._thickness = thickness
+        self._twist = twist
+        self._taper = taper
+        self._delete_profile = delete_profile
+        self._history_title = (
+            f"define extrudeprofile: {self._component}:{self._name}"
+        )
+        return
+
+    @property
+    def curve(self) -> str:
+        if isinstance(self._curve, _PointCurve):
+            return self._curve.full_name
+        return str(self._curve)
+
+    def create(
+        self,
+        modeler: "interface.Model3D",
+        *,
+        with_curve: bool = True,
+        tree: ComponentTree = None,
+    ) -> "ExtrudeCurve":
+        """定义挤压实体。
+
+        当`curve`是曲线对象且`with_curve`为`True`时，曲线和挤压实体写在同一条历史记
+        录里，不必先单独调用曲线的`create`。
+
+        Args:
+            modeler (interface.Model3D): 建模环境。
+            with_curve (bool, optional): 是否同时定义曲线. Defaults to True.
+            tree (ComponentTree, optional): 部件索引。给定时先创建尚未创建的部件.
+
+        Returns:
+            self (ExtrudeCurve): self。
+        """
+        sCommand: list[str] = []
+        if with_curve and isinstance(self._curve, _PointCurve):
+            sCommand += self._curve.vba()
+        sCommand += [
+            "With ExtrudeCurve",
+            ".Reset",
+            f'.Name "{self._name}"',
+            f'.Component "{self._component}"',
+            f'.Material "{self._material}"',
+            f'.Thickness "{self._thickness}"',
+            f'.Twistangle "{self._twist}"',
+            f'.Taperangle "{self._taper}"',
+            f'.DeleteProfile "{self._delete_profile}"',
+            f'.Curve "{self.curve}"',
+            ".Create",
+            "End With",
+        ]
+        if tree is not None:
+            tree.ensure(modeler, [self._component])
+        modeler.add_to_history(self._history_title, NEW_LINE.join(sCommand))
+        _logger.info("extrude curve %s created.", self.full_name)
+        return self
+
+    def to_mesh(
+        self, parameters: dict[str, typing.Any] = None
+    ) -> "tessellation.TriangleMesh":
+        """在本地把由`Polygon`挤压而成的实体离散为三角面片（忽略扭转和锥角）。
+
+        Args:
+            parameters (dict[str, Any], optional): 参数表.
+
+        Returns:
+            tessellation.TriangleMesh: 离散后的网格，位于当前工作坐标系中。
+        """
+        if not isinstance(self._curve, Polygon):
+            raise ValueError(
+                f"extrude curve {self.full_name} is not based on a Polygon."
+            )
+        height = tessellation.evaluate_many([self._thickness], parameters)[0]
+        return tessellation.extrude_polygon(self._curve.points, height)
+
+
+def _closed(points: numpy.ndarray) -> numpy.ndarray:
+    """返回首尾相接的点列。"""
+    pts = numpy.asarray(points, dtype=float)
+    if not numpy.array_equal(pts[0], pts[-1]):
+        pts = numpy.vstack([pts, pts[:1]])
+    return pts
+
+
+def _split_arguments(value: str) -> list[str]:
+    """把属性值`' "a", "b"'`拆分为`["a", "b"]`。"""
+    return [v.strip().strip('"') for v in value.split(",")]
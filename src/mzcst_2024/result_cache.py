@@ -0,0 +1,581 @@
+"""结果曲线的本地磁盘缓存，避免反复通过`cst.results`读取未改变的项目。
+
+每条曲线（项目、子模块、树路径、run_id）保存为一个`.npz`文件，JSON索引记录项目状态、
+文件大小和最近访问时间。项目状态由结果目录中文件的数量、总大小和最新修改时间确定，
+项目重新仿真后旧的缓存自动失效：结果目录或项目文件的修改时间改变时立即重新统计，否则
+最多每`state_ttl`秒重新统计一次。缓存总大小超过限值时按最近最少使用（LRU）的顺序删除。
+
+索引不在每次写入时保存，而是每写入`_FLUSH_EVERY`条、每隔`_FLUSH_INTERVAL`秒、删除
+缓存时或调用`flush`时保存，程序退出时也会自动保存。保存时持有锁文件，先读入磁盘上的
+索引再与内存中的条目合并，多个进程共用一个缓存目录时不会互相覆盖条目。
+
+Example::
+
+    cache = ResultCache(max_bytes=4 * 2**30)
+    project = results.ProjectFile("antenna.cst", cache=cache)
+    s11 = project.get_3d().get_result_item(r"1D Results\\S-Parameters\\S1,1", 5)
+    cache.flush()
+"""
+
+import atexit
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import typing
+import weakref
+
+import numpy
+
+_logger = logging.getLogger(__name__)
+
+__all__: list[str] = ["CachedItem", "ResultCache", "project_state"]
+
+_INDEX_VERSION: int = 1
+_INDEX_NAME: str = "index.json"
+# 写入多少条结果后保存一次索引
+_FLUSH_EVERY: int = 1024
+# 保存索引的最长间隔（秒）
+_FLUSH_INTERVAL: float = 30.0
+# 超过上限时删除到上限的这一比例，避免每次写入都排序
+_EVICT_TO: float = 0.9
+# 等待索引锁的最长时间（秒）
+_LOCK_TIMEOUT: float = 10.0
+# 超过这一时间（秒）的锁文件视为崩溃进程遗留的锁
+_LOCK_STALE: float = 60.0
+
+
+def _default_root() -> str:
+    return os.path.join(
+        os.path.expanduser("~"), ".cache", "mzcst_2024", "results"
+    )
+
+
+def project_state(path: str) -> str:
+    """项目结果的状态标识。
+
+    统计项目结果目录（`<项目名>/Result`）中文件的数量、总大小和最新修改时间；目录不存在
+    时使用项目文件本身。
+
+    Args:
+        path (str): `.cst`项目文件路径。
+
+    Returns:
+        str: 状态标识，结果改变后随之改变。
+    """
+    folder = os.path.join(os.path.splitext(path)[0], "Result")
+    if not os.path.isdir(folder):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return "missing"
+        return f"file:{st.st_size}:{st.st_mtime_ns}"
+    count, size, mtime = 0, 0, 0
+    stack = [folder]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                count += 1
+                size += st.st_size
+                mtime = max(mtime, st.st_mtime_ns)
+    return f"dir:{count}:{size}:{mtime}"
+
+
+def _state_stamp(path: str) -> int:
+    """结果目录（不存在时为项目文件）的修改时间，用于快速判断是否需要重新统计。"""
+    folder = os.path.join(os.path.splitext(path)[0], "Result")
+    for p in (folder, path):
+        try:
+            return os.stat(p).st_mtime_ns
+        except OSError:
+            continue
+    return 0
+
+
+@contextlib.contextmanager
+def _file_lock(path: str) -> typing.Iterator[None]:
+    """用独占创建的锁文件实现的跨进程锁。
+
+    Raises:
+        TimeoutError: `_LOCK_TIMEOUT`秒内未能取得锁。
+    """
+    deadline = time.monotonic() + _LOCK_TIMEOUT
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > _LOCK_STALE:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"cannot lock {path}")
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return
+
+
+def _flush_at_exit(ref: weakref.ReferenceType) -> None:
+    cache = ref()
+    if cache is not None:
+        cache.flush()
+    return
+
+
+class CachedItem:
+    """从缓存读取的结果，接口与`cst.results.ResultItem`一致。"""
+
+    def __init__(
+        self,
+        x: numpy.ndarray,
+        y: numpy.ndarray,
+        meta: dict[str, typing.Any],
+        ref_imp: numpy.ndarray = None,
+    ):
+        self.x = x
+        self.y = y
+        self.ref_imp = ref_imp
+        self._meta = meta
+        return
+
+    def __repr__(self) -> str:
+        return f"CachedItem({self.treepath!r}, run_id={self.run_id})"
+
+    def get_data(self) -> list:
+        return list(zip(self.x.tolist(), self.y.tolist()))
+
+    def get_parameter_combination(self) -> dict:
+        return dict(self._meta.get("parameters") or {})
+
+    def get_ref_imp_data(self) -> list:
+        return [] if self.ref_imp is None else self.ref_imp.tolist()
+
+    def get_xdata(self) -> list:
+        return self.x.tolist()
+
+    def get_ydata(self) -> list:
+        return self.y.tolist()
+
+    @property
+    def impedances(self) -> bool:
+        """缓存时是否读取了参考阻抗。"""
+        return bool(self._meta.get("impedances"))
+
+    @property
+    def length(self) -> int:
+        return len(self.y)
+
+    @property
+    def run_id(self) -> int:
+        return self._meta["run_id"]
+
+    @property
+    def title(self) -> str:
+        return self._meta.get("title", "")
+
+    @property
+    def treepath(self) -> str:
+        return self._meta["treepath"]
+
+    @property
+    def xlabel(self) -> str:
+        return self._meta.get("xlabel", "")
+
+    @property
+    def ylabel(self) -> str:
+        return self._meta.get("ylabel", "")
+
+
+class ResultCache:
+    """结果曲线的磁盘缓存。
+
+    Attributes:
+        root (str, optional): 缓存目录. Defaults to `~/.cache/mzcst_2024/results`.
+        max_bytes (float, optional): 缓存总大小上限（字节）. Defaults to 2 GiB.
+        state_ttl (float, optional): 项目状态的最长有效时间（秒）. Defaults to 5.
+    """
+
+    def __init__(
+        self,
+        root: str = None,
+        *,
+        max_bytes: float = 2 * 2**30,
+        state_ttl: float = 5.0,
+    ):
+        self._root = os.path.abspath(root or _default_root())
+        self.max_bytes = max_bytes
+        self.state_ttl = state_ttl
+        self._lock = threading.RLock()
+        self._entries: dict[str, dict[str, typing.Any]] = self._load_index()
+        # 上次保存后删除的条目，合并磁盘上的索引时不再恢复
+        self._removed: set[str] = set()
+        self._size = sum(e["size"] for e in self._entries.values())
+        # 项目 -> (状态, 统计时间, 结果目录修改时间)
+        self._states: dict[str, tuple[str, float, int]] = {}
+        self._dirty = False
+        self._unsaved = 0
+        self._flushed = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        atexit.register(_flush_at_exit, weakref.ref(self))
+        return
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    @property
+    def size(self) -> int:
+        """缓存文件的总大小（字节）。"""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load_index(self) -> dict[str, dict[str, typing.Any]]:
+        try:
+            with open(
+                os.path.join(self._root, _INDEX_NAME), "r", encoding="utf-8"
+            ) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get("version") != _INDEX_VERSION:
+            return {}
+        return index.get("entries", {})
+
+    def _merge(
+        self, entries: dict[str, dict[str, typing.Any]]
+    ) -> dict[str, dict[str, typing.Any]]:
+        """合并磁盘上的索引：保留其它进程写入的条目，同一条目取最近访问的一份。"""
+        merged = {
+            k: e
+            for k, e in entries.items()
+            if k not in self._removed
+            and os.path.isfile(os.path.join(self._root, e["file"]))
+        }
+        for key, entry in self._entries.items():
+            other = merged.get(key)
+            if other is None or other["atime"] <= entry["atime"]:
+                merged[key] = entry
+        return merged
+
+    def flush(self) -> None:
+        """保存索引（记录最近访问时间），并合并其它进程保存的条目。"""
+        with self._lock:
+            if not self._dirty:
+                return
+            path = os.path.join(self._root, _INDEX_NAME)
+            try:
+                os.makedirs(self._root, exist_ok=True)
+                with _file_lock(f"{path}.lock"):
+                    entries = self._merge(self._load_index())
+                    tmp = f"{path}.{os.getpid()}.tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        json.dump(
+                            {"version": _INDEX_VERSION, "entries": entries},
+                            f,
+                            ensure_ascii=False,
+                        )
+                    os.replace(tmp, path)
+                self._entries = entries
+                self._size = sum(e["size"] for e in entries.values())
+                self._removed.clear()
+                self._dirty = False
+                self._unsaved = 0
+                self._flushed = time.monotonic()
+            except OSError as e:
+                _logger.warning("result cache index not saved: %s", e)
+        return
+
+    def state(self, project: str, *, refresh: bool = False) -> str:
+        """项目的状态标识，并删除该项目在其它状态下的缓存。
+
+        结果目录的修改时间改变或距上次统计超过`state_ttl`秒时重新统计。
+
+        Args:
+            project (str): 项目文件路径。
+            refresh (bool, optional): 立即重新统计结果目录. Defaults to False.
+
+        Returns:
+            str: 状态标识。
+        """
+        project = os.path.abspath(project)
+        stamp = _state_stamp(project)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._states.get(project)
+            if (
+                refresh
+                or cached is None
+                or cached[2] != stamp
+                or now - cached[1] > self.state_ttl
+            ):
+                state = project_state(project)
+                self._states[project] = (state, now, stamp)
+                stale = [
+                    k
+                    for k, e in self._entries.items()
+                    if e["project"] == project and e["state"] != state
+                ]
+                if stale:
+                    _logger.info(
+                        "%s changed, %d cached results dropped.",
+                        project,
+                        len(stale),
+                    )
+                    self._remove(stale)
+                    self.flush()
+            return self._states[project][0]
+
+    def _key(
+        self, project: str, module: str, treepath: str, run_id: int
+    ) -> str:
+        project = os.path.abspath(project)
+        text = json.dumps(
+            [project, self.state(project), module, treepath, int(run_id)]
+        )
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def get(
+        self, project: str, module: str, treepath: str, run_id: int = 0
+    ) -> CachedItem | None:
+        """读取缓存的结果。
+
+        Args:
+            project (str): 项目文件路径。
+            module (str): 子模块，`"3d"`或`"schematic"`。
+            treepath (str): 树路径。
+            run_id (int, optional): run id. Defaults to 0.
+
+        Returns:
+            CachedItem | None: 缓存的结果，未命中时为`None`。
+        """
+        key = self._key(project, module, treepath, run_id)
+        loaded = self._load(key)
+        if loaded is None or "x" not in loaded[0] or "y" not in loaded[0]:
+            return None
+        arrays, meta = loaded
+        return CachedItem(arrays["x"], arrays["y"], meta, arrays.get("ref_imp"))
+
+    def _load(
+        self, key: str
+    ) -> tuple[dict[str, numpy.ndarray], dict[str, typing.Any]] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            try:
+                with numpy.load(os.path.join(self._root, entry["file"])) as z:
+                    arrays = {k: z[k] for k in z.files}
+            except (OSError, ValueError) as e:
+                _logger.warning("cached result %s unreadable: %s", key, e)
+                self._remove([key])
+                self.misses += 1
+                return None
+            entry["atime"] = time.time()
+            self._dirty = True
+            self.hits += 1
+        return arrays, entry["meta"]
+
+    def _store(
+        self,
+        key: str,
+        project: str,
+        module: str,
+        arrays: dict[str, numpy.ndarray],
+        meta: dict[str, typing.Any],
+    ) -> None:
+        filename = f"{key}.npz"
+        path = os.path.join(self._root, filename)
+        with self._lock:
+            try:
+                os.makedirs(self._root, exist_ok=True)
+                with open(path, "wb") as f:
+                    numpy.savez(f, **arrays)
+            except OSError as e:
+                _logger.warning("result not cached: %s", e)
+                return
+            self._size -= self._entries.get(key, {}).get("size", 0)
+            self._removed.discard(key)
+            self._entries[key] = {
+                "file": filename,
+                "size": os.path.getsize(path),
+                "atime": time.time(),
+                "project": project,
+                "state": self.state(project),
+                "module": module,
+                "meta": meta,
+            }
+            self._size += self._entries[key]["size"]
+            self._dirty = True
+            self._unsaved += 1
+            self._evict()
+            if (
+                self._unsaved >= _FLUSH_EVERY
+                or time.monotonic() - self._flushed > _FLUSH_INTERVAL
+            ):
+                self.flush()
+        return
+
+    def get_arrays(
+        self, project: str, module: str, name: str
+    ) -> dict[str, numpy.ndarray] | None:
+        """读取与项目状态绑定的数组（例如参数表）。
+
+        Args:
+            project (str): 项目文件路径。
+            module (str): 子模块，`"3d"`或`"schematic"`。
+            name (str): 名称。
+
+        Returns:
+            dict[str, numpy.ndarray] | None: 数组，未命中时为`None`。
+        """
+        loaded = self._load(self._key(project, module, f"#{name}", -1))
+        return None if loaded is None else loaded[0]
+
+    def put_arrays(
+        self,
+        project: str,
+        module: str,
+        name: str,
+        arrays: dict[str, numpy.ndarray],
+    ) -> None:
+        """缓存与项目状态绑定的数组，项目结果改变后自动失效。
+
+        Args:
+            project (str): 项目文件路径。
+            module (str): 子模块，`"3d"`或`"schematic"`。
+            name (str): 名称。
+            arrays (dict[str, numpy.ndarray]): 数组。
+        """
+        project = os.path.abspath(project)
+        key = self._key(project, module, f"#{name}", -1)
+        self._store(key, project, module, arrays, {"name": name})
+        return
+
+    def put(
+        self,
+        project: str,
+        module: str,
+        item: typing.Any,
+        *,
+        treepath: str = None,
+        run_id: int = None,
+        load_impedances: bool = True,
+    ) -> None:
+        """缓存一个结果。
+
+        Args:
+            project (str): 项目文件路径。
+            module (str): 子模块，`"3d"`或`"schematic"`。
+            item (ResultItem): 结果，`results.ResultItem`或`cst.results.ResultItem`。
+            treepath (str, optional): 查询时使用的树路径. Defaults to `item.treepath`.
+            run_id (int, optional): 查询时使用的run id. Defaults to `item.run_id`.
+            load_impedances (bool, optional): 是否同时缓存参考阻抗. Defaults to True.
+        """
+        treepath = item.treepath if treepath is None else treepath
+        run_id = item.run_id if run_id is None else run_id
+        if hasattr(item, "x_array"):
+            x, y = item.x_array(), item.y_array()
+        else:
+            x = numpy.asarray(item.get_xdata(), dtype=numpy.float64)
+            y = numpy.asarray(item.get_ydata())
+            if not numpy.iscomplexobj(y):
+                y = y.astype(numpy.float64)
+        arrays = {"x": x, "y": y}
+        if load_impedances:
+            try:
+                ref_imp = item.get_ref_imp_data()
+            except Exception:
+                ref_imp = None
+            if ref_imp:
+                arrays["ref_imp"] = numpy.asarray(ref_imp)
+        try:
+            parameters = item.get_parameter_combination()
+        except Exception:
+            parameters = None
+        meta = {
+            "treepath": treepath,
+            "run_id": int(run_id),
+            "title": item.title,
+            "xlabel": item.xlabel,
+            "ylabel": item.ylabel,
+            "parameters": parameters,
+            "impedances": load_impedances,
+        }
+        project = os.path.abspath(project)
+        key = self._key(project, module, treepath, run_id)
+        self._store(key, project, module, arrays, meta)
+        return
+
+    def _remove(self, keys: typing.Iterable[str]) -> None:
+        for key in keys:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                continue
+            self._size -= entry["size"]
+            self._removed.add(key)
+            try:
+                os.remove(os.path.join(self._root, entry["file"]))
+            except OSError:
+                pass
+            self._dirty = True
+        return
+
+    def _evict(self) -> None:
+        total = self._size
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * _EVICT_TO
+        victims = []
+        for key, entry in sorted(
+            self._entries.items(), key=lambda kv: kv[1]["atime"]
+        ):
+            if total <= target:
+                break
+            victims.append(key)
+            total -= entry["size"]
+        _logger.info("%d cached results evicted.", len(victims))
+        self._remove(victims)
+        self.flush()
+        return
+
+    def clear(self, project: str = None) -> None:
+        """删除缓存。
+
+        Args:
+            project (str, optional): 只删除该项目的缓存. Defaults to None.
+        """
+        with self._lock:
+            if project is None:
+                keys = list(self._entries)
+            else:
+                project = os.path.abspath(project)
+                keys = [
+                    k
+                    for k, e in self._entries.items()
+                    if e["project"] == project
+                ]
+            self._remove(keys)
+            self.flush()
+        return
@@ -0,0 +1,253 @@
+"""用进程池并行读取大量结果曲线。
+
+`cst.results`的读取是串行的，参数扫描的每个（树路径, run_id）都要单独调用一次
+`get_result_item`。本模块把这些调用分片交给多个工作进程，每个进程只打开一次项目文件
+（只读，非交互模式）。曲线数据写入由主进程分配的共享内存，主进程直接从共享内存得到
+NumPy数组，不经过pickle。
+
+同时处理的分片数量有上限，因此内存占用与结果总量无关。
+
+Example::
+
+    ex = ResultExtractor("antenna.cst", workers=8)
+    for treepath, run_id, x, y in ex.extract(ex.pairs()):
+        ...
+    print(ex.errors)
+"""
+
+import concurrent.futures
+import logging
+import math
+import os
+import typing
+from multiprocessing import shared_memory
+
+import numpy
+
+_logger = logging.getLogger(__name__)
+
+__all__: list[str] = ["ResultExtractor"]
+
+# 首个分片完成前估计的每条曲线大小（字节）
+_INITIAL_ITEM_BYTES: int = 64 * 1024
+
+# 工作进程中打开的结果子模块
+_module = None
+
+
+def _init_worker(project: str, module: str) -> None:
+    global _module
+    from . import results
+
+    pf = results.ProjectFile(project, False)
+    _module = pf.get_3d() if module == "3d" else pf.get_schematic()
+    return
+
+
+def _put(block, capacity: int, offset: int, a: numpy.ndarray):
+    """把数组写入共享内存，放不下时直接返回数组。"""
+    a = numpy.ascontiguousarray(a)
+    if block is None or offset + a.nbytes > capacity:
+        return ("inline", a), offset
+    block.buf[offset : offset + a.nbytes] = a.reshape(-1).view(numpy.uint8)
+    return ("shm", offset, a.dtype.str, a.shape), offset + a.nbytes
+
+
+def _extract_shard(
+    block_name: str,
+    capacity: int,
+    pairs: list[tuple[str, int]],
+    load_impedances: bool,
+) -> list[tuple]:
+    """在工作进程中读取一个分片。"""
+    block = shared_memory.SharedMemory(name=block_name) if capacity else None
+    offset = 0
+    records = []
+    try:
+        for treepath, run_id in pairs:
+            try:
+                item = _module.get_result_item(
+                    treepath, run_id, load_impedances
+                )
+                x, y = item.x_array(), item.y_array()
+            except Exception as e:
+                records.append(
+                    (treepath, run_id, None, None, f"{type(e).__name__}: {e}")
+                )
+                continue
+            dx, offset = _put(block, capacity, offset, x)
+            dy, offset = _put(block, capacity, offset, y)
+            records.append((treepath, run_id, dx, dy, None))
+    finally:
+        if block is not None:
+            block.close()
+    return records
+
+
+def _get(block, descriptor: tuple) -> numpy.ndarray:
+    """从共享内存复制出数组。"""
+    if descriptor[0] == "inline":
+        return descriptor[1]
+    _, offset, dtype, shape = descriptor
+    dtype = numpy.dtype(dtype)
+    count = math.prod(shape)
+    view = numpy.frombuffer(block.buf, dtype, count, offset)
+    a = view.reshape(shape).copy()
+    del view
+    return a
+
+
+class ResultExtractor:
+    """并行读取结果曲线。
+
+    Attributes:
+        project (str): 项目文件路径。
+        workers (int, optional): 工作进程数. Defaults to `os.cpu_count()`.
+        module (str, optional): 子模块，`"3d"`或`"schematic"`. Defaults to "3d".
+        shard_size (int, optional): 每个任务读取的曲线数. Defaults to 64.
+        load_impedances (bool, optional): 是否读取参考阻抗. Defaults to False.
+        errors (list[tuple[str, int, str]]): 上一次读取失败的曲线和错误信息。
+    """
+
+    def __init__(
+        self,
+        project: str,
+        *,
+        workers: int = None,
+        module: str = "3d",
+        shard_size: int = 64,
+        load_impedances: bool = False,
+    ):
+        if module not in ("3d", "schematic"):
+            raise ValueError(f"module must be '3d' or 'schematic': {module}")
+        self.project = os.path.abspath(project)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.module = module
+        self.shard_size = max(1, shard_size)
+        self.load_impedances = load_impedances
+        self.errors: list[tuple[str, int, str]] = []
+        self._item_bytes = _INITIAL_ITEM_BYTES
+        return
+
+    def pairs(
+        self,
+        treepaths: typing.Iterable[str] = None,
+        run_ids: typing.Iterable[int] = None,
+        *,
+        filter_: str = "0D/1D",
+    ) -> list[tuple[str, int]]:
+        """列出要读取的（树路径, run_id）。
+
+        Args:
+            treepaths (Iterable[str], optional): 树路径. Defaults to 所有`filter_`结果.
+            run_ids (Iterable[int], optional): run id. Defaults to 每个树路径已有的全部run id.
+            filter_ (str, optional): 树路径过滤器. Defaults to "0D/1D".
+
+        Returns:
+            list[tuple[str, int]]: （树路径, run_id）。
+        """
+        from . import results
+
+        pf = results.ProjectFile(self.project, False)
+        rm = pf.get_3d() if self.module == "3d" else pf.get_schematic()
+        if treepaths is None:
+            treepaths = rm.get_tree_items(filter_)
+        wanted = None if run_ids is None else set(run_ids)
+        out = []
+        for treepath in treepaths:
+            for run_id in rm.get_run_ids(treepath):
+                if wanted is None or run_id in wanted:
+                    out.append((treepath, run_id))
+        return out
+
+    def _capacity(self, n: int) -> int:
+        return int(self._item_bytes * 1.25) * n
+
+    def extract(
+        self, pairs: typing.Iterable[tuple[str, int]]
+    ) -> typing.Iterator[tuple[str, int, numpy.ndarray, numpy.ndarray]]:
+        """并行读取曲线，按完成顺序逐条返回。
+
+        失败的曲线记录在`errors`中并跳过。
+
+        Args:
+            pairs (Iterable[tuple[str, int]]): （树路径, run_id）。
+
+        Yields:
+            tuple[str, int, numpy.ndarray, numpy.ndarray]: 树路径、run_id、x和y。
+        """
+        pairs = list(pairs)
+        shards = [
+            pairs[i : i + self.shard_size]
+            for i in range(0, len(pairs), self.shard_size)
+        ]
+        shards.reverse()
+        self.errors = []
+        if not shards:
+            return
+        in_flight: dict[concurrent.futures.Future, typing.Any] = {}
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(self.workers, len(shards)),
+            initializer=_init_worker,
+            initargs=(self.project, self.module),
+        )
+
+        def submit() -> None:
+            shard = shards.pop()
+            capacity = self._capacity(len(shard))
+            block = shared_memory.SharedMemory(create=True, size=capacity)
+            future = pool.submit(
+                _extract_shard,
+                block.name,
+                capacity,
+                shard,
+                self.load_impedances,
+            )
+            in_flight[future] = block
+            return
+
+        n_done = 0
+        try:
+            while shards and len(in_flight) < 2 * self.workers:
+                submit()
+            while in_flight:
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    block = in_flight.pop(future)
+                    try:
+                        records = future.result()
+                        items = []
+                        for treepath, run_id, dx, dy, error in records:
+                            if error is not None:
+                                self.errors.append((treepath, run_id, error))
+                                continue
+                            x, y = _get(block, dx), _get(block, dy)
+                            items.append((treepath, run_id, x, y))
+                    finally:
+                        block.close()
+                        block.unlink()
+                    if items:
+                        self._item_bytes = max(
+                            self._item_bytes,
+                            max(x.nbytes + y.nbytes for _, _, x, y in items),
+                        )
+                    if shards:
+                        submit()
+                    n_done += len(records)
+                    yield from items
+            _logger.info(
+                "%d results extracted with %d workers, %d failed.",
+                n_done - len(self.errors),
+                self.workers,
+                len(self.errors),
+            )
+        finally:
+            for future in in_flight:
+                future.cancel()
+            pool.shutdown(wait=True)
+            for block in in_flight.values():
+                block.close()
+                block.unlink()
+        return
@@ -27,12 +27,22 @@ CST Studio Suite is not supported.
 
 """
 
+import fnmatch
+import logging
 import os
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
 
 import cst.results
 import numpy
 from cst.results import get_version_info, print_version_info
 
+from . import touchstone
+from .result_cache import ResultCache
+
+_logger = logging.getLogger(__name__)
+
 # -pylint: disable=no-member
 
 
@@ -42,7 +52,11 @@ class ProjectFile:
     This class allows loading a CST file to access its results."""
 
     def __init__(
-        self, filepath: os.PathLike = None, allow_interactive: bool = False
+        self,
+        filepath: os.PathLike = None,
+        allow_interactive: bool = False,
+        *,
+        cache: "ResultCache" = None,
     ):
         """
 
@@ -54,12 +68,37 @@ class ProjectFile:
         saving (e.g. a solver is started), the retrieved data will be outdated
         or ill-formed. It is up to the user to ensure that the project is not in
         an intermediate state.
+
+        With a `result_cache.ResultCache`, result items are served from the
+        cache while the project results are unchanged, and the project is only
+        opened through `cst.results` on a cache miss.
         """
+        self._filepath = filepath
+        self._allow_interactive = allow_interactive
+        self._cache = cache
+        self._pf_obj = None
+        if cache is None:
+            self._pf = cst.results.ProjectFile(filepath, allow_interactive)
 
-        self._pf = cst.results.ProjectFile(filepath, allow_interactive)
+        return
 
+    @property
+    def _pf(self) -> "cst.results.ProjectFile":
+        if self._pf_obj is None:
+            self._pf_obj = cst.results.ProjectFile(
+                self._filepath, self._allow_interactive
+            )
+        return self._pf_obj
+
+    @_pf.setter
+    def _pf(self, pf: "cst.results.ProjectFile") -> None:
+        self._pf_obj = pf
         return
 
+    @property
+    def cache(self) -> "ResultCache":
+        return self._cache
+
     def __str__(self):
         return str(self._pf)
 
@@ -87,17 +126,27 @@ class ProjectFile:
     @property
     def filename(self) -> str:
         """The filename of the CST project."""
+        if self._pf_obj is None and self._filepath is not None:
+            return os.fspath(self._filepath)
         return self._pf.filename
 
+    def _module(self, name: str, getter: str) -> "ResultModule":
+        if self._cache is None:
+            return ResultModule.init(getattr(self._pf, getter)())
+        rm = ResultModule()
+        rm._loader = lambda: getattr(self._pf, getter)()
+        rm._cache = self._cache
+        rm._project = self.filename
+        rm._module = name
+        return rm
+
     def get_3d(self) -> "ResultModule":
         """Get the 3D submodule of a CST project."""
-        g3 = self._pf.get_3d()
-        return ResultModule.init(g3)
+        return self._module("3d", "get_3d")
 
     def get_schematic(self):
         """Get the Schematic submodule of a CST project."""
-        gs = self._pf.get_schematic()
-        return ResultModule.init(gs)
+        return self._module("schematic", "get_schematic")
 
     def list_subprojects(self) -> list[str]:
         """List tree paths which represent subprojects (i.e. Simulation Projects
@@ -122,6 +171,271 @@ class ProjectFile:
         return ProjectFile.init(ls)
 
 
+class SweepTensor(NamedTuple):
+    """Results of one tree item for several runs on a common x-axis.
+
+    Attributes:
+        run_ids: Run ids, one per row
+        x: Common x-axis, shape (n_x,)
+        data: Complex data, shape (n_runs, n_x); NaN where not available
+        mask: True where `data` is valid; rows of missing runs are all False
+        parameters: Structured array of the parameter values of each run
+    """
+
+    run_ids: numpy.ndarray
+    x: numpy.ndarray
+    data: numpy.ndarray
+    mask: numpy.ndarray
+    parameters: numpy.ndarray
+
+
+def _parameter_array(combinations: list[dict]) -> numpy.ndarray:
+    """Structured float64 array of parameter combinations, NaN if missing."""
+    names = []
+    for c in combinations:
+        names += [n for n in c if n not in names]
+    table = numpy.full(
+        len(combinations), numpy.nan, dtype=[(n, numpy.float64) for n in names]
+    )
+    for i, c in enumerate(combinations):
+        for n, v in c.items():
+            try:
+                table[n][i] = float(v)
+            except (TypeError, ValueError):
+                pass
+    return table
+
+
+def _resample(
+    x_src: numpy.ndarray, y_src: numpy.ndarray, x: numpy.ndarray
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Linearly interpolate the rows of `y_src` from `x_src` onto `x`.
+
+    Returns the resampled rows and the mask of points inside `x_src`.
+    """
+    if len(x_src) == 1:
+        inside = numpy.isclose(x, x_src[0])
+        return numpy.broadcast_to(y_src, (len(y_src), len(x))), inside
+    i = numpy.clip(numpy.searchsorted(x_src, x), 1, len(x_src) - 1)
+    x0, x1 = x_src[i - 1], x_src[i]
+    w = (x - x0) / (x1 - x0)
+    y = y_src[:, i - 1] * (1 - w) + y_src[:, i] * w
+    inside = (x >= x_src[0]) & (x <= x_src[-1])
+    return y, inside
+
+
+class ParameterTable:
+    """Columnar index of the parameter values of all runs.
+
+    Every column keeps a sorted copy of its values and the matching row order,
+    so equality and range queries are binary searches. Conditions on several
+    parameters are intersected.
+
+    Example::
+
+        table = project.get_3d().parameter_table()
+        table.where(w_cross=1, h_sub=(3, None))  # run ids
+    """
+
+    def __init__(self, run_ids: numpy.ndarray, parameters: numpy.ndarray):
+        """
+        Parameters
+        ----------
+        run_ids : numpy.ndarray
+            run ids, one per row
+        parameters : numpy.ndarray
+            structured array of the parameter values, one row per run
+        """
+        self._run_ids = numpy.asarray(run_ids, dtype=numpy.int64)
+        self._parameters = parameters
+        self._order: dict[str, numpy.ndarray] = {}
+        self._sorted: dict[str, numpy.ndarray] = {}
+        for name in parameters.dtype.names or ():
+            order = numpy.argsort(parameters[name], kind="stable")
+            self._order[name] = order
+            self._sorted[name] = parameters[name][order]
+        self._rows = dict(zip(self._run_ids.tolist(), range(len(run_ids))))
+        return
+
+    @classmethod
+    def from_module(
+        cls, rm: "ResultModule", run_ids: list[int] = None
+    ) -> "ParameterTable":
+        """Build the table with one `get_parameter_combination` call per run.
+
+        Parameters
+        ----------
+        rm : ResultModule
+            result module
+        run_ids : list[int], optional
+            run ids, by default `rm.get_all_run_ids()`
+
+        Returns
+        -------
+        ParameterTable
+            the table
+        """
+        if run_ids is None:
+            run_ids = rm.get_all_run_ids()
+        run_ids = list(run_ids)
+        combinations = [rm.get_parameter_combination(r) for r in run_ids]
+        return cls(run_ids, _parameter_array(combinations))
+
+    def __len__(self) -> int:
+        return len(self._run_ids)
+
+    def __contains__(self, run_id: int) -> bool:
+        return run_id in self._rows
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        return self._parameters.dtype.names or ()
+
+    @property
+    def run_ids(self) -> numpy.ndarray:
+        return self._run_ids
+
+    @property
+    def parameters(self) -> numpy.ndarray:
+        return self._parameters
+
+    def row(self, run_id: int) -> dict:
+        """Parameter combination of a run."""
+        values = self._parameters[self._rows[run_id]]
+        return {n: float(values[n]) for n in self.names}
+
+    def rows(
+        self,
+        name: str,
+        low: float = None,
+        high: float = None,
+        *,
+        inclusive: tuple[bool, bool] = (True, True),
+    ) -> numpy.ndarray:
+        """Rows whose parameter `name` lies between `low` and `high`.
+
+        Parameters
+        ----------
+        name : str
+            parameter name
+        low, high : float, optional
+            bounds, None for an open end
+        inclusive : tuple[bool, bool], optional
+            whether each bound is included, by default (True, True)
+
+        Returns
+        -------
+        numpy.ndarray
+            row indices, unsorted
+        """
+        values = self._sorted[name]
+        start = 0
+        stop = len(values) - int(numpy.isnan(values).sum())
+        if low is not None:
+            side = "left" if inclusive[0] else "right"
+            start = int(numpy.searchsorted(values[:stop], low, side))
+        if high is not None:
+            side = "right" if inclusive[1] else "left"
+            stop = int(numpy.searchsorted(values[:stop], high, side))
+        return self._order[name][start:max(start, stop)]
+
+    def where(self, *, rtol: float = 1e-9, **conditions) -> numpy.ndarray:
+        """Run ids matching all conditions.
+
+        A scalar condition matches values equal within `rtol`; a tuple
+        `(low, high)` matches the inclusive range, with None for an open end.
+
+        Returns
+        -------
+        numpy.ndarray
+            sorted run ids
+        """
+        rows = None
+        for name, condition in conditions.items():
+            if name not in self._sorted:
+                raise KeyError(f"unknown parameter: {name}")
+            if isinstance(condition, tuple):
+                low, high = condition
+                selected = self.rows(name, low, high)
+            else:
+                tol = rtol * max(1.0, abs(float(condition)))
+                selected = self.rows(name, condition - tol, condition + tol)
+            rows = (
+                selected
+                if rows is None
+                else numpy.intersect1d(rows, selected, assume_unique=True)
+            )
+        if rows is None:
+            return numpy.sort(self._run_ids)
+        return numpy.sort(self._run_ids[rows])
+
+
+_DONE = object()
+
+
+def _prefetch(
+    load: Callable[[Any], Any],
+    keys: Iterable,
+    *,
+    chunk: int = 1,
+    prefetch: int = 2,
+) -> Iterator[Any]:
+    """Yield `load(key)` for every key, loading ahead on a background thread.
+
+    Keys are loaded `chunk` at a time and at most `prefetch` loaded chunks wait
+    for the consumer, so memory is bounded by `chunk * (prefetch + 1)` items.
+    Keys whose loading fails are logged and skipped.
+    """
+    ready: queue.Queue = queue.Queue(maxsize=max(1, prefetch))
+    stop = threading.Event()
+
+    def put(value) -> bool:
+        while not stop.is_set():
+            try:
+                ready.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker() -> None:
+        batch = []
+        try:
+            for key in keys:
+                try:
+                    batch.append(load(key))
+                except Exception as e:
+                    _logger.warning("%s not loaded: %s", key, e)
+                if len(batch) >= chunk:
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch and not put(batch):
+                return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+        return
+
+    thread = threading.Thread(
+        target=worker, name="result-prefetch", daemon=True
+    )
+    thread.start()
+    try:
+        while True:
+            batch = ready.get()
+            if batch is _DONE:
+                break
+            if isinstance(batch, BaseException):
+                raise batch
+            yield from batch
+            del batch
+    finally:
+        stop.set()
+        thread.join()
+    return
+
+
 class ResultModule:
     """提供与`cst.results.ResultModule`的接口。
 
@@ -130,7 +444,24 @@ class ResultModule:
     """
 
     def __init__(self):
-        self._rm = None
+        self._rm_obj = None
+        # Opens the module on first access when results come from a cache
+        self._loader: Callable[[], "cst.results.ResultModule"] = None
+        self._cache: "ResultCache" = None
+        self._project: str = None
+        self._module: str = None
+        self._parameter_table: ParameterTable = None
+        return
+
+    @property
+    def _rm(self) -> "cst.results.ResultModule":
+        if self._rm_obj is None and self._loader is not None:
+            self._rm_obj = self._loader()
+        return self._rm_obj
+
+    @_rm.setter
+    def _rm(self, rm: "cst.results.ResultModule") -> None:
+        self._rm_obj = rm
         return
 
     def __str__(self):
@@ -188,6 +519,43 @@ class ResultModule:
         """
         return self._rm.get_parameter_combination(run_id)
 
+    def parameter_table(self, *, refresh: bool = False) -> ParameterTable:
+        """Index of the parameter values of all runs, built once per module.
+
+        With a result cache the table is stored next to the cached results
+        and rebuilt only when the project results change.
+
+        Parameters
+        ----------
+        refresh : bool, optional
+            rebuild the table, by default False
+
+        Returns
+        -------
+        ParameterTable
+            the table
+        """
+        if self._parameter_table is not None and not refresh:
+            return self._parameter_table
+        table = None
+        if self._cache is not None and not refresh:
+            arrays = self._cache.get_arrays(
+                self._project, self._module, "parameters"
+            )
+            if arrays is not None:
+                table = ParameterTable(arrays["run_ids"], arrays["parameters"])
+        if table is None:
+            table = ParameterTable.from_module(self)
+            if self._cache is not None:
+                self._cache.put_arrays(
+                    self._project,
+                    self._module,
+                    "parameters",
+                    {"run_ids": table.run_ids, "parameters": table.parameters},
+                )
+        self._parameter_table = table
+        return table
+
     def get_result_item(
         self, treepath: str, run_id: int = 0, load_impedances: bool = True
     ) -> "ResultItem":
@@ -207,10 +575,32 @@ class ResultModule:
         ResultItem
             _description_
         """
+        if self._cache is not None:
+            cached = self._cache.get(
+                self._project, self._module, treepath, run_id
+            )
+            if cached is not None and (
+                cached.impedances or not load_impedances
+            ):
+                item = ResultItem.init(cached)
+                item._x, item._y = cached.x, cached.y
+                item._x.setflags(write=False)
+                item._y.setflags(write=False)
+                return item
         temp: "cst.results.ResultItem" = self._rm.get_result_item(
             treepath, run_id, load_impedances
         )
-        return ResultItem.init(temp)
+        item = ResultItem.init(temp)
+        if self._cache is not None:
+            self._cache.put(
+                self._project,
+                self._module,
+                item,
+                treepath=treepath,
+                run_id=run_id,
+                load_impedances=load_impedances,
+            )
+        return item
 
     def get_run_ids(
         self, treepath: str, skip_nonparametric: bool = False
@@ -231,6 +621,152 @@ class ResultModule:
         """
         return self._rm.get_run_ids(treepath, skip_nonparametric)
 
+    def load_tensor(
+        self,
+        treepath: str,
+        run_ids: list[int] = None,
+        *,
+        x: numpy.ndarray = None,
+    ) -> SweepTensor:
+        """Load a tree item for many runs into one array.
+
+        Runs sharing a frequency grid are resampled together. Points outside a
+        run's grid are masked, as are runs that cannot be loaded.
+
+        Parameters
+        ----------
+        treepath : str
+            path of result item
+        run_ids : list[int], optional
+            run ids, by default all parametric runs of `treepath` (run 0 if
+            there are none)
+        x : numpy.ndarray, optional
+            common x-axis, by default the longest grid among the runs
+
+        Returns
+        -------
+        SweepTensor
+            run ids, common x-axis, complex data, mask and parameters
+        """
+        if run_ids is None:
+            run_ids = self.get_run_ids(treepath, True) or [0]
+        run_ids = numpy.asarray(list(run_ids), dtype=numpy.int64)
+        grids: dict[bytes, tuple[numpy.ndarray, list[int], list]] = {}
+        combinations = []
+        for row, run_id in enumerate(run_ids.tolist()):
+            try:
+                item = self.get_result_item(treepath, run_id, False)
+                x_run, y_run = item.x_array(), item.y_array()
+            except Exception as e:
+                _logger.warning(
+                    "%s run %d not loaded: %s", treepath, run_id, e
+                )
+                combinations.append({})
+                continue
+            try:
+                combinations.append(self.get_parameter_combination(run_id))
+            except Exception:
+                combinations.append(item.get_parameter_combination())
+            order = numpy.argsort(x_run, kind="stable")
+            x_run, y_run = x_run[order], y_run[order]
+            group = grids.setdefault(x_run.tobytes(), (x_run, [], []))
+            group[1].append(row)
+            group[2].append(y_run)
+
+        if x is None:
+            x = max(
+                (g[0] for g in grids.values()),
+                key=len,
+                default=numpy.empty(0),
+            )
+        x = numpy.asarray(x, dtype=numpy.float64)
+        nan = complex(numpy.nan, numpy.nan)
+        data = numpy.full((len(run_ids), len(x)), nan)
+        mask = numpy.zeros((len(run_ids), len(x)), dtype=bool)
+        for x_src, rows, ys in grids.values():
+            if not len(x_src):
+                continue
+            y_src = numpy.asarray(ys, dtype=numpy.complex128)
+            if len(x_src) == len(x) and numpy.array_equal(x_src, x):
+                data[rows] = y_src
+                mask[rows] = True
+                continue
+            y, inside = _resample(x_src, y_src, x)
+            data[rows] = numpy.where(inside, y, nan)
+            mask[rows] = inside
+        return SweepTensor(
+            run_ids, x, data, mask, _parameter_array(combinations)
+        )
+
+    def _iter_items(
+        self,
+        pairs: Iterable[tuple[str, int]],
+        *,
+        load_impedances: bool = False,
+        chunk: int = 1,
+        prefetch: int = 2,
+    ) -> Iterator[tuple[str, int, "ResultItem"]]:
+        """Result items of (treepath, run_id) pairs, prefetched in chunks."""
+
+        def load(pair: tuple[str, int]) -> tuple[str, int, "ResultItem"]:
+            item = self.get_result_item(pair[0], pair[1], load_impedances)
+            item.x_array(), item.y_array()
+            return pair[0], pair[1], item
+
+        return _prefetch(load, pairs, chunk=chunk, prefetch=prefetch)
+
+    def iter_results(
+        self,
+        pattern: str = "*",
+        run_ids: Iterable[int] = None,
+        *,
+        filter_: str = "0D/1D",
+        chunk: int = 1,
+        prefetch: int = 2,
+    ) -> Iterator[tuple[str, int, numpy.ndarray, numpy.ndarray]]:
+        """Stream the results of all matching tree items and runs.
+
+        The next chunk is loaded on a background thread while the consumer
+        processes the current one; at most `chunk * (prefetch + 1)` results are
+        held in memory.
+
+        Parameters
+        ----------
+        pattern : str, optional
+            shell-style pattern matched against the tree paths, by default "*"
+        run_ids : Iterable[int], optional
+            run ids, by default every run of each tree item
+        filter_ : str, optional
+            tree item filter, by default '0D/1D'
+        chunk : int, optional
+            number of results loaded per batch, by default 1
+        prefetch : int, optional
+            number of batches loaded ahead, by default 2
+
+        Yields
+        ------
+        tuple[str, int, numpy.ndarray, numpy.ndarray]
+            tree path, run id, x and y
+        """
+        wanted = None if run_ids is None else set(run_ids)
+        treepaths = [
+            t
+            for t in self.get_tree_items(filter_)
+            if fnmatch.fnmatchcase(t, pattern)
+        ]
+
+        def pairs() -> Iterator[tuple[str, int]]:
+            for treepath in treepaths:
+                for run_id in self.get_run_ids(treepath):
+                    if wanted is None or run_id in wanted:
+                        yield treepath, run_id
+
+        for treepath, run_id, item in self._iter_items(
+            pairs(), chunk=chunk, prefetch=prefetch
+        ):
+            yield treepath, run_id, item.x_array(), item.y_array()
+        return
+
     def get_tree_items(self, filter_: str = "0D/1D") -> list[str]:
         """List navigation tree items.
 
@@ -247,6 +783,153 @@ class ResultModule:
         return self._rm.get_tree_items(filter_)
 
 
+_FLOAT_FORMAT: str = "%.17g"
+# Rows formatted per write, bounds the size of the formatted text
+_ROWS_PER_WRITE: int = 65536
+_CONTAINER_FORMATS: tuple[str, ...] = ("npz", "h5", "hdf5", "parquet")
+
+
+def _columns(x: numpy.ndarray, y: numpy.ndarray) -> numpy.ndarray:
+    """x and y as float64 columns: x, Re, Im, Abs, Phase for complex y."""
+    if numpy.iscomplexobj(y):
+        return numpy.column_stack(
+            [x, y.real, y.imag, numpy.abs(y), numpy.angle(y)]
+        )
+    return numpy.column_stack([x, y]).astype(numpy.float64)
+
+
+def _write_rows(f, columns: numpy.ndarray, row_format: str) -> None:
+    """Write a 2D array with one `%` formatting call per block of rows."""
+    for start in range(0, len(columns), _ROWS_PER_WRITE):
+        block = columns[start : start + _ROWS_PER_WRITE]
+        f.write(((row_format + "\n") * len(block)) % tuple(block.ravel()))
+    return
+
+
+class _NpzWriter:
+    """Append arrays to an `.npz` file one at a time (a zip of `.npy`)."""
+
+    def __init__(self, filename: str):
+        import zipfile
+
+        self._zip = zipfile.ZipFile(
+            filename, "w", compression=zipfile.ZIP_STORED, allowZip64=True
+        )
+        return
+
+    def add(self, name: str, array: numpy.ndarray) -> None:
+        with self._zip.open(f"{name}.npy", "w", force_zip64=True) as f:
+            numpy.lib.format.write_array(
+                f, numpy.asanyarray(array), allow_pickle=False
+            )
+        return
+
+    def close(self) -> None:
+        self._zip.close()
+        return
+
+
+def export_results(
+    records: Iterable[tuple[str, int, numpy.ndarray, numpy.ndarray]],
+    filename: str,
+    format_type: str = None,
+) -> list[tuple[str, int]]:
+    """Write many results into one container file, one result at a time.
+
+    Supported formats:
+
+    - ``npz``: arrays ``x_<i>`` and ``y_<i>`` plus ``treepath`` and ``run_id``
+      index arrays; readable with `numpy.load`.
+    - ``h5``/``hdf5`` (requires h5py): one group ``/<i>`` per result with
+      datasets ``x`` and ``y`` and attributes ``treepath`` and ``run_id``.
+    - ``parquet`` (requires pyarrow): a long table with the columns
+      ``treepath``, ``run_id``, ``x``, ``y_re`` and ``y_im``.
+
+    Args:
+        records: (treepath, run_id, x, y), e.g. from
+            `ResultModule.iter_results`
+        filename: Output filename
+        format_type: Container format, by default taken from the extension
+
+    Returns:
+        (treepath, run_id) of the written results, in file order
+    """
+    if format_type is None:
+        format_type = os.path.splitext(filename)[1].lstrip(".")
+    format_type = format_type.lower()
+    if format_type not in _CONTAINER_FORMATS:
+        raise ValueError(f"unsupported container format: {format_type}")
+    folder = os.path.dirname(filename)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    written: list[tuple[str, int]] = []
+
+    if format_type == "npz":
+        writer = _NpzWriter(filename)
+        try:
+            for i, (treepath, run_id, x, y) in enumerate(records):
+                writer.add(f"x_{i}", x)
+                writer.add(f"y_{i}", y)
+                written.append((treepath, int(run_id)))
+            writer.add(
+                "treepath", numpy.array([t for t, _ in written], dtype=str)
+            )
+            writer.add(
+                "run_id", numpy.array([r for _, r in written], dtype=numpy.int64)
+            )
+        finally:
+            writer.close()
+
+    elif format_type in ("h5", "hdf5"):
+        try:
+            import h5py
+        except ImportError as e:
+            raise ImportError("HDF5 export requires h5py.") from e
+        with h5py.File(filename, "w") as f:
+            for i, (treepath, run_id, x, y) in enumerate(records):
+                group = f.create_group(str(i))
+                group.create_dataset("x", data=x)
+                group.create_dataset("y", data=y)
+                group.attrs["treepath"] = treepath
+                group.attrs["run_id"] = int(run_id)
+                written.append((treepath, int(run_id)))
+
+    else:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Parquet export requires pyarrow.") from e
+        schema = pyarrow.schema(
+            [
+                ("treepath", pyarrow.string()),
+                ("run_id", pyarrow.int64()),
+                ("x", pyarrow.float64()),
+                ("y_re", pyarrow.float64()),
+                ("y_im", pyarrow.float64()),
+            ]
+        )
+        with pyarrow.parquet.ParquetWriter(filename, schema) as writer:
+            for treepath, run_id, x, y in records:
+                y = numpy.asarray(y, dtype=numpy.complex128)
+                writer.write_table(
+                    pyarrow.table(
+                        {
+                            "treepath": [treepath] * len(x),
+                            "run_id": numpy.full(len(x), int(run_id)),
+                            "x": x,
+                            "y_re": y.real,
+                            "y_im": y.imag,
+                        },
+                        schema=schema,
+                    )
+                )
+                written.append((treepath, int(run_id)))
+
+    _logger.info("%d results written to %s.", len(written), filename)
+    return written
+
+
 class ResultItem:
     """提供与`cst.results.ResultItem`的接口。
 
@@ -256,6 +939,8 @@ class ResultItem:
 
     def __init__(self):
         self._ri = None
+        self._x: numpy.ndarray = None
+        self._y: numpy.ndarray = None
         return
 
     @classmethod
@@ -302,6 +987,31 @@ class ResultItem:
         """The y-axis of the result."""
         return self._ri.get_ydata()
 
+    def x_array(self) -> numpy.ndarray:
+        """The x-axis of the result as a read-only float64 array.
+
+        The array is built on first access and cached on the item.
+        """
+        if self._x is None:
+            self._x = numpy.asarray(self._ri.get_xdata(), dtype=numpy.float64)
+            self._x.setflags(write=False)
+        return self._x
+
+    def y_array(self) -> numpy.ndarray:
+        """The y-axis of the result as a read-only array.
+
+        The dtype is complex128 for complex results and float64 otherwise. The
+        array is built on first access and cached on the item.
+        """
+        if self._y is None:
+            y = numpy.asarray(self._ri.get_ydata())
+            dtype = (
+                numpy.complex128 if numpy.iscomplexobj(y) else numpy.float64
+            )
+            self._y = numpy.asarray(y, dtype=dtype)
+            self._y.setflags(write=False)
+        return self._y
+
     @property
     def length(self) -> int:
         """The number of points returned by ‘get_ydata’."""
@@ -358,18 +1068,11 @@ class ResultItem:
             import os
             os.makedirs(os.path.dirname(filename), exist_ok=True)
             
+            columns = _columns(self.x_array(), self.y_array())
             with open(filename, 'w') as f:
                 f.write(f"# {self.title}\n")
                 f.write(f"# {self.xlabel}\t{self.ylabel}\n")
-                
-                xdata = self.get_xdata()
-                ydata = self.get_ydata()
-                
-                for x, y in zip(xdata, ydata):
-                    if isinstance(y, complex):
-                        f.write(f"{x}\t{y.real}\t{y.imag}\t{abs(y)}\t{numpy.angle(y)}\n")
-                    else:
-                        f.write(f"{x}\t{y}\n")
+                _write_rows(f, columns, "\t".join([_FLOAT_FORMAT] * columns.shape[1]))
             return True
         except Exception:
             return False
@@ -378,21 +1081,16 @@ class ResultItem:
         """Export to CSV format."""
         try:
             import os
-            import csv
             os.makedirs(os.path.dirname(filename), exist_ok=True)
             
+            columns = _columns(self.x_array(), self.y_array())
             with open(filename, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([self.xlabel, f"{self.ylabel}_Real", f"{self.ylabel}_Imag", f"{self.ylabel}_Abs", f"{self.ylabel}_Phase"])
-                
-                xdata = self.get_xdata()
-                ydata = self.get_ydata()
+                f.write(f"{self.xlabel},{self.ylabel}_Real,{self.ylabel}_Imag,{self.ylabel}_Abs,{self.ylabel}_Phase\n")
                 
-                for x, y in zip(xdata, ydata):
-                    if isinstance(y, complex):
-                        writer.writerow([x, y.real, y.imag, abs(y), numpy.angle(y)])
-                    else:
-                        writer.writerow([x, y, "", "", ""])
+                if columns.shape[1] == 5:
+                    _write_rows(f, columns, ",".join([_FLOAT_FORMAT] * 5))
+                else:
+                    _write_rows(f, columns, f"{_FLOAT_FORMAT},{_FLOAT_FORMAT},,,")
             return True
         except Exception:
             return False
@@ -405,18 +1103,12 @@ class ResultItem:
             
             # This is a simplified Touchstone export
             # Real implementation would need proper port mapping
+            ydata = self.y_array().astype(numpy.complex128)
+            columns = numpy.column_stack([self.x_array(), ydata.real, ydata.imag])
             with open(filename, 'w') as f:
                 f.write("# Hz S RI R 50\n")
                 f.write(f"! {self.title}\n")
-                
-                xdata = self.get_xdata()
-                ydata = self.get_ydata()
-                
-                for x, y in zip(xdata, ydata):
-                    if isinstance(y, complex):
-                        f.write(f"{x} {y.real} {y.imag}\n")
-                    else:
-                        f.write(f"{x} {y} 0\n")
+                _write_rows(f, columns, " ".join([_FLOAT_FORMAT] * 3))
             return True
         except Exception:
             return False
@@ -430,13 +1122,22 @@ class ResultExporter:
         self.result_module = project_file.get_3d()
     
     def export_s_parameters(self, output_dir: str, ports: list = None, 
-                           format_type: str = "touchstone") -> list:
+                           format_type: str = "touchstone",
+                           run_id: int = 0,
+                           frequency_unit: str = "GHz") -> list:
         """Export S-parameters for specified ports.
         
+        The touchstone format writes the full N-port matrix into one `.sNp`
+        file; the other formats write one file per S-parameter. If the matrix
+        is incomplete (only some ports excited), a warning is logged and the
+        touchstone format also falls back to one file per S-parameter.
+        
         Args:
             output_dir: Output directory
             ports: List of port numbers (default: auto-detect)
             format_type: Export format
+            run_id: Run id for the touchstone format
+            frequency_unit: Frequency unit of the results
             
         Returns:
             List of exported filenames
@@ -446,20 +1147,45 @@ class ResultExporter:
         
         exported_files = []
         
-        # Get all S-parameter results
+        if format_type.lower() == "touchstone":
+            try:
+                if ports is None:
+                    ports = touchstone.complete_ports(self.result_module)
+                    items = touchstone._s_items(self.result_module, "0D/1D")
+                    if len(items) != len(ports) ** 2:
+                        raise ValueError(
+                            f"incomplete S-matrix, complete ports: {ports}"
+                        )
+                ts = touchstone.from_results(
+                    self.result_module, run_id, ports=ports,
+                    frequency_unit=frequency_unit,
+                )
+            except ValueError as e:
+                _logger.warning(
+                    "%s; S-parameters exported one file per curve.", e
+                )
+            else:
+                name = os.path.splitext(os.path.basename(self.project_file.filename))[0]
+                filename = os.path.join(output_dir, f"{name}.s{ts.n_ports}p")
+                touchstone.write_touchstone(filename, ts)
+                return [filename]
+        
+        # Stream all S-parameter results
         tree_items = self.result_module.get_tree_items("S-Parameters")
         
-        for item in tree_items:
-            try:
-                result_item = self.result_module.get_result_item(item)
-                filename = os.path.join(output_dir, f"{item.replace('/', '_')}.{format_type}")
-                
-                if result_item.export_to_file(filename, format_type):
-                    exported_files.append(filename)
-            except Exception:
-                continue
+        for item, _, result_item in self._iter_items(tree_items):
+            filename = os.path.join(output_dir, f"{item.replace('/', '_')}.{format_type}")
+            
+            if result_item.export_to_file(filename, format_type):
+                exported_files.append(filename)
         
         return exported_files
+
+    def _iter_items(self, tree_items: list) -> Iterator[tuple]:
+        """Run 0 of each tree item, loaded ahead of the writer."""
+        return self.result_module._iter_items(
+            ((item, 0) for item in tree_items), load_impedances=True
+        )
     
     def export_all_1d_results(self, output_dir: str, format_type: str = "txt") -> dict:
         """Export all 1D results to files.
@@ -476,22 +1202,49 @@ class ResultExporter:
         
         exported_results = {}
         
-        # Get all 1D results
+        # Stream all 1D results
         tree_items = self.result_module.get_tree_items("0D/1D")
         
-        for item in tree_items:
-            try:
-                result_item = self.result_module.get_result_item(item)
-                safe_name = item.replace('/', '_').replace('\\', '_').replace(':', '_')
-                filename = os.path.join(output_dir, f"{safe_name}.{format_type}")
-                
-                if result_item.export_to_file(filename, format_type):
-                    exported_results[item] = filename
-            except Exception:
-                continue
+        if format_type.lower() in _CONTAINER_FORMATS:
+            # All items go into a single container file
+            filename = os.path.join(output_dir, f"results.{format_type}")
+            records = (
+                (t, r, it.x_array(), it.y_array())
+                for t, r, it in self._iter_items(tree_items)
+            )
+            written = export_results(records, filename, format_type)
+            return {item: filename for item, _ in written}
+        
+        for item, _, result_item in self._iter_items(tree_items):
+            safe_name = item.replace('/', '_').replace('\\', '_').replace(':', '_')
+            filename = os.path.join(output_dir, f"{safe_name}.{format_type}")
+            
+            if result_item.export_to_file(filename, format_type):
+                exported_results[item] = filename
         
         return exported_results
     
+    def export_sweep(
+        self,
+        filename: str,
+        pattern: str = "*",
+        run_ids: list = None,
+        format_type: str = None,
+    ) -> list:
+        """Export every run of the matching 1D results into one container.
+        
+        Args:
+            filename: Output filename (.npz, .h5 or .parquet)
+            pattern: Shell-style pattern for the tree paths
+            run_ids: Run ids to export (default: all)
+            format_type: Container format (default: from the extension)
+            
+        Returns:
+            List of exported (treepath, run_id)
+        """
+        records = self.result_module.iter_results(pattern, run_ids, chunk=16)
+        return export_results(records, filename, format_type)
+    
     def export_field_data_2d(self, output_dir: str, monitor_names: list = None) -> dict:
         """Export 2D field data.
         
@@ -508,21 +1261,17 @@ class ResultExporter:
         exported_fields = {}
         
         # Get all 2D field results
-        tree_items = self.result_module.get_tree_items("2D/3D")
+        tree_items = [
+            item for item in self.result_module.get_tree_items("2D/3D")
+            if not monitor_names or any(name in item for name in monitor_names)
+        ]
         
-        for item in tree_items:
-            if monitor_names and not any(name in item for name in monitor_names):
-                continue
-                
-            try:
-                result_item = self.result_module.get_result_item(item)
-                safe_name = item.replace('/', '_').replace('\\', '_').replace(':', '_')
-                filename = os.path.join(output_dir, f"{safe_name}.txt")
-                
-                if result_item.export_to_file(filename, "txt"):
-                    exported_fields[item] = filename
-            except Exception:
-                continue
+        for item, _, result_item in self._iter_items(tree_items):
+            safe_name = item.replace('/', '_').replace('\\', '_').replace(':', '_')
+            filename = os.path.join(output_dir, f"{safe_name}.txt")
+            
+            if result_item.export_to_file(filename, "txt"):
+                exported_fields[item] = filename
         
         return exported_fields
     
@@ -610,63 +1359,102 @@ def load_and_export_project_results(project_path: str, output_dir: str,
         return {"error": str(e), "project_path": project_path}
 
 
-def analyze_antenna_performance(project_path: str, target_frequency: float = None) -> dict:
+def analyze_antenna_performance(
+    project_path: str,
+    target_frequency: float = None,
+    run_ids: list[int] = None,
+    threshold_db: float = -10.0,
+) -> dict:
     """Analyze antenna performance from CST results.
-    
+
+    S1,1 is evaluated with `antenna.compute_kpis`. Each band below
+    `threshold_db` is reported separately; "bandwidth" is the band containing
+    `target_frequency`, or the widest band if no target is given.
+
+    The top-level fields describe run 0 (the current results). The runs of
+    the parameter sweep are evaluated at once and listed under "runs".
+
     Args:
         project_path: Path to CST project file
         target_frequency: Target frequency for analysis
-        
+        run_ids: Runs listed under "runs" (default: all parametric runs, or
+            run 0 if there are none)
+        threshold_db: Band threshold in dB
+
     Returns:
         Performance analysis results
     """
+    from . import antenna
+
+    def summarize(kpi: "antenna.AntennaKPI") -> list[dict]:
+        if target_frequency is not None:
+            selected = kpi.band_index(target_frequency)
+        else:
+            width = numpy.nan_to_num(kpi.bandwidth, nan=-1.0)
+            selected = numpy.where(
+                kpi.n_bands > 0,
+                width.argmax(axis=1) if width.shape[1] else 0,
+                -1,
+            )
+        runs = []
+        for row, run_id in enumerate(kpi.run_ids.tolist()):
+            bands = kpi.bands(row)
+            band = int(selected[row])
+            runs.append(
+                {
+                    "run_id": run_id,
+                    "parameters": {
+                        n: float(kpi.parameters[n][row])
+                        for n in kpi.parameters.dtype.names or ()
+                    },
+                    "min_value": float(kpi.min_s_db[row]),
+                    "min_frequency": float(kpi.resonance[row]),
+                    "vswr_min": float(kpi.vswr_min[row]),
+                    "bands": bands,
+                    "bandwidth": bands[band] if band >= 0 else {},
+                }
+            )
+        return runs
+
     try:
         project = ProjectFile(project_path)
         result_module = project.get_3d()
-        
+
         analysis = {
             "project_path": project_path,
             "target_frequency": target_frequency,
             "s_parameters": {},
             "bandwidth": {},
+            "bands": [],
+            "runs": [],
             "gain": {},
             "efficiency": {}
         }
-        
-        # Get S11 data
-        s11_items = [item for item in result_module.get_tree_items("0D/1D") 
-                     if "S1,1" in item or "S(1,1)" in item]
-        
-        if s11_items:
-            s11_result = result_module.get_result_item(s11_items[0])
-            freq_data = s11_result.get_xdata()
-            s11_data = s11_result.get_ydata()
-            
-            # Convert to dB if complex
-            if s11_data and isinstance(s11_data[0], complex):
-                s11_db = [20 * numpy.log10(abs(s)) for s in s11_data]
-            else:
-                s11_db = list(s11_data)
-            
-            analysis["s_parameters"]["S11_dB"] = {
-                "frequency": list(freq_data),
-                "magnitude": s11_db,
-                "min_value": min(s11_db) if s11_db else None,
-                "min_frequency": freq_data[s11_db.index(min(s11_db))] if s11_db else None
-            }
-            
-            # Calculate bandwidth (frequencies where S11 < -10 dB)
-            bw_freqs = [f for f, s in zip(freq_data, s11_db) if s < -10]
-            if len(bw_freqs) >= 2:
-                analysis["bandwidth"] = {
-                    "lower_freq": min(bw_freqs),
-                    "upper_freq": max(bw_freqs),
-                    "bandwidth": max(bw_freqs) - min(bw_freqs),
-                    "fractional_bandwidth": (max(bw_freqs) - min(bw_freqs)) / ((max(bw_freqs) + min(bw_freqs)) / 2)
-                }
-        
+
+        try:
+            treepath = antenna.find_reflection(result_module, 1)
+        except ValueError:
+            return analysis
+
+        current = antenna.analyze_sweep(
+            result_module, treepath, [0], threshold_db=threshold_db
+        )
+        first = summarize(current)[0]
+        analysis["s_parameters"]["S11_dB"] = {
+            "frequency": current.frequency.tolist(),
+            "magnitude": current.s_db[0].tolist(),
+            "min_value": first["min_value"],
+            "min_frequency": first["min_frequency"],
+        }
+        analysis["bands"] = first["bands"]
+        analysis["bandwidth"] = first["bandwidth"]
+
+        sweep = antenna.analyze_sweep(
+            result_module, treepath, run_ids, threshold_db=threshold_db
+        )
+        analysis["runs"] = summarize(sweep)
         return analysis
-        
+
     except Exception as e:
         return {"error": str(e), "project_path": project_path}
 
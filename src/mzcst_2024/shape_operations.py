@@ -361,11 +361,14 @@ class BendShape(_BaseBend):
     def faces(self) -> str:
         return self._faces
 
-    def define(self, modeler: "interface.Model3D") -> "BendShape":
+    def define(
+        self, modeler: "interface.Model3D", *, picks: typing.Any = None
+    ) -> "BendShape":
         """定义弯曲。
 
         Args:
             modeler (interface.Model3D): 建模环境。
+            picks (PickSet, optional): 弯曲所需的选取，与弯曲写入同一条历史记录.
 
         Returns:
             self: 对象自身的引用。
@@ -382,8 +385,11 @@ class BendShape(_BaseBend):
             ".Bend ",
             "End With",
         ]
+        if picks is not None:
+            sCommand = picks.vba() + sCommand
         cmd = NEW_LINE.join(sCommand)
 
         modeler.add_to_history(title, cmd)
+        self._sheet.history.append(title)
         _logger.info("Bend sheet: %s to %s", self.sheet, self.solid)
         return self
@@ -7,15 +7,51 @@ import logging
 import os
 import time
 import types
+import typing
 
-from . import interface
+import numpy
+
+from . import interface, math_, tessellation
 from ._global import Parameter
-from .common import NEW_LINE, OPERATION_FAILED, OPERATION_SUCCESS, quoted
+from .common import (
+    NEW_LINE,
+    OPERATION_FAILED,
+    OPERATION_SUCCESS,
+    quoted,
+    vba_array,
+)
+from .component import ComponentTree
 from .shape_operations import Solid
+from .transformations_and_picks import WCS
 
 _logger = logging.getLogger(__name__)
 
 
+class SurfaceSamples(typing.NamedTuple):
+    """解析表面在一组(u, v)处的局部几何量，数组的前几维与(u, v)的形状一致。
+
+    Attributes:
+        u, v (numpy.ndarray): 参数坐标。
+        points (numpy.ndarray): 表面上的点，形状为(..., 3)。
+        r_u, r_v (numpy.ndarray): 偏导数，形状为(..., 3)。
+        normals (numpy.ndarray): 单位法向量，形状为(..., 3)。
+        tangent_u, tangent_v (numpy.ndarray): 与法向量构成右手系的单位切向量。
+        metric (numpy.ndarray): 第一基本形式 E, F, G，形状为(..., 3)。
+        area (numpy.ndarray): 面积元 sqrt(EG - F^2)。
+    """
+
+    u: numpy.ndarray
+    v: numpy.ndarray
+    points: numpy.ndarray
+    r_u: numpy.ndarray
+    r_v: numpy.ndarray
+    normals: numpy.ndarray
+    tangent_u: numpy.ndarray
+    tangent_v: numpy.ndarray
+    metric: numpy.ndarray
+    area: numpy.ndarray
+
+
 class Brick(Solid):
     """This object is used to create a new brick shape.
 
@@ -110,11 +146,14 @@ class Brick(Solid):
             + f"{quoted(self._component)}, {quoted(self._material)})"
         )
 
-    def create(self, modeler: "interface.Model3D") -> "Brick":
+    def create(
+        self, modeler: "interface.Model3D", *, tree: ComponentTree = None
+    ) -> "Brick":
         """定义立方体。
 
         Args:
             modeler (interface.Model3D): 建模环境。
+            tree (ComponentTree, optional): 部件索引。给定时先创建尚未创建的部件.
 
         Returns:
             self: 对象自身的引用。
@@ -135,10 +174,114 @@ class Brick(Solid):
         ]
         cmd = NEW_LINE.join(sCommand)
 
+        if tree is not None:
+            tree.ensure(modeler, [self._component])
         modeler.add_to_history(self._history_title, cmd)
         _logger.info("Brick %s:%s created.", self._component, self._name)
         return self
 
+    @classmethod
+    def create_many(
+        cls,
+        modeler: "interface.Model3D",
+        names: typing.Iterable[str],
+        xmin: typing.Any,
+        xmax: typing.Any,
+        ymin: typing.Any,
+        ymax: typing.Any,
+        zmin: typing.Any,
+        zmax: typing.Any,
+        component: typing.Any,
+        material: typing.Any,
+        *,
+        chunk_size: int = 1000,
+        tree: ComponentTree = None,
+    ) -> list["Brick"]:
+        """批量定义立方体。
+
+        坐标、部件名和材料名可以是标量或与`names`等长的数组。数据以VBA数组的形式写入，
+        再用一个循环创建全部立方体，每`chunk_size`个立方体只占用一条历史记录。
+
+        Args:
+            modeler (interface.Model3D): 建模环境。
+            names (Iterable[str]): 实体名。
+            xmin, xmax, ymin, ymax, zmin, zmax (Any): 坐标范围，数值或表达式。
+            component (Any): 所在组件名。
+            material (Any): 材料名。
+            chunk_size (int, optional): 每条历史记录包含的立方体数. Defaults to 1000.
+            tree (ComponentTree, optional): 部件索引。给定时先创建尚未创建的部件.
+
+        Returns:
+            list[Brick]: 新建的立方体。
+        """
+        names = numpy.asarray(list(names), dtype=str)
+        n = names.size
+        columns = {
+            "names": names,
+            "comp": _broadcast_strings(component, n),
+            "mat": _broadcast_strings(material, n),
+        }
+        for key, value in zip(
+            ("x1", "x2", "y1", "y2", "z1", "z2"),
+            (xmin, xmax, ymin, ymax, zmin, zmax),
+        ):
+            columns[key] = _broadcast(value, n)
+
+        loop = [
+            "With Brick",
+            ".Reset",
+            ".Name names(i)",
+            ".Component comp(i)",
+            ".Material mat(i)",
+            ".Xrange x1(i), x2(i)",
+            ".Yrange y1(i), y2(i)",
+            ".Zrange z1(i), z2(i)",
+            ".Create",
+            "End With",
+        ]
+        if tree is not None:
+            tree.ensure(modeler, set(_as_strings(columns["comp"])))
+        _create_in_chunks(modeler, "bricks", columns, loop, chunk_size)
+
+        bricks = [
+            cls(*row)
+            for row in zip(
+                *(
+                    _as_strings(columns[k])
+                    for k in (
+                        "names",
+                        "x1",
+                        "x2",
+                        "y1",
+                        "y2",
+                        "z1",
+                        "z2",
+                        "comp",
+                        "mat",
+                    )
+                )
+            )
+        ]
+        _logger.info("%d bricks created.", n)
+        return bricks
+
+    def to_mesh(
+        self, parameters: dict[str, typing.Any] = None
+    ) -> "tessellation.TriangleMesh":
+        """在本地把立方体离散为三角面片。
+
+        Args:
+            parameters (dict[str, Any], optional): 参数表，见`math_.evaluate`.
+
+        Returns:
+            tessellation.TriangleMesh: 12个三角形。
+        """
+        values = tessellation.evaluate_many(
+            (self._xmin, self._xmax, self._ymin, self._ymax, self._zmin, self._zmax),
+            parameters,
+        )
+        return tessellation.boxes(*values)
+
 
 class AnalyticalFace(Solid):
     """This object is used to create a new analytical face shape.
@@ -192,11 +335,14 @@ class AnalyticalFace(Solid):
     def range_v(self):
         return self._range_v
 
-    def create(self, modeler) -> "AnalyticalFace":
+    def create(
+        self, modeler, *, tree: ComponentTree = None
+    ) -> "AnalyticalFace":
         """定义解析表面。
 
         Args:
             modeler (interface.Model3D): 建模环境。
+            tree (ComponentTree, optional): 部件索引。给定时先创建尚未创建的部件.
 
         Returns:
             self: 对象自身的引用。
@@ -219,12 +365,192 @@ class AnalyticalFace(Solid):
         ]
         cmd = NEW_LINE.join(sCommand)
         title = f'define Analytical Face: "{self.component}:{self.name}"'
+        if tree is not None:
+            tree.ensure(modeler, [self.component])
         modeler.add_to_history(title, cmd)
         _logger.info(
             "Analytical Face %s:%s created.", self.component, self.name
         )
         return self
 
+    def parameter_bounds(
+        self, parameters: dict[str, typing.Any] = None
+    ) -> tuple[tuple[float, float], tuple[float, float]]:
+        """在本地计算参数u、v的取值范围。
+
+        Args:
+            parameters (dict[str, Any], optional): 参数表，见`math_.evaluate`.
+
+        Returns:
+            tuple: ((u_min, u_max), (v_min, v_max))
+        """
+        bounds = [
+            tuple(float(math_.evaluate(e, parameters)) for e in r)
+            for r in (self._range_u, self._range_v)
+        ]
+        return bounds[0], bounds[1]
+
+    def evaluate(
+        self,
+        u: numpy.ndarray,
+        v: numpy.ndarray,
+        parameters: dict[str, typing.Any] = None,
+    ) -> numpy.ndarray:
+        """在本地计算表面上的点。
+
+        Args:
+            u, v (numpy.ndarray): 参数坐标，形状可广播。
+            parameters (dict[str, Any], optional): 参数表，见`math_.evaluate`.
+
+        Returns:
+            numpy.ndarray: 形状为(..., 3)的点。
+        """
+        table = dict(parameters or {})
+        u, v = numpy.broadcast_arrays(
+            numpy.asarray(u, dtype=float), numpy.asarray(v, dtype=float)
+        )
+        table["u"], table["v"] = u, v
+        xyz = [
+            numpy.broadcast_to(math_.evaluate(law, table), u.shape)
+            for law in (self._law_x, self._law_y, self._law_z)
+        ]
+        return numpy.stack(xyz, axis=-1)
+
+    def sample(
+        self,
+        u: numpy.ndarray,
+        v: numpy.ndarray,
+        parameters: dict[str, typing.Any] = None,
+        *,
+        step: float = 1e-6,
+    ) -> SurfaceSamples:
+        """计算给定(u, v)处的点、法向量、切向标架和度量。
+
+        偏导数用中心差分计算，差分步长为`step`乘以参数区间长度。所有(u, v)一次性计算。
+
+        Args:
+            u, v (numpy.ndarray): 参数坐标，形状可广播。
+            parameters (dict[str, Any], optional): 参数表.
+            step (float, optional): 相对差分步长. Defaults to 1e-6.
+
+        Returns:
+            SurfaceSamples: 局部几何量。
+        """
+        (u0, u1), (v0, v1) = self.parameter_bounds(parameters)
+        u, v = numpy.broadcast_arrays(
+            numpy.asarray(u, dtype=float), numpy.asarray(v, dtype=float)
+        )
+        hu = step * abs(u1 - u0) or step
+        hv = step * abs(v1 - v0) or step
+        stacked_u = numpy.stack([u, u + hu, u - hu, u, u])
+        stacked_v = numpy.stack([v, v, v, v + hv, v - hv])
+        p = self.evaluate(stacked_u, stacked_v, parameters)
+        r_u = (p[1] - p[2]) / (2 * hu)
+        r_v = (p[3] - p[4]) / (2 * hv)
+
+        n = numpy.cross(r_u, r_v)
+        area = numpy.linalg.norm(n, axis=-1)
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            normals = n / area[..., None]
+            t_u = r_u / numpy.linalg.norm(r_u, axis=-1)[..., None]
+        t_v = numpy.cross(normals, t_u)
+        metric = numpy.stack(
+            [
+                numpy.einsum("...i,...i", r_u, r_u),
+                numpy.einsum("...i,...i", r_u, r_v),
+                numpy.einsum("...i,...i", r_v, r_v),
+            ],
+            axis=-1,
+        )
+        return SurfaceSamples(
+            u, v, p[0], r_u, r_v, normals, t_u, t_v, metric, area
+        )
+
+    def to_mesh(
+        self,
+        parameters: dict[str, typing.Any] = None,
+        *,
+        nu: int = 32,
+        nv: int = 32,
+    ) -> "tessellation.TriangleMesh":
+        """在本地把解析表面离散为三角面片。
+
+        Args:
+            parameters (dict[str, Any], optional): 参数表.
+            nu, nv (int, optional): u、v方向的采样点数. Defaults to 32.
+
+        Returns:
+            tessellation.TriangleMesh: 2 * (nu - 1) * (nv - 1)个三角形。
+        """
+        (u0, u1), (v0, v1) = self.parameter_bounds(parameters)
+        uu, vv = numpy.meshgrid(
+            numpy.linspace(u0, u1, nu), numpy.linspace(v0, v1, nv), indexing="ij"
+        )
+        return tessellation.grid_surface(self.evaluate(uu, vv, parameters))
+
+    def sample_grid(
+        self,
+        nu: int,
+        nv: int,
+        parameters: dict[str, typing.Any] = None,
+        *,
+        cell_centers: bool = True,
+    ) -> SurfaceSamples:
+        """在均匀的(u, v)网格上采样，返回数组的形状为(nu, nv, ...)。
+
+        Args:
+            nu, nv (int): u、v方向的采样数（或单元数）。
+            parameters (dict[str, Any], optional): 参数表.
+            cell_centers (bool, optional): 为`True`时取`nu * nv`个单元的中心点，
+                否则取包含端点的网格点. Defaults to True.
+
+        Returns:
+            SurfaceSamples: 局部几何量。
+        """
+        (u0, u1), (v0, v1) = self.parameter_bounds(parameters)
+        if cell_centers:
+            us = u0 + (numpy.arange(nu) + 0.5) * (u1 - u0) / nu
+            vs = v0 + (numpy.arange(nv) + 0.5) * (v1 - v0) / nv
+        else:
+            us = numpy.linspace(u0, u1, nu)
+            vs = numpy.linspace(v0, v1, nv)
+        uu, vv = numpy.meshgrid(us, vs, indexing="ij")
+        return self.sample(uu, vv, parameters)
+
+    def cell_wcs(
+        self,
+        nu: int,
+        nv: int,
+        parameters: dict[str, typing.Any] = None,
+        *,
+        prefix: str = "cell_wcs",
+        offset: float = 0.0,
+    ) -> list[WCS]:
+        """为表面上`nu * nv`个单元批量生成局部坐标系，可直接用于`WCS.store_many`。
+
+        坐标系原点位于单元中心（沿法向偏移`offset`），法向为表面法向，u方向为表面
+        u方向的切向量。名称为`{prefix}_{i}_{j}`。
+
+        Args:
+            nu, nv (int): u、v方向的单元数。
+            parameters (dict[str, Any], optional): 参数表.
+            prefix (str, optional): 坐标系名前缀. Defaults to "cell_wcs".
+            offset (float, optional): 沿法向的偏移. Defaults to 0.0.
+
+        Returns:
+            list[WCS]: 按行优先排列的坐标系。
+        """
+        s = self.sample_grid(nu, nv, parameters)
+        if not numpy.all(numpy.isfinite(s.normals)):
+            raise ValueError(f"surface {self.name} has degenerate points.")
+        names = [f"{prefix}_{i}_{j}" for i in range(nu) for j in range(nv)]
+        return WCS.from_frames(
+            names,
+            (s.points + offset * s.normals).reshape(-1, 3),
+            s.normals.reshape(-1, 3),
+            s.tangent_u.reshape(-1, 3),
+        )
+
 
 class Cylinder(Solid):
     """This object is used to create a new cylinder shape.
@@ -250,7 +576,7 @@ class Cylinder(Solid):
         center_2: str,
         range_1: str,
         range_2: str,
-        segments: int = 0,
+        segments: int | str = 0,
     ) -> None:
         super().__init__(name, component, material)
         self._axis: str = axis
@@ -260,14 +586,22 @@ class Cylinder(Solid):
         self._center_2: str = center_2
         self._range_1: str = range_1
         self._range_2: str = range_2
-        self._segments: int = segments
+        self._segments: int | str = segments
         self._history_title = f'define cylinder: "{self.component}:{self.name}"'
         return
 
+    @property
+    def axis(self) -> str:
+        return self._axis
+
     @property
     def r_in(self) -> str:
         return self._r_in
 
+    @property
+    def r_out(self) -> str:
+        return self._r_out
+
     @property
     def range(self) -> tuple[str, str]:
         return (self._range_1, self._range_2)
@@ -285,7 +619,7 @@ class Cylinder(Solid):
         return self._material
 
     @property
-    def segments(self) -> int:
+    def segments(self) -> int | str:
         """This setting specifies how the cylinder's geometry is modelled,
         either as a smooth surface of by a facetted approximation. If this value
         is set to "0", an analytical (smooth) representation of the cylinder
@@ -295,13 +629,15 @@ class Cylinder(Solid):
         cylinder will be."""
         return self._segments
 
-    def create(self, modeler):
+    def create(self, modeler, *, tree: ComponentTree = None):
         """定义圆柱体。
 
         Parameters
         ----------
         modeler : Model3D
             建模环境。
+        tree : ComponentTree, optional
+            部件索引。给定时先创建尚未创建的部件。
 
         Returns
         -------
@@ -353,7 +689,203 @@ class Cylinder(Solid):
 
         cmd = NEW_LINE.join(sCommand)
 
+        if tree is not None:
+            tree.ensure(modeler, [self._component])
         modeler.add_to_history(self._history_title, cmd)
         _logger.info("Cylinder %s:%s created.", self._component, self._name)
 
         return self
+
+    @classmethod
+    def create_many(
+        cls,
+        modeler: "interface.Model3D",
+        names: typing.Iterable[str],
+        component: typing.Any,
+        material: typing.Any,
+        axis: str,
+        r_in: typing.Any,
+        r_out: typing.Any,
+        center_1: typing.Any,
+        center_2: typing.Any,
+        range_1: typing.Any,
+        range_2: typing.Any,
+        segments: typing.Any = 0,
+        *,
+        chunk_size: int = 1000,
+        tree: ComponentTree = None,
+    ) -> list["Cylinder"]:
+        """批量定义圆柱体，参数含义与构造函数相同。
+
+        除`axis`必须为标量外，其余参数可以是标量或与`names`等长的数组。
+
+        Args:
+            modeler (interface.Model3D): 建模环境。
+            names (Iterable[str]): 实体名。
+            chunk_size (int, optional): 每条历史记录包含的圆柱体数. Defaults to 1000.
+            tree (ComponentTree, optional): 部件索引。给定时先创建尚未创建的部件.
+
+        Returns:
+            list[Cylinder]: 新建的圆柱体。
+        """
+        names = numpy.asarray(list(names), dtype=str)
+        n = names.size
+        match axis.upper():
+            case "X":
+                range_cmd, c1, c2 = ".Xrange", ".Ycenter", ".Zcenter"
+            case "Y":
+                range_cmd, c1, c2 = ".Yrange", ".Xcenter", ".Zcenter"
+            case "Z":
+                range_cmd, c1, c2 = ".Zrange", ".Xcenter", ".Ycenter"
+            case _:
+                _logger.error(
+                    "Cylinder axis must be one of 'X', 'Y', or 'Z'."
+                )
+                raise ValueError(
+                    f"Invalid axis: {axis}. Must be 'X', 'Y', or 'Z'."
+                )
+        columns = {
+            "names": names,
+            "comp": _broadcast_strings(component, n),
+            "mat": _broadcast_strings(material, n),
+            "rin": _broadcast(r_in, n),
+            "rout": _broadcast(r_out, n),
+            "c1": _broadcast(center_1, n),
+            "c2": _broadcast(center_2, n),
+            "r1": _broadcast(range_1, n),
+            "r2": _broadcast(range_2, n),
+            "seg": _broadcast(segments, n),
+        }
+        loop = [
+            "With Cylinder",
+            ".Reset",
+            ".Name names(i)",
+            ".Component comp(i)",
+            ".Material mat(i)",
+            ".OuterRadius rout(i)",
+            ".InnerRadius rin(i)",
+            f'.Axis "{axis}"',
+            f"{range_cmd} r1(i), r2(i)",
+            f"{c1} c1(i)",
+            f"{c2} c2(i)",
+            ".Segments seg(i)",
+            ".Create",
+            "End With",
+        ]
+        if tree is not None:
+            tree.ensure(modeler, set(_as_strings(columns["comp"])))
+        _create_in_chunks(modeler, "cylinders", columns, loop, chunk_size)
+
+        text = {k: _as_strings(v) for k, v in columns.items()}
+        cylinders = [
+            cls(
+                text["names"][i],
+                text["comp"][i],
+                text["mat"][i],
+                axis,
+                text["rin"][i],
+                text["rout"][i],
+                text["c1"][i],
+                text["c2"][i],
+                text["r1"][i],
+                text["r2"][i],
+                _segment_count(text["seg"][i]),
+            )
+            for i in range(n)
+        ]
+        _logger.info("%d cylinders created.", n)
+        return cylinders
+
+    def to_mesh(
+        self, parameters: dict[str, typing.Any] = None, *, segments: int = 32
+    ) -> "tessellation.TriangleMesh":
+        """在本地把圆柱体离散为三角面片。
+
+        `segments`属性大于2时按该分段数离散，否则（解析圆柱）使用参数`segments`。
+
+        Args:
+            parameters (dict[str, Any], optional): 参数表.
+            segments (int, optional): 解析圆柱的分段数. Defaults to 32.
+
+        Returns:
+            tessellation.TriangleMesh: 离散后的网格。
+        """
+        *values, n = tessellation.evaluate_many(
+            (
+                self._r_in,
+                self._r_out,
+                self._center_1,
+                self._center_2,
+                self._range_1,
+                self._range_2,
+                self._segments,
+            ),
+            parameters,
+        )
+        n = int(round(n)) if n > 2 else segments
+        return tessellation.cylinders(self._axis, *values, segments=n)
+
+
+def _broadcast(values: typing.Any, n: int) -> numpy.ndarray:
+    """把标量或数组广播为长度为`n`的一维数组。`Parameter`对象替换为其表达式。"""
+    if isinstance(values, Parameter):
+        values = values.name
+    elif isinstance(values, (list, tuple)):
+        values = [getattr(v, "name", v) for v in values]
+    arr = numpy.asarray(values)
+    if arr.ndim == 0:
+        return numpy.full(n, arr.item(), dtype=arr.dtype)
+    if arr.shape != (n,):
+        raise ValueError(f"expected {n} values, got shape {arr.shape}.")
+    return arr
+
+
+def _broadcast_strings(values: typing.Any, n: int) -> numpy.ndarray:
+    """与`_broadcast`相同，但总是返回字符串数组，用于名称类的参数。"""
+    if isinstance(values, str) or not isinstance(
+        values, typing.Iterable
+    ):
+        values = str(values)
+    else:
+        values = [str(v) for v in values]
+    return _broadcast(values, n).astype(str)
+
+
+def _segment_count(text: str) -> int | str:
+    """分段数为整数时返回`int`，为参数或表达式时返回原字符串。"""
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+def _as_strings(values: numpy.ndarray) -> list[str]:
+    """数组元素转为字符串，数值的格式与写入VBA的格式一致。"""
+    if values.dtype.kind == "f":
+        return numpy.char.mod("%.15g", values).tolist()
+    return values.astype(str).tolist()
+
+
+def _create_in_chunks(
+    modeler: "interface.Model3D",
+    what: str,
+    columns: dict[str, numpy.ndarray],
+    loop: list[str],
+    chunk_size: int,
+) -> None:
+    """把数据数组和循环体组装成历史记录，每`chunk_size`个实体一条。"""
+    n = len(columns["names"])
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        sCommand: list[str] = []
+        for key, value in columns.items():
+            sCommand += vba_array(key, value[start:stop])
+        sCommand += [
+            "Dim i As Long",
+            f"For i = 0 To {stop - start - 1}",
+            *loop,
+            "Next i",
+        ]
+        title = f"define {what}: {columns['names'][start]} ... {columns['names'][stop - 1]}"
+        modeler.add_to_history(title, NEW_LINE.join(sCommand))
+    return
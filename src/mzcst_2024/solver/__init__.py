@@ -1,5 +1,5 @@
 """定义各种求解器对象。"""
-from . import hf, lf, mechanics, particles, thermal, monitors
+from . import hf, lf, mechanics, mesh, particles, thermal, monitors
 from ._general import (
     ADSCosimulation,
     Background,
@@ -14,9 +14,11 @@ from .monitors import (
     FieldMonitor,
     SParameterMonitor,
     FarfieldMonitor,
+    MonitorPlan,
     PostProcess1D,
     PostProcess2D,
     FarfieldPostProcess,
+    ExportJob,
     create_standard_monitors,
     export_all_1d_results,
     export_field_maps_2d,
@@ -74,6 +74,8 @@ def define_frequency_range(
         "define frequency range",
         f'Solver.FrequencyRange "{fmin.name}","{fmax.name}"',
     )
+    if isinstance(modeler, interface.Model3D):
+        modeler.frequency_range = (fmin, fmax)
     return
 
 
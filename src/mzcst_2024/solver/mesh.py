@@ -0,0 +1,383 @@
+"""在提交仿真前本地估计时域求解器的六面体网格数、内存和时间步数。
+
+估计方法与CST的六面体网格规则一致：每个坐标轴上的网格线由实体包围盒的边界和按波长
+加密的步长决定（`Lines per wavelength`、`Lower mesh limit`和`Mesh line ratio limit`），
+时间步长由CFL条件给出。结果只是量级估计，用于在提交前拦截明显超出内存的模型。
+
+Example::
+
+    est = mesh.MeshEstimator.from_modeler(modeler, max_memory=64e9)
+    est.add_materials([rogers_RT5880_lossy])
+    est.add_solids(solids)
+    modeler.set_solver_guard(est.check)
+    modeler.start_solver()
+"""
+
+import logging
+import math
+import typing
+import warnings
+
+import numpy
+
+from .. import interface, math_, tessellation
+from .._global import Parameter, Units
+
+_logger = logging.getLogger(__name__)
+
+__all__: list[str] = ["MeshEstimate", "MeshEstimator"]
+
+SPEED_OF_LIGHT: float = 299792458.0
+
+_LENGTH_SCALE: dict[str, float] = {
+    "nm": 1e-9,
+    "um": 1e-6,
+    "mm": 1e-3,
+    "cm": 1e-2,
+    "m": 1.0,
+    "mil": 2.54e-5,
+    "in": 2.54e-2,
+    "ft": 0.3048,
+}
+_FREQUENCY_SCALE: dict[str, float] = {
+    "Hz": 1.0,
+    "kHz": 1e3,
+    "MHz": 1e6,
+    "GHz": 1e9,
+    "THz": 1e12,
+    "PHz": 1e15,
+}
+_TIME_SCALE: dict[str, float] = {
+    "fs": 1e-15,
+    "ps": 1e-12,
+    "ns": 1e-9,
+    "us": 1e-6,
+    "ms": 1e-3,
+    "s": 1.0,
+}
+_CONDUCTORS: set[str] = {"pec", "lossy metal", "corrugated wall"}
+
+
+class MeshEstimate(typing.NamedTuple):
+    """网格估计结果。长度使用模型单位，时间单位为秒。
+
+    Attributes:
+        shape (tuple[int, int, int]): 三个方向的网格数。
+        n_cells (int): 网格总数。
+        min_step (numpy.ndarray): 三个方向的最小步长。
+        max_step (numpy.ndarray): 三个方向的最大步长。
+        time_step (float): CFL时间步长。
+        n_steps (int): 估计的时间步数。
+        memory (float): 估计的内存（字节）。
+        bounds (numpy.ndarray, optional): 计算域的最小点和最大点，形状为(2, 3)。
+    """
+
+    shape: tuple[int, int, int]
+    n_cells: int
+    min_step: numpy.ndarray
+    max_step: numpy.ndarray
+    time_step: float
+    n_steps: int
+    memory: float
+    bounds: numpy.ndarray = None
+
+    def summary(self) -> str:
+        return (
+            f"{self.shape[0]} x {self.shape[1]} x {self.shape[2]} = "
+            + f"{self.n_cells:.3e} cells, {self.memory / 2**30:.2f} GiB, "
+            + f"dt = {self.time_step:.3e} s, {self.n_steps} steps"
+        )
+
+
+class MeshEstimator:
+    """时域求解器的网格、内存和时间步数估计器。
+
+    Attributes:
+        fmin, fmax (Parameter | str | float): 频率范围，使用`units`中的频率单位。
+        units (Units, optional): 模型单位. Defaults to mm/GHz.
+        parameters (dict[str, Any], optional): 参数表，见`math_.evaluate`.
+        lines_per_wavelength (float, optional): 每波长网格数. Defaults to 15.
+        lower_mesh_limit (float, optional): 模型包围盒最长边上的最少网格数. Defaults to 15.
+        ratio_limit (float, optional): 最大步长与最小步长之比的上限. Defaults to 20.
+        padding (float, optional): 计算域在包围盒外的扩展（模型单位）. Defaults to 0.
+        bytes_per_cell (float, optional): 每个网格占用的内存. Defaults to 100.
+        transits (float, optional): 电磁波穿越计算域的次数，用于估计仿真时长. Defaults to 20.
+        max_cells, max_memory, max_steps (float, optional): 限值，`None`表示不限制.
+        on_limit (str, optional): 超限时`"raise"`抛出`RuntimeError`，`"warn"`仅警告.
+    """
+
+    def __init__(
+        self,
+        fmin: Parameter | str | float,
+        fmax: Parameter | str | float,
+        *,
+        units: Units = None,
+        parameters: dict[str, typing.Any] = None,
+        lines_per_wavelength: float = 15,
+        lower_mesh_limit: float = 15,
+        ratio_limit: float = 20,
+        padding: float = 0.0,
+        background_epsilon: float = 1.0,
+        background_mu: float = 1.0,
+        bytes_per_cell: float = 100.0,
+        transits: float = 20.0,
+        max_cells: float = None,
+        max_memory: float = None,
+        max_steps: float = None,
+        on_limit: str = "raise",
+    ):
+        if on_limit not in ("raise", "warn"):
+            raise ValueError(f"on_limit must be 'raise' or 'warn': {on_limit}")
+        units = Units() if units is None else units
+        self._parameters = parameters
+        self._length_scale = _LENGTH_SCALE[units.length]
+        frequency_scale = _FREQUENCY_SCALE[units.frequency]
+        self._fmin = self._value(fmin) * frequency_scale
+        self._fmax = self._value(fmax) * frequency_scale
+        if not 0 <= self._fmin < self._fmax:
+            raise ValueError(
+                f"invalid frequency range: {self._fmin} Hz - {self._fmax} Hz"
+            )
+        self.lines_per_wavelength = lines_per_wavelength
+        self.lower_mesh_limit = lower_mesh_limit
+        self.ratio_limit = ratio_limit
+        self.padding = padding
+        self.background_index = math.sqrt(background_epsilon * background_mu)
+        self.bytes_per_cell = bytes_per_cell
+        self.transits = transits
+        self.max_cells = max_cells
+        self.max_memory = max_memory
+        self.max_steps = max_steps
+        self.on_limit = on_limit
+        # 材料名 -> (折射率, 是否为导体)
+        self._materials: dict[str, tuple[float, bool]] = {
+            "PEC": (1.0, True),
+            "Vacuum": (1.0, False),
+        }
+        self._lo: list[numpy.ndarray] = []
+        self._hi: list[numpy.ndarray] = []
+        self._box_materials: list[str] = []
+        return
+
+    @classmethod
+    def from_modeler(
+        cls, modeler: "interface.Model3D", **kwargs
+    ) -> "MeshEstimator":
+        """使用`solver.hf.define_frequency_range`记录的频率范围。
+
+        Args:
+            modeler (interface.Model3D): 建模环境。
+            **kwargs: 见`MeshEstimator`。
+
+        Returns:
+            MeshEstimator: 估计器。
+        """
+        if getattr(modeler, "frequency_range", None) is None:
+            raise ValueError("frequency range has not been defined.")
+        fmin, fmax = modeler.frequency_range
+        return cls(fmin, fmax, **kwargs)
+
+    def _value(self, x: typing.Any) -> float:
+        if isinstance(x, Parameter):
+            table = self._parameters or {}
+            x = x.name if x.name in table else x.expression
+        return float(math_.evaluate(str(x), self._parameters))
+
+    @property
+    def wavelength_min(self) -> float:
+        """最高频率在真空中的波长（模型单位）。"""
+        return SPEED_OF_LIGHT / self._fmax / self._length_scale
+
+    def add_materials(
+        self, materials: typing.Iterable[typing.Any]
+    ) -> "MeshEstimator":
+        """登记材料的介电常数和磁导率（取`Epsilon`和`Mu`属性，忽略色散）。
+
+        Args:
+            materials (Iterable[Material]): 材料。
+
+        Returns:
+            self (MeshEstimator): self。
+        """
+        for m in materials:
+            props = m.properties or {}
+            kind = props.get("Type", '"Normal"').strip().strip('"').lower()
+            eps = self._value(props.get("Epsilon", "1.0").strip().strip('"'))
+            mu = self._value(props.get("Mu", "1.0").strip().strip('"'))
+            self._materials[m.name] = (math.sqrt(eps * mu), kind in _CONDUCTORS)
+        return self
+
+    def add_box(
+        self,
+        lo: typing.Sequence[float],
+        hi: typing.Sequence[float],
+        material: str = "Vacuum",
+    ) -> "MeshEstimator":
+        """添加一个包围盒。
+
+        Args:
+            lo (Sequence[float]): 最小点。
+            hi (Sequence[float]): 最大点。
+            material (str, optional): 材料名. Defaults to "Vacuum".
+
+        Returns:
+            self (MeshEstimator): self。
+        """
+        self._lo.append(numpy.asarray(lo, dtype=float).reshape(1, 3))
+        self._hi.append(numpy.asarray(hi, dtype=float).reshape(1, 3))
+        self._box_materials.append(str(material))
+        return self
+
+    def add_solids(
+        self, solids: typing.Iterable[typing.Any]
+    ) -> "MeshEstimator":
+        """添加实体的包围盒。立方体批量计算，其它实体通过`to_mesh`计算。
+
+        Args:
+            solids (Iterable[Solid]): 实体，需支持`to_mesh`。
+
+        Returns:
+            self (MeshEstimator): self。
+        """
+        from ..shapes import Brick
+
+        solids = list(solids)
+        bricks = [s for s in solids if isinstance(s, Brick)]
+        if bricks:
+            c = [
+                tessellation.evaluate_many(
+                    (getattr(b, a) for b in bricks), self._parameters
+                )
+                for a in ("xmin", "xmax", "ymin", "ymax", "zmin", "zmax")
+            ]
+            lo = numpy.column_stack([c[0], c[2], c[4]])
+            hi = numpy.column_stack([c[1], c[3], c[5]])
+            self._lo.append(numpy.minimum(lo, hi))
+            self._hi.append(numpy.maximum(lo, hi))
+            self._box_materials += [b.material for b in bricks]
+        for s in solids:
+            if isinstance(s, Brick):
+                continue
+            lo, hi = s.to_mesh(self._parameters).bounds()
+            self.add_box(lo, hi, s.material)
+        return self
+
+    def _axis_steps(
+        self,
+        lo: numpy.ndarray,
+        hi: numpy.ndarray,
+        index: numpy.ndarray,
+        start: float,
+        stop: float,
+        step_max: float,
+    ) -> tuple[float, float, float]:
+        """单个坐标轴上的网格数、最小步长和最大步长。"""
+        edges = numpy.unique(numpy.concatenate([lo, hi, [start, stop]]))
+        edges = edges[(edges >= start) & (edges <= stop)]
+        length = numpy.diff(edges)
+        # 每个区间内最密材料的折射率：按折射率从大到小依次覆盖
+        n_local = numpy.full(len(length), self.background_index)
+        assigned = numpy.zeros(len(length), dtype=bool)
+        for n in numpy.unique(index)[::-1]:
+            sel = index == n
+            diff = numpy.zeros(len(edges), dtype=numpy.int64)
+            numpy.add.at(diff, numpy.searchsorted(edges, lo[sel]), 1)
+            numpy.add.at(diff, numpy.searchsorted(edges, hi[sel]), -1)
+            covered = (numpy.cumsum(diff)[:-1] > 0) & ~assigned
+            n_local[covered] = max(n, self.background_index)
+            assigned |= covered
+        step = step_max * self.background_index / n_local
+        floor = step_max / self.ratio_limit
+        cells = numpy.where(
+            length >= floor, numpy.ceil(length / step), length / floor
+        )
+        width = numpy.maximum(length / numpy.maximum(cells, 1.0), floor)
+        return float(numpy.ceil(cells.sum())), float(width.min()), float(
+            width.max()
+        )
+
+    def estimate(self) -> MeshEstimate:
+        """估计网格数、时间步长、时间步数和内存。
+
+        Returns:
+            MeshEstimate: 估计结果。
+        """
+        if not self._lo:
+            raise ValueError("no geometry has been added.")
+        lo = numpy.concatenate(self._lo)
+        hi = numpy.concatenate(self._hi)
+        props = numpy.array(
+            [self._materials.get(m, (1.0, False)) for m in self._box_materials]
+        )
+        unknown = set(self._box_materials) - set(self._materials)
+        if unknown:
+            _logger.warning("unknown materials treated as vacuum: %s", unknown)
+        # 导体内部没有场，只贡献网格线
+        index = numpy.where(props[:, 1] == 0, props[:, 0], 0.0)
+        start = lo.min(axis=0) - self.padding
+        stop = hi.max(axis=0) + self.padding
+        extent = stop - start
+        step_max = self.wavelength_min / (
+            self.lines_per_wavelength * self.background_index
+        )
+        if extent.max() > 0:
+            step_max = min(step_max, extent.max() / self.lower_mesh_limit)
+        shape, min_step, max_step = [], [], []
+        for a in range(3):
+            n, w_min, w_max = self._axis_steps(
+                lo[:, a], hi[:, a], index, start[a], stop[a], step_max
+            )
+            shape.append(max(int(n), 1))
+            min_step.append(w_min)
+            max_step.append(w_max)
+        min_step = numpy.array(min_step)
+        n_cells = int(numpy.prod(shape, dtype=numpy.int64))
+        dx = min_step * self._length_scale
+        time_step = 1.0 / (SPEED_OF_LIGHT * math.sqrt(float((dx**-2).sum())))
+        # 激励脉冲持续时间加上多次穿越计算域的时间
+        n_max = max(index.max(initial=0.0), self.background_index)
+        pulse = 3.4 / (self._fmax - self._fmin)
+        diagonal = float(numpy.linalg.norm(extent)) * self._length_scale
+        duration = pulse + self.transits * diagonal * n_max / SPEED_OF_LIGHT
+        return MeshEstimate(
+            tuple(shape),
+            n_cells,
+            min_step,
+            numpy.array(max_step),
+            time_step,
+            int(math.ceil(duration / time_step)),
+            n_cells * self.bytes_per_cell,
+            numpy.array([start, stop]),
+        )
+
+    def check(self, modeler: "interface.Model3D" = None) -> MeshEstimate:
+        """估计并与限值比较；可作为`Model3D.set_solver_guard`的检查函数。
+
+        Args:
+            modeler (interface.Model3D, optional): 未使用，仅为兼容检查函数的签名。
+
+        Raises:
+            RuntimeError: `on_limit`为`"raise"`且超出限值。
+
+        Returns:
+            MeshEstimate: 估计结果。
+        """
+        est = self.estimate()
+        _logger.info("mesh estimate: %s", est.summary())
+        exceeded = [
+            f"{name} {value:.3e} > {limit:.3e}"
+            for name, value, limit in (
+                ("cells", est.n_cells, self.max_cells),
+                ("memory", est.memory, self.max_memory),
+                ("steps", est.n_steps, self.max_steps),
+            )
+            if limit is not None and value > limit
+        ]
+        if exceeded:
+            message = "mesh estimate exceeds limits: " + ", ".join(exceeded)
+            if self.on_limit == "raise":
+                _logger.error(message)
+                raise RuntimeError(message)
+            _logger.warning(message)
+            warnings.warn(message, RuntimeWarning, stacklevel=2)
+        return est
@@ -5,11 +5,17 @@ and post-processing templates for CST simulations.
 """
 
 import logging
+import os
+import tempfile
+import warnings
 from typing import List, Dict, Any, Optional, Tuple
 
+import numpy
+
 from .. import interface
-from .._global import BaseObject, Parameter
+from .._global import BaseObject, Parameter, Units
 from ..common import NEW_LINE, quoted
+from .mesh import _TIME_SCALE, MeshEstimate
 
 _logger = logging.getLogger(__name__)
 
@@ -27,6 +33,9 @@ class FieldMonitor(BaseObject):
         self._monitor_type = "efield"  # efield, hfield, powerflow, current
         self._frequency = None
         self._name = "monitor1"
+        # (tstart, tstep, tend) for time domain monitors
+        self._time_sampling = None
+        self._subvolume = None
         return
     
     def set_field_type(self, field_type: str) -> "FieldMonitor":
@@ -55,24 +64,68 @@ class FieldMonitor(BaseObject):
         """
         self._name = name
         return self
-    
-    def create_from_attributes(self, modeler) -> "FieldMonitor":
-        """Create field monitor from attributes.
-        
+
+    def set_time_sampling(
+        self, tstep: float, tstart: float = 0.0, tend: float = None
+    ) -> "FieldMonitor":
+        """Record the field in the time domain instead of at one frequency.
+
         Args:
-            modeler: CST Model3D interface
+            tstep: Sampling step in project time units
+            tstart: First sample
+            tend: Last sample, until the end of the simulation if None
         """
+        self._time_sampling = (tstart, tstep, tend)
+        return self
+
+    def set_subvolume(
+        self, lo: Tuple[float, float, float], hi: Tuple[float, float, float]
+    ) -> "FieldMonitor":
+        """Restrict the monitor to the box between `lo` and `hi`."""
+        self._subvolume = (tuple(lo), tuple(hi))
+        return self
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def vba(self) -> List[str]:
+        """VBA lines defining the monitor."""
         vba_lines = [
             "With Monitor",
             f'    .Reset',
             f'    .Name "{self._name}"',
-            f'    .Frequency "{self._frequency if self._frequency else "0"}"',
-            f'    .FieldType "{self._monitor_type}"',
-            f'    .Create',
-            "End With"
         ]
+        if self._time_sampling is None:
+            frequency = self._frequency if self._frequency else "0"
+            vba_lines.append(f'    .Frequency "{frequency}"')
+        else:
+            tstart, tstep, tend = self._time_sampling
+            vba_lines += [
+                f'    .Domain "Time"',
+                f'    .Tstart "{tstart}"',
+                f'    .Tstep "{tstep}"',
+                f'    .Tend "{tend if tend is not None else 0}"',
+                f'    .UseTend "{tend is not None}"',
+            ]
+        vba_lines.append(f'    .FieldType "{self._monitor_type}"')
+        if self._subvolume is not None:
+            (x1, y1, z1), (x2, y2, z2) = self._subvolume
+            vba_lines += [
+                f'    .UseSubvolume "True"',
+                f'    .SetSubvolume "{x1}", "{x2}", "{y1}", "{y2}", '
+                f'"{z1}", "{z2}"',
+            ]
+        vba_lines += [f'    .Create', "End With"]
+        return vba_lines
+
+    def create_from_attributes(self, modeler) -> "FieldMonitor":
+        """Create field monitor from attributes.
         
-        vba_code = NEW_LINE.join(vba_lines)
+        Args:
+            modeler: CST Model3D interface
+        """
+        vba_code = NEW_LINE.join(self.vba())
         modeler.add_to_history(self._history_title, vba_code)
         return self
 
@@ -85,13 +138,13 @@ class SParameterMonitor(BaseObject):
         self._history_title = "define S-parameter monitor"
         return
     
-    def create_from_attributes(self, modeler) -> "SParameterMonitor":
-        """Create S-parameter monitor.
-        
-        Args:
-            modeler: CST Model3D interface
-        """
-        vba_lines = [
+    @property
+    def name(self) -> str:
+        return "S-Parameters"
+
+    def vba(self) -> List[str]:
+        """VBA lines defining the monitor."""
+        return [
             "With Monitor",
             f'    .Reset',
             f'    .Name "S-Parameters"',
@@ -99,8 +152,14 @@ class SParameterMonitor(BaseObject):
             f'    .Create',
             "End With"
         ]
+
+    def create_from_attributes(self, modeler) -> "SParameterMonitor":
+        """Create S-parameter monitor.
         
-        vba_code = NEW_LINE.join(vba_lines)
+        Args:
+            modeler: CST Model3D interface
+        """
+        vba_code = NEW_LINE.join(self.vba())
         modeler.add_to_history(self._history_title, vba_code)
         return self
 
@@ -125,13 +184,13 @@ class FarfieldMonitor(BaseObject):
         self._name = name
         return self
     
-    def create_from_attributes(self, modeler) -> "FarfieldMonitor":
-        """Create farfield monitor.
-        
-        Args:
-            modeler: CST Model3D interface
-        """
-        vba_lines = [
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def vba(self) -> List[str]:
+        """VBA lines defining the monitor."""
+        return [
             "With Monitor",
             f'    .Reset',
             f'    .Name "{self._name}"',
@@ -140,12 +199,278 @@ class FarfieldMonitor(BaseObject):
             f'    .Create',
             "End With"
         ]
+
+    def create_from_attributes(self, modeler) -> "FarfieldMonitor":
+        """Create farfield monitor.
         
-        vba_code = NEW_LINE.join(vba_lines)
+        Args:
+            modeler: CST Model3D interface
+        """
+        vba_code = NEW_LINE.join(self.vba())
         modeler.add_to_history(self._history_title, vba_code)
         return self
 
 
+def _key_value(value: Any) -> Any:
+    """Normalise a frequency or time so that 2.4 and "2.40" compare equal."""
+    if value is None:
+        return None
+    try:
+        return float(f"{float(value):.12g}")
+    except (TypeError, ValueError):
+        return str(value).strip()
+
+
+class MonitorPlan:
+    """Collect monitors, drop duplicates and create them in one history block.
+
+    Monitors are identified by (type, frequency or time sampling, subvolume);
+    adding an equivalent monitor again returns the one already planned. With a
+    `MeshEstimate` the plan estimates the size of the stored fields before the
+    monitors are submitted.
+
+    Example::
+
+        plan = MonitorPlan(max_storage=50e9)
+        plan.add_sparameters()
+        for f in (2.4, 2.45, 2.4):
+            plan.add_farfield(f)
+            plan.add_field("efield", f)
+        plan.create(modeler, estimate=estimator.estimate())
+
+    Attributes:
+        units: Project units, used for the time sampling of time monitors
+        bytes_per_value: Bytes per stored real value (single precision)
+        max_storage: Limit of the estimated storage in bytes, None for no limit
+        on_limit: "raise" raises RuntimeError when the limit is exceeded,
+            "warn" only warns
+    """
+
+    def __init__(
+        self,
+        *,
+        units: Units = None,
+        bytes_per_value: int = 4,
+        max_storage: float = None,
+        on_limit: str = "raise",
+    ):
+        if on_limit not in ("raise", "warn"):
+            raise ValueError(f"on_limit must be 'raise' or 'warn': {on_limit}")
+        units = Units() if units is None else units
+        self._time_scale = _TIME_SCALE[units.time]
+        self.bytes_per_value = bytes_per_value
+        self.max_storage = max_storage
+        self.on_limit = on_limit
+        self._monitors: Dict[Tuple, Any] = {}
+        self._names: Dict[str, Tuple] = {}
+        self._created: set = set()
+        return
+
+    def __len__(self) -> int:
+        return len(self._monitors)
+
+    @property
+    def monitors(self) -> List[Any]:
+        return list(self._monitors.values())
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    @staticmethod
+    def key(monitor) -> Tuple:
+        """Identity of a monitor: (type, domain, sampling, subvolume)."""
+        if isinstance(monitor, SParameterMonitor):
+            return ("sparameter",)
+        if isinstance(monitor, FarfieldMonitor):
+            return ("farfield", "frequency", _key_value(monitor._frequency))
+        if isinstance(monitor, FieldMonitor):
+            if monitor._time_sampling is None:
+                sampling = ("frequency", _key_value(monitor._frequency))
+            else:
+                sampling = ("time",) + tuple(
+                    _key_value(t) for t in monitor._time_sampling
+                )
+            return (monitor._monitor_type.lower(),) + sampling + (
+                monitor._subvolume,
+            )
+        raise TypeError(f"unsupported monitor: {type(monitor).__name__}")
+
+    def add(self, monitor):
+        """Add a monitor unless an equivalent one is already planned.
+
+        Raises:
+            ValueError: A different monitor already uses the same name.
+
+        Returns:
+            The planned monitor, which is the earlier one for duplicates.
+        """
+        key = self.key(monitor)
+        if key in self._monitors:
+            _logger.debug("duplicate monitor %s skipped.", monitor.name)
+            return self._monitors[key]
+        if monitor.name in self._names:
+            raise ValueError(
+                f"monitor name {monitor.name} is already used by "
+                f"{self._names[monitor.name]}"
+            )
+        self._monitors[key] = monitor
+        self._names[monitor.name] = key
+        return monitor
+
+    def add_sparameters(self) -> SParameterMonitor:
+        """Add the S-parameter monitor."""
+        return self.add(SParameterMonitor())
+
+    def add_farfield(
+        self, frequency: float, name: str = None
+    ) -> FarfieldMonitor:
+        """Add a farfield monitor, named "farfield (f=...)" by default."""
+        monitor = FarfieldMonitor().set_frequency(frequency)
+        monitor.set_name(name or f"farfield (f={frequency})")
+        return self.add(monitor)
+
+    def add_field(
+        self,
+        field_type: str,
+        frequency: float,
+        name: str = None,
+        *,
+        subvolume: Tuple[Tuple[float, ...], Tuple[float, ...]] = None,
+    ) -> FieldMonitor:
+        """Add a frequency domain field monitor, e.g. "efield" or "hfield"."""
+        monitor = FieldMonitor().set_field_type(field_type)
+        monitor.set_frequency(frequency)
+        monitor.set_name(name or f"{field_type} (f={frequency})")
+        if subvolume is not None:
+            monitor.set_subvolume(*subvolume)
+        return self.add(monitor)
+
+    def add_time_field(
+        self,
+        field_type: str,
+        tstep: float,
+        name: str = None,
+        *,
+        tstart: float = 0.0,
+        tend: float = None,
+        subvolume: Tuple[Tuple[float, ...], Tuple[float, ...]] = None,
+    ) -> FieldMonitor:
+        """Add a time domain field monitor sampled every `tstep`."""
+        monitor = FieldMonitor().set_field_type(field_type)
+        monitor.set_time_sampling(tstep, tstart, tend)
+        monitor.set_name(name or f"{field_type} (t={tstart};{tstep})")
+        if subvolume is not None:
+            monitor.set_subvolume(*subvolume)
+        return self.add(monitor)
+
+    def _fraction(self, monitor, estimate) -> float:
+        """Fraction of the mesh cells inside the monitor subvolume."""
+        subvolume = getattr(monitor, "_subvolume", None)
+        if subvolume is None or estimate.bounds is None:
+            return 1.0
+        start, stop = estimate.bounds
+        lo = numpy.maximum(numpy.asarray(subvolume[0], dtype=float), start)
+        hi = numpy.minimum(numpy.asarray(subvolume[1], dtype=float), stop)
+        extent = numpy.where(stop > start, stop - start, 1.0)
+        overlap = numpy.where(stop > start, hi - lo, 1.0)
+        return float(numpy.prod(numpy.clip(overlap / extent, 0.0, 1.0)))
+
+    def estimate_storage(self, estimate: MeshEstimate) -> Dict[str, float]:
+        """Estimate the stored result size of every monitor in bytes.
+
+        Frequency monitors store three complex components per cell, time
+        monitors three real components per cell and sample, and farfield
+        monitors four complex tangential components on the boundary cells.
+
+        Args:
+            estimate: Mesh estimate from `solver.mesh.MeshEstimator`
+
+        Returns:
+            Monitor name -> estimated size in bytes
+        """
+        nx, ny, nz = estimate.shape
+        surface = 2 * (nx * ny + ny * nz + nz * nx)
+        duration = estimate.n_steps * estimate.time_step / self._time_scale
+        storage = {}
+        for key, monitor in self._monitors.items():
+            if key[0] == "sparameter":
+                size = 0.0
+            elif key[0] == "farfield":
+                size = surface * 4 * 2 * self.bytes_per_value
+            else:
+                cells = estimate.n_cells * self._fraction(monitor, estimate)
+                if key[1] == "frequency":
+                    size = cells * 3 * 2 * self.bytes_per_value
+                else:
+                    tstart, tstep, tend = (
+                        float(t) if t is not None else None
+                        for t in monitor._time_sampling
+                    )
+                    tend = duration if tend is None else min(tend, duration)
+                    samples = max(int((tend - tstart) // tstep) + 1, 0)
+                    size = cells * 3 * self.bytes_per_value * samples
+            storage[monitor.name] = float(size)
+        return storage
+
+    def check(self, estimate: MeshEstimate) -> float:
+        """Estimate the total storage and compare it with `max_storage`.
+
+        Raises:
+            RuntimeError: `on_limit` is "raise" and the limit is exceeded.
+
+        Returns:
+            Estimated total storage in bytes
+        """
+        storage = self.estimate_storage(estimate)
+        total = sum(storage.values())
+        _logger.info(
+            "monitor storage estimate: %.2f GiB for %d monitors.",
+            total / 2**30,
+            len(storage),
+        )
+        if self.max_storage is not None and total > self.max_storage:
+            largest = sorted(storage.items(), key=lambda x: -x[1])[:3]
+            message = (
+                f"monitor storage {total:.3e} B > {self.max_storage:.3e} B, "
+                + "largest: "
+                + ", ".join(f"{n} {v:.3e} B" for n, v in largest)
+            )
+            if self.on_limit == "raise":
+                _logger.error(message)
+                raise RuntimeError(message)
+            _logger.warning(message)
+            warnings.warn(message, RuntimeWarning, stacklevel=2)
+        return total
+
+    def create(self, modeler, *, estimate: MeshEstimate = None) -> List[str]:
+        """Create all monitors not yet created by this plan in one block.
+
+        Args:
+            modeler: CST Model3D interface
+            estimate: Mesh estimate; if given, `check` runs first
+
+        Returns:
+            Names of the monitors created by this call
+        """
+        if estimate is not None:
+            self.check(estimate)
+        pending = [
+            (key, m) for key, m in self._monitors.items()
+            if key not in self._created
+        ]
+        if not pending:
+            return []
+        sCommand = []
+        for _, monitor in pending:
+            sCommand += monitor.vba()
+        modeler.add_to_history(
+            f"define {len(pending)} monitors", NEW_LINE.join(sCommand)
+        )
+        self._created.update(key for key, _ in pending)
+        return [m.name for _, m in pending]
+
+
 class PostProcess1D(BaseObject):
     """1D post-processing for creating plots and exporting data."""
     
@@ -174,11 +499,12 @@ class PostProcess1D(BaseObject):
         self._result_id = result_id
         return self
     
-    def create_plot(self, modeler) -> bool:
+    def create_plot(self, modeler, *, record_history: bool = False) -> bool:
         """Create 1D plot.
         
         Args:
             modeler: CST Model3D interface
+            record_history: Whether to record the plot in the history
             
         Returns:
             Success status
@@ -193,31 +519,51 @@ class PostProcess1D(BaseObject):
         ]
         
         vba_code = NEW_LINE.join(vba_lines)
-        modeler.add_to_history(self._history_title, vba_code)
+        interface.run_vba(
+            modeler,
+            self._history_title,
+            vba_code,
+            record_history=record_history,
+        )
         return True
     
-    def export_data(self, modeler, filename: str, format_type: str = "txt") -> bool:
+    def export_data(
+        self,
+        modeler,
+        filename: str,
+        format_type: str = "txt",
+        *,
+        record_history: bool = False,
+    ) -> bool:
         """Export 1D data to file.
         
         Args:
             modeler: CST Model3D interface
             filename: Output filename
             format_type: Export format ("txt", "csv", "touchstone")
+            record_history: Whether to record the export in the history
             
         Returns:
             Success status
         """
-        vba_lines = [
+        vba_code = NEW_LINE.join(self.export_vba(filename))
+        interface.run_vba(
+            modeler,
+            f"export 1D data to {filename}",
+            vba_code,
+            record_history=record_history,
+        )
+        return True
+
+    def export_vba(self, filename: str) -> List[str]:
+        """VBA lines that export the 1D result to `filename`."""
+        return [
             "With Plot1D",
             f'    .Reset',
             f'    .Add "{self._result_id}"',
             f'    .Save "{filename}"',
             "End With"
         ]
-        
-        vba_code = NEW_LINE.join(vba_lines)
-        modeler.add_to_history(f"export 1D data to {filename}", vba_code)
-        return True
 
 
 class PostProcess2D(BaseObject):
@@ -267,11 +613,12 @@ class PostProcess2D(BaseObject):
         self._position = position
         return self
     
-    def create_plot(self, modeler) -> bool:
+    def create_plot(self, modeler, *, record_history: bool = False) -> bool:
         """Create 2D field plot.
         
         Args:
             modeler: CST Model3D interface
+            record_history: Whether to record the plot in the history
             
         Returns:
             Success status
@@ -297,33 +644,56 @@ class PostProcess2D(BaseObject):
         ]
         
         vba_code = NEW_LINE.join(vba_lines)
-        modeler.add_to_history(self._history_title, vba_code)
+        interface.run_vba(
+            modeler,
+            self._history_title,
+            vba_code,
+            record_history=record_history,
+        )
         return True
     
-    def export_data(self, modeler, filename: str, format_type: str = "txt") -> bool:
+    def export_data(
+        self,
+        modeler,
+        filename: str,
+        format_type: str = "txt",
+        *,
+        record_history: bool = False,
+    ) -> bool:
         """Export 2D field data to file.
         
         Args:
             modeler: CST Model3D interface
             filename: Output filename
             format_type: Export format ("txt", "csv", "vtk")
+            record_history: Whether to record the export in the history
             
         Returns:
             Success status
         """
-        vba_lines = [
+        vba_code = NEW_LINE.join(self.export_vba(filename))
+        interface.run_vba(
+            modeler,
+            f"export 2D data to {filename}",
+            vba_code,
+            record_history=record_history,
+        )
+        return True
+
+    def export_vba(self, filename: str) -> List[str]:
+        """VBA lines that export the 2D field on the cutting plane to `filename`."""
+        normal_coord = {"xy": "z", "xz": "y"}.get(self._plane, "x")
+        return [
             "With Plot2D",
             f'    .Reset',
             f'    .Type "{self._field_type}"',
             f'    .Component "{self._component}"',
             f'    .Frequency "{self._frequency if self._frequency else "0"}"',
+            f'    .PlaneCoordinate "{normal_coord}"',
+            f'    .PlanePosition "{self._position}"',
             f'    .Save "{filename}"',
             "End With"
         ]
-        
-        vba_code = NEW_LINE.join(vba_lines)
-        modeler.add_to_history(f"export 2D data to {filename}", vba_code)
-        return True
 
 
 class FarfieldPostProcess(BaseObject):
@@ -360,8 +730,13 @@ class FarfieldPostProcess(BaseObject):
         self._component = component
         return self
     
-    def create_plot(self, modeler) -> bool:
-        """Create farfield plot."""
+    def create_plot(self, modeler, *, record_history: bool = False) -> bool:
+        """Create farfield plot.
+
+        Args:
+            modeler: CST Model3D interface
+            record_history: Whether to record the plot in the history
+        """
         vba_lines = [
             "With FarfieldPlot",
             f'    .Reset',
@@ -373,60 +748,293 @@ class FarfieldPostProcess(BaseObject):
         ]
         
         vba_code = NEW_LINE.join(vba_lines)
-        modeler.add_to_history(self._history_title, vba_code)
+        interface.run_vba(
+            modeler,
+            self._history_title,
+            vba_code,
+            record_history=record_history,
+        )
         return True
     
-    def export_data(self, modeler, filename: str) -> bool:
-        """Export farfield data to file."""
-        vba_lines = [
+    def export_data(
+        self, modeler, filename: str, *, record_history: bool = False
+    ) -> bool:
+        """Export farfield data to file.
+
+        Args:
+            modeler: CST Model3D interface
+            filename: Output filename
+            record_history: Whether to record the export in the history
+        """
+        vba_code = NEW_LINE.join(self.export_vba(filename))
+        interface.run_vba(
+            modeler,
+            f"export farfield data to {filename}",
+            vba_code,
+            record_history=record_history,
+        )
+        return True
+
+    def export_vba(self, filename: str) -> List[str]:
+        """VBA lines that export the farfield to `filename`."""
+        return [
             "With FarfieldPlot",
             f'    .Reset',
             f'    .Frequency "{self._frequency if self._frequency else "0"}"',
             f'    .Save "{filename}"',
             "End With"
         ]
-        
-        vba_code = NEW_LINE.join(vba_lines)
-        modeler.add_to_history(f"export farfield data to {filename}", vba_code)
-        return True
+
+
+class ExportJob:
+    """A batch of post-processing exports run as a single VBA macro.
+
+    Every export is followed by a status line written to a small tab separated
+    file, so one failing export does not abort the rest and the caller gets a
+    manifest with the status and size of each file.
+
+    Example::
+
+        job = ExportJob()
+        job.add_1d("S1,1", "out/S11.txt")
+        job.add_2d("efield", "abs", "xy", 0.0, 2.4, "out/e_xy.txt")
+        manifest = job.run(modeler)
+    """
+
+    def __init__(self):
+        self._exports: List[Tuple[str, str, Any]] = []
+        return
+
+    def __len__(self) -> int:
+        return len(self._exports)
+
+    @property
+    def filenames(self) -> List[str]:
+        return [filename for _, filename, _ in self._exports]
+
+    def add(self, kind: str, filename: str, post_process) -> "ExportJob":
+        """Add a post-processing object that has an `export_vba` method."""
+        self._exports.append((kind, filename, post_process))
+        return self
+
+    def add_1d(self, result_id: str, filename: str) -> "ExportJob":
+        """Add a 1D result export, e.g. `"S1,1"`."""
+        post_proc = PostProcess1D()
+        post_proc.set_result_id(result_id)
+        return self.add("1d", filename, post_proc)
+
+    def add_2d(
+        self,
+        field_type: str,
+        component: str,
+        plane: str,
+        position: float,
+        frequency: float,
+        filename: str,
+    ) -> "ExportJob":
+        """Add a 2D field export on a cutting plane."""
+        post_proc = PostProcess2D()
+        post_proc.set_field_type(field_type)
+        post_proc.set_component(component)
+        post_proc.set_frequency(frequency)
+        post_proc.set_plane(plane, position)
+        return self.add("2d", filename, post_proc)
+
+    def add_farfield(self, frequency: float, filename: str) -> "ExportJob":
+        """Add a farfield export."""
+        post_proc = FarfieldPostProcess()
+        post_proc.set_frequency(frequency)
+        return self.add("farfield", filename, post_proc)
+
+    @classmethod
+    def from_jobs(
+        cls,
+        jobs: List[Tuple[str, str, Optional[str], Optional[float], str]],
+    ) -> "ExportJob":
+        """Build a job from `(result, component, plane, frequency, filename)`.
+
+        `plane` selects the kind of export: `None` exports the 1D result
+        `result`, `"farfield"` exports the farfield at `frequency`, and
+        `"xy"`/`"xz"`/`"yz"` (optionally `"xy@1.5"` for the plane position)
+        exports the 2D field `result`.
+        """
+        job = cls()
+        for result, component, plane, frequency, filename in jobs:
+            if plane is None:
+                job.add_1d(result, filename)
+            elif plane == "farfield":
+                job.add_farfield(frequency, filename)
+            else:
+                plane, _, position = plane.partition("@")
+                job.add_2d(
+                    result,
+                    component or "abs",
+                    plane,
+                    float(position) if position else 0.0,
+                    frequency,
+                    filename,
+                )
+        return job
+
+    def vba(self, status_file: str) -> List[str]:
+        """VBA lines performing all exports and writing `status_file`."""
+        status_file = status_file.replace('"', '""')
+        sCommand = [
+            "Dim fn As Integer",
+            "fn = FreeFile",
+            f'Open "{status_file}" For Output As #fn',
+            "On Error Resume Next",
+        ]
+        for i, (_, filename, post_proc) in enumerate(self._exports):
+            filename = os.path.abspath(filename)
+            sCommand += post_proc.export_vba(filename.replace('"', '""'))
+            sCommand += [
+                f'Print #fn, "{i}" & vbTab & Err.Number & vbTab & '
+                "Err.Description",
+                "Err.Clear",
+            ]
+        sCommand += ["On Error GoTo 0", "Close #fn"]
+        return sCommand
+
+    def run(
+        self,
+        modeler,
+        *,
+        status_file: str = None,
+        record_history: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Run all exports in one CST call.
+
+        Args:
+            modeler: CST Model3D interface
+            status_file: File receiving the per-export status, a temporary
+                file by default
+            record_history: Whether to record the exports in the history
+
+        Returns:
+            One dict per export with the absolute `filename`, `kind`,
+            `status` and `size` in bytes (None if the file does not exist).
+            `status` is `"ok"` only if the file was (re)written and the macro
+            reported success for it, `"error: ..."` if the macro reported an
+            error, `"missing"` if there is no file and `"unknown"` otherwise,
+            e.g. when the status line is missing or the file is stale.
+        """
+        if not self._exports:
+            return []
+        remove_status = status_file is None
+        if status_file is None:
+            fd, status_file = tempfile.mkstemp(
+                prefix="mzcst_export_", suffix=".txt"
+            )
+            os.close(fd)
+        status_file = os.path.abspath(status_file)
+        filenames = [os.path.abspath(f) for f in self.filenames]
+        before = [_mtime(f) for f in filenames]
+        try:
+            interface.run_vba(
+                modeler,
+                f"export {len(self._exports)} results",
+                NEW_LINE.join(self.vba(status_file)),
+                record_history=record_history,
+            )
+            statuses = _read_export_status(status_file)
+        finally:
+            if remove_status and os.path.exists(status_file):
+                os.remove(status_file)
+
+        manifest = []
+        for i, (kind, _, _) in enumerate(self._exports):
+            filename = filenames[i]
+            size = (
+                os.path.getsize(filename) if os.path.isfile(filename) else None
+            )
+            written = size is not None and _mtime(filename) != before[i]
+            if statuses.get(i):
+                status = f"error: {statuses[i]}"
+            elif size is None:
+                status = "missing"
+            elif i in statuses and written:
+                status = "ok"
+            else:
+                status = "unknown"
+            manifest.append(
+                {"filename": filename, "kind": kind, "status": status,
+                 "size": size}
+            )
+        n_ok = sum(1 for m in manifest if m["status"] == "ok")
+        _logger.info("exported %d/%d files.", n_ok, len(manifest))
+        return manifest
+
+
+def _read_export_status(status_file: str) -> Dict[int, str]:
+    """Parse the status file written by `ExportJob.vba`.
+
+    Returns the error description of every export with a status line, an
+    empty string meaning success.
+    """
+    statuses = {}
+    try:
+        with open(status_file, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return statuses
+    for line in lines:
+        fields = line.split("\t", 2)
+        if len(fields) < 2 or not fields[0].strip().isdigit():
+            continue
+        if fields[1].strip() in ("", "0"):
+            statuses[int(fields[0])] = ""
+            continue
+        description = fields[2].strip() if len(fields) > 2 else ""
+        statuses[int(fields[0])] = description or f"VBA error {fields[1]}"
+    return statuses
+
+
+def _mtime(filename: str) -> Optional[int]:
+    """Modification time in nanoseconds, None if the file does not exist."""
+    try:
+        return os.stat(filename).st_mtime_ns
+    except OSError:
+        return None
 
 
 # Convenience functions for common monitoring tasks
-def create_standard_monitors(modeler, frequencies: List[float]) -> List[str]:
+def create_standard_monitors(
+    modeler,
+    frequencies: List[float],
+    *,
+    estimate: MeshEstimate = None,
+    max_storage: float = None,
+) -> List[str]:
     """Create standard monitoring setup for antenna simulations.
+
+    Repeated frequencies are ignored and all monitors are created in a single
+    history block.
     
     Args:
         modeler: CST Model3D interface
         frequencies: List of frequencies for monitoring
+        estimate: Mesh estimate used to check the stored field size
+        max_storage: Limit of the estimated storage in bytes
         
     Returns:
         List of created monitor names
     """
-    monitor_names = []
-    
-    # Create S-parameter monitor
-    s_monitor = SParameterMonitor()
-    s_monitor.create_from_attributes(modeler)
-    monitor_names.append("S-Parameters")
-    
-    # Create farfield monitors at key frequencies
-    for i, freq in enumerate(frequencies):
-        ff_monitor = FarfieldMonitor()
-        ff_monitor.set_frequency(freq)
-        ff_monitor.set_name(f"farfield_f{i+1}")
-        ff_monitor.create_from_attributes(modeler)
-        monitor_names.append(f"farfield_f{i+1}")
-    
-    # Create E-field monitors at key frequencies
-    for i, freq in enumerate(frequencies):
-        ef_monitor = FieldMonitor()
-        ef_monitor.set_field_type("efield")
-        ef_monitor.set_frequency(freq)
-        ef_monitor.set_name(f"efield_f{i+1}")
-        ef_monitor.create_from_attributes(modeler)
-        monitor_names.append(f"efield_f{i+1}")
-    
-    return monitor_names
+    plan = MonitorPlan(max_storage=max_storage)
+    plan.add_sparameters()
+
+    # Farfield and E-field monitors at key frequencies
+    unique = []
+    for freq in frequencies:
+        if _key_value(freq) not in [_key_value(f) for f in unique]:
+            unique.append(freq)
+    for i, freq in enumerate(unique):
+        plan.add_farfield(freq, f"farfield_f{i+1}")
+    for i, freq in enumerate(unique):
+        plan.add_field("efield", freq, f"efield_f{i+1}")
+
+    plan.create(modeler, estimate=estimate)
+    return plan.names
 
 
 def export_all_1d_results(modeler, output_dir: str, result_types: List[str] = None) -> List[str]:
@@ -443,19 +1051,12 @@ def export_all_1d_results(modeler, output_dir: str, result_types: List[str] = No
     if result_types is None:
         result_types = ["S1,1", "S2,1", "S1,2", "S2,2"]
     
-    exported_files = []
-    
+    job = ExportJob()
     for result_type in result_types:
         filename = f"{output_dir}/{result_type.replace(',', '_')}.txt"
-        
-        post_proc = PostProcess1D()
-        post_proc.set_result_id(result_type)
-        success = post_proc.export_data(modeler, filename)
-        
-        if success:
-            exported_files.append(filename)
-    
-    return exported_files
+        job.add_1d(result_type, filename)
+
+    return _exported(job.run(modeler))
 
 
 def export_field_maps_2d(modeler, output_dir: str, frequency: float, 
@@ -474,21 +1075,16 @@ def export_field_maps_2d(modeler, output_dir: str, frequency: float,
     if planes is None:
         planes = ["xy", "xz", "yz"]
     
-    exported_files = []
-    
+    job = ExportJob()
     for plane in planes:
         for field_type in ["efield", "hfield"]:
             filename = f"{output_dir}/{field_type}_{plane}_f{frequency}.txt"
-            
-            post_proc = PostProcess2D()
-            post_proc.set_field_type(field_type)
-            post_proc.set_component("abs")
-            post_proc.set_frequency(frequency)
-            post_proc.set_plane(plane, 0.0)
-            
-            success = post_proc.export_data(modeler, filename)
-            
-            if success:
-                exported_files.append(filename)
-    
-    return exported_files
\ No newline at end of file
+            job.add_2d(field_type, "abs", plane, 0.0, frequency, filename)
+
+    return _exported(job.run(modeler))
+
+
+def _exported(manifest: List[Dict[str, Any]]) -> List[str]:
+    return [
+        m["filename"] for m in manifest if not m["status"].startswith("error")
+    ]
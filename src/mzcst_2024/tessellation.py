@@ -0,0 +1,496 @@
+"""在本地把模型实体离散为三角面片，并导出为STL/VTK文件。
+
+不需要CST即可预览和比对生成的模型。所有实体都在其自身所在的工作坐标系中离散，参数
+表达式通过`math_.evaluate`求值。
+
+Example::
+
+    mesh = tessellation.mesh_solids(bricks + cylinders, parameters)
+    mesh.write("layout.stl")
+"""
+
+import logging
+import os
+import typing
+
+import numpy
+
+from . import math_
+
+_logger = logging.getLogger(__name__)
+
+__all__: list[str] = [
+    "TriangleMesh",
+    "boxes",
+    "cylinders",
+    "grid_surface",
+    "extrude_polygon",
+    "triangulate_polygon",
+    "mesh_solids",
+]
+
+
+class TriangleMesh:
+    """三角面片网格。
+
+    Attributes:
+        vertices (numpy.ndarray): 顶点坐标，形状为(V, 3)。
+        faces (numpy.ndarray): 三角形的顶点编号，形状为(T, 3)。
+    """
+
+    def __init__(self, vertices: numpy.ndarray, faces: numpy.ndarray):
+        self._vertices = numpy.asarray(vertices, dtype=float).reshape(-1, 3)
+        self._faces = numpy.asarray(faces, dtype=numpy.int64).reshape(-1, 3)
+        return
+
+    @classmethod
+    def empty(cls) -> "TriangleMesh":
+        return cls(numpy.zeros((0, 3)), numpy.zeros((0, 3), dtype=numpy.int64))
+
+    @classmethod
+    def concatenate(
+        cls, meshes: typing.Iterable["TriangleMesh"]
+    ) -> "TriangleMesh":
+        """合并多个网格。
+
+        Args:
+            meshes (Iterable[TriangleMesh]): 网格。
+
+        Returns:
+            TriangleMesh: 合并后的网格。
+        """
+        meshes = list(meshes)
+        if not meshes:
+            return cls.empty()
+        sizes = numpy.array([len(m.vertices) for m in meshes])
+        offsets = numpy.concatenate([[0], numpy.cumsum(sizes)[:-1]])
+        vertices = numpy.concatenate([m.vertices for m in meshes])
+        faces = numpy.concatenate(
+            [m.faces + o for m, o in zip(meshes, offsets)]
+        )
+        return cls(vertices, faces)
+
+    @property
+    def vertices(self) -> numpy.ndarray:
+        return self._vertices
+
+    @property
+    def faces(self) -> numpy.ndarray:
+        return self._faces
+
+    @property
+    def n_triangles(self) -> int:
+        return len(self._faces)
+
+    def __add__(self, other: "TriangleMesh") -> "TriangleMesh":
+        return TriangleMesh.concatenate([self, other])
+
+    def __repr__(self) -> str:
+        return (
+            f"TriangleMesh({len(self._vertices)} vertices, "
+            + f"{self.n_triangles} triangles)"
+        )
+
+    def triangles(self) -> numpy.ndarray:
+        """三角形的顶点坐标，形状为(T, 3, 3)。"""
+        return self._vertices[self._faces]
+
+    def normals(self) -> numpy.ndarray:
+        """三角形的单位法向量，退化三角形为零向量。"""
+        t = self.triangles()
+        n = numpy.cross(t[:, 1] - t[:, 0], t[:, 2] - t[:, 0])
+        length = numpy.linalg.norm(n, axis=1, keepdims=True)
+        return numpy.divide(n, length, out=numpy.zeros_like(n), where=length > 0)
+
+    def bounds(self) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """包围盒的最小点和最大点。"""
+        return self._vertices.min(axis=0), self._vertices.max(axis=0)
+
+    def write(self, filename: str) -> str:
+        """按扩展名（`.stl`或`.vtk`）写出网格文件。
+
+        Args:
+            filename (str): 文件名。
+
+        Returns:
+            str: 文件名。
+        """
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == ".stl":
+            return self.write_stl(filename)
+        if ext == ".vtk":
+            return self.write_vtk(filename)
+        raise ValueError(f"unsupported mesh format: {ext}")
+
+    def write_stl(self, filename: str, header: str = "mzcst_2024") -> str:
+        """写出二进制STL文件。
+
+        Args:
+            filename (str): 文件名。
+            header (str, optional): 文件头（最多80字节）. Defaults to "mzcst_2024".
+
+        Returns:
+            str: 文件名。
+        """
+        record = numpy.dtype(
+            [
+                ("normal", "<f4", (3,)),
+                ("vertices", "<f4", (3, 3)),
+                ("attribute", "<u2"),
+            ]
+        )
+        data = numpy.zeros(self.n_triangles, dtype=record)
+        data["normal"] = self.normals()
+        data["vertices"] = self.triangles()
+        with open(filename, "wb") as f:
+            f.write(header.encode("ascii", "replace")[:80].ljust(80, b" "))
+            f.write(numpy.uint32(self.n_triangles).tobytes())
+            f.write(data.tobytes())
+        _logger.info("STL written: %s (%d triangles)", filename, self.n_triangles)
+        return filename
+
+    def write_vtk(self, filename: str, title: str = "mzcst_2024") -> str:
+        """写出二进制的legacy VTK文件（POLYDATA）。
+
+        Args:
+            filename (str): 文件名。
+            title (str, optional): 标题行. Defaults to "mzcst_2024".
+
+        Returns:
+            str: 文件名。
+        """
+        n_v, n_t = len(self._vertices), self.n_triangles
+        polygons = numpy.empty((n_t, 4), dtype=">i4")
+        polygons[:, 0] = 3
+        polygons[:, 1:] = self._faces
+        with open(filename, "wb") as f:
+            f.write(
+                (
+                    "# vtk DataFile Version 3.0\n"
+                    + f"{title}\nBINARY\nDATASET POLYDATA\n"
+                    + f"POINTS {n_v} float\n"
+                ).encode("ascii")
+            )
+            f.write(self._vertices.astype(">f4").tobytes())
+            f.write(f"\nPOLYGONS {n_t} {4 * n_t}\n".encode("ascii"))
+            f.write(polygons.tobytes())
+            f.write(b"\n")
+        _logger.info("VTK written: %s (%d triangles)", filename, n_t)
+        return filename
+
+
+#######################################
+# region 基本形体
+# ↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓↓
+
+# 立方体的8个顶点按(x, y, z)二进制位编号，12个三角形法向朝外。
+_BOX_FACES = numpy.array(
+    [
+        [0, 2, 1], [1, 2, 3],  # z = zmin
+        [4, 5, 6], [5, 7, 6],  # z = zmax
+        [0, 1, 4], [1, 5, 4],  # y = ymin
+        [2, 6, 3], [3, 6, 7],  # y = ymax
+        [0, 4, 2], [2, 4, 6],  # x = xmin
+        [1, 3, 5], [3, 7, 5],  # x = xmax
+    ]
+)  # fmt: skip
+_BOX_BITS = (numpy.arange(8)[:, None] >> numpy.arange(3)) & 1
+
+
+def boxes(
+    xmin: typing.Any,
+    xmax: typing.Any,
+    ymin: typing.Any,
+    ymax: typing.Any,
+    zmin: typing.Any,
+    zmax: typing.Any,
+) -> TriangleMesh:
+    """一次性离散任意多个立方体。
+
+    Args:
+        xmin, xmax, ymin, ymax, zmin, zmax (Any): 数值或形状相同的数组。
+
+    Returns:
+        TriangleMesh: 每个立方体12个三角形。
+    """
+    lo = numpy.stack(numpy.broadcast_arrays(xmin, ymin, zmin), -1)
+    hi = numpy.stack(numpy.broadcast_arrays(xmax, ymax, zmax), -1)
+    lo = lo.reshape(-1, 3).astype(float)
+    hi = hi.reshape(-1, 3).astype(float)
+    vertices = numpy.where(_BOX_BITS[None], hi[:, None], lo[:, None])
+    faces = _BOX_FACES[None] + 8 * numpy.arange(len(lo))[:, None, None]
+    return TriangleMesh(vertices, faces)
+
+
+def cylinders(
+    axis: str,
+    r_in: typing.Any,
+    r_out: typing.Any,
+    center_1: typing.Any,
+    center_2: typing.Any,
+    range_1: typing.Any,
+    range_2: typing.Any,
+    segments: int = 32,
+) -> TriangleMesh:
+    """一次性离散任意多个同轴向的（空心）圆柱体，参数含义与`shapes.Cylinder`相同。
+
+    Args:
+        axis (str): 轴向，`"X"`、`"Y"`或`"Z"`。
+        segments (int, optional): 圆周分段数. Defaults to 32.
+
+    Returns:
+        TriangleMesh: 离散后的网格，实心圆柱的退化三角形已去除。
+    """
+    r_in, r_out, c1, c2, a1, a2 = (
+        a.reshape(-1).astype(float)
+        for a in numpy.broadcast_arrays(
+            r_in, r_out, center_1, center_2, range_1, range_2
+        )
+    )
+    n, s = len(r_in), int(segments)
+    theta = 2 * numpy.pi * numpy.arange(s) / s
+    cos, sin = numpy.cos(theta), numpy.sin(theta)
+    # 四个圆环：底外、顶外、底内、顶内，形状为(n, 4, s)
+    radius = numpy.stack([r_out, r_out, r_in, r_in], -1)[..., None]
+    height = numpy.stack([a1, a2, a1, a2], -1)[..., None]
+    p = c1[:, None, None] + radius * cos
+    q = c2[:, None, None] + radius * sin
+    h = numpy.broadcast_to(height, p.shape)
+    match axis.upper():
+        case "X":
+            xyz = (h, p, q)
+        case "Y":
+            xyz = (p, h, q)
+        case "Z":
+            xyz = (p, q, h)
+        case _:
+            raise ValueError(f"Invalid axis: {axis}. Must be 'X', 'Y', or 'Z'.")
+    vertices = numpy.stack(xyz, -1).reshape(n, 4 * s, 3)
+
+    j = numpy.arange(s)
+    k = (j + 1) % s
+    bo, to, bi, ti = (r * s + j for r in range(4))
+    bo1, to1, bi1, ti1 = (r * s + k for r in range(4))
+
+    def quads(a, b, c, d):
+        return numpy.concatenate(
+            [numpy.stack([a, b, c], -1), numpy.stack([a, c, d], -1)]
+        )
+
+    template = numpy.concatenate(
+        [
+            quads(bo, bo1, to1, to),  # 外侧面
+            quads(bi, ti, ti1, bi1),  # 内侧面
+            quads(ti, to, to1, ti1),  # 顶面
+            quads(bi, bi1, bo1, bo),  # 底面
+        ]
+    )
+    if axis.upper() == "Y":  # (x, y, z) = (p, h, q) 是左手系，需要翻转
+        template = template[:, ::-1]
+    faces = template[None] + (4 * s) * numpy.arange(n)[:, None, None]
+    mesh = TriangleMesh(vertices, faces)
+    t = mesh.triangles()
+    area = numpy.linalg.norm(numpy.cross(t[:, 1] - t[:, 0], t[:, 2] - t[:, 0]), axis=1)
+    keep = area > 1e-12 * max(1.0, float(numpy.abs(vertices).max(initial=0.0))) ** 2
+    return TriangleMesh(mesh.vertices, mesh.faces[keep])
+
+
+def grid_surface(points: numpy.ndarray) -> TriangleMesh:
+    """把(nu, nv, 3)的结构化网格点连成三角面片。
+
+    Args:
+        points (numpy.ndarray): 网格点。
+
+    Returns:
+        TriangleMesh: 每个网格单元两个三角形。
+    """
+    nu, nv = points.shape[:2]
+    idx = numpy.arange(nu * nv).reshape(nu, nv)
+    a, b = idx[:-1, :-1].ravel(), idx[1:, :-1].ravel()
+    c, d = idx[1:, 1:].ravel(), idx[:-1, 1:].ravel()
+    faces = numpy.concatenate(
+        [numpy.stack([a, b, c], -1), numpy.stack([a, c, d], -1)]
+    )
+    return TriangleMesh(points.reshape(-1, 3), faces)
+
+
+def triangulate_polygon(points: numpy.ndarray) -> numpy.ndarray:
+    """用耳切法三角化简单多边形。
+
+    Args:
+        points (numpy.ndarray): (N, 2)顶点，首尾可以重复。
+
+    Returns:
+        numpy.ndarray: (N - 2, 3)的顶点编号，三角形为逆时针方向。
+    """
+    pts = numpy.asarray(points, dtype=float)
+    if len(pts) > 1 and numpy.array_equal(pts[0], pts[-1]):
+        pts = pts[:-1]
+    n = len(pts)
+    if n < 3:
+        return numpy.zeros((0, 3), dtype=numpy.int64)
+    x, y = pts[:, 0], pts[:, 1]
+    area = 0.5 * numpy.sum(x * numpy.roll(y, -1) - numpy.roll(x, -1) * y)
+    idx = list(range(n)) if area > 0 else list(range(n - 1, -1, -1))
+
+    def cross(o, a, b):
+        return (a[..., 0] - o[..., 0]) * (b[..., 1] - o[..., 1]) - (
+            a[..., 1] - o[..., 1]
+        ) * (b[..., 0] - o[..., 0])
+
+    triangles: list[tuple[int, int, int]] = []
+    k, stall = 0, 0
+    while len(idx) > 3 and stall <= len(idx):
+        m = len(idx)
+        a, b, c = idx[(k - 1) % m], idx[k % m], idx[(k + 1) % m]
+        pa, pb, pc = pts[a], pts[b], pts[c]
+        turn = cross(pa, pb, pc)
+        if turn == 0:  # 共线点直接删除
+            del idx[k % m]
+            stall = 0
+            continue
+        if turn > 0:
+            others = pts[[i for i in idx if i not in (a, b, c)]]
+            inside = (
+                (cross(pa, pb, others) >= 0)
+                & (cross(pb, pc, others) >= 0)
+                & (cross(pc, pa, others) >= 0)
+            )
+            if not inside.any():
+                triangles.append((a, b, c))
+                del idx[k % m]
+                stall = 0
+                continue
+        k += 1
+        stall += 1
+    if len(idx) > 3:
+        _logger.warning("polygon is not simple, falling back to a fan.")
+        triangles += [(idx[0], idx[i], idx[i + 1]) for i in range(1, len(idx) - 1)]
+    elif len(idx) == 3:
+        triangles.append(tuple(idx))
+    return numpy.array(triangles, dtype=numpy.int64).reshape(-1, 3)
+
+
+def extrude_polygon(
+    points: numpy.ndarray,
+    height: float,
+    *,
+    origin: typing.Sequence[float] = (0.0, 0.0, 0.0),
+    u_vector: typing.Sequence[float] = (1.0, 0.0, 0.0),
+    v_vector: typing.Sequence[float] = (0.0, 1.0, 0.0),
+) -> TriangleMesh:
+    """离散由平面多边形挤压而成的棱柱。
+
+    Args:
+        points (numpy.ndarray): (N, 2)的多边形顶点（平面坐标系中的坐标）。
+        height (float): 沿平面法向的挤压高度。
+        origin, u_vector, v_vector (Sequence[float]): 多边形所在平面。
+
+    Returns:
+        TriangleMesh: 顶面、底面和侧面。
+    """
+    pts = numpy.asarray(points, dtype=float)
+    if numpy.array_equal(pts[0], pts[-1]):
+        pts = pts[:-1]
+    n = len(pts)
+    o, u, v = (numpy.asarray(a, dtype=float) for a in (origin, u_vector, v_vector))
+    w = numpy.cross(u, v)
+    w = w / numpy.linalg.norm(w) * float(height)
+    base = o + pts[:, :1] * u + pts[:, 1:2] * v
+    vertices = numpy.concatenate([base, base + w])
+
+    tri = triangulate_polygon(pts)
+    x, y = pts[:, 0], pts[:, 1]
+    ccw = numpy.sum(x * numpy.roll(y, -1) - numpy.roll(x, -1) * y) > 0
+    j = numpy.arange(n)
+    k = (j + 1) % n
+    if not ccw:
+        j, k = k, j
+    sides = numpy.concatenate(
+        [numpy.stack([j, k, k + n], -1), numpy.stack([j, k + n, j + n], -1)]
+    )
+    faces = numpy.concatenate([tri[:, ::-1], tri + n, sides])
+    if height < 0:
+        faces = faces[:, ::-1]
+    return TriangleMesh(vertices, faces)
+
+
+# endregion
+# ↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑
+
+
+def evaluate_many(
+    expressions: typing.Iterable[typing.Any],
+    parameters: dict[str, typing.Any] = None,
+) -> numpy.ndarray:
+    """批量计算表达式的数值，相同的表达式只计算一次。
+
+    Args:
+        expressions (Iterable[Any]): 表达式或数值。
+        parameters (dict[str, Any], optional): 参数表，见`math_.evaluate`.
+
+    Returns:
+        numpy.ndarray: float64数组。
+    """
+    cache: dict[str, float] = {}
+    values = []
+    for e in expressions:
+        key = str(e)
+        if key not in cache:
+            cache[key] = float(math_.evaluate(key, parameters))
+        values.append(cache[key])
+    return numpy.array(values, dtype=float)
+
+
+def mesh_solids(
+    solids: typing.Iterable[typing.Any],
+    parameters: dict[str, typing.Any] = None,
+    *,
+    segments: int = 32,
+) -> TriangleMesh:
+    """离散一组实体并合并为一个网格。
+
+    立方体和同轴向同分段数的圆柱体分组后批量离散，其它实体调用各自的`to_mesh`。
+
+    Args:
+        solids (Iterable[Any]): 实体，需支持`to_mesh`。
+        parameters (dict[str, Any], optional): 参数表.
+        segments (int, optional): 解析圆柱体的默认分段数. Defaults to 32.
+
+    Returns:
+        TriangleMesh: 合并后的网格。
+    """
+    # 延迟导入，避免与shapes模块循环引用
+    from .shapes import Brick, Cylinder
+
+    bricks: list = []
+    cyl_groups: dict[tuple[str, int], list] = {}
+    meshes: list[TriangleMesh] = []
+    for s in solids:
+        if isinstance(s, Brick):
+            bricks.append(s)
+        elif isinstance(s, Cylinder):
+            n = s.segments if s.segments > 2 else segments
+            cyl_groups.setdefault((s.axis.upper(), n), []).append(s)
+        else:
+            meshes.append(s.to_mesh(parameters))
+    if bricks:
+        columns = [
+            evaluate_many((getattr(b, a) for b in bricks), parameters)
+            for a in ("xmin", "xmax", "ymin", "ymax", "zmin", "zmax")
+        ]
+        meshes.append(boxes(*columns))
+    for (axis, n), group in cyl_groups.items():
+        columns = [
+            evaluate_many((getattr(c, a) for c in group), parameters)
+            for a in ("r_in", "r_out")
+        ]
+        columns += [
+            evaluate_many((getattr(c, a)[i] for c in group), parameters)
+            for a in ("center", "range")
+            for i in (0, 1)
+        ]
+        meshes.append(cylinders(axis, *columns, segments=n))
+    mesh = TriangleMesh.concatenate(meshes)
+    _logger.info("%s", f"tessellated {mesh!r}")
+    return mesh
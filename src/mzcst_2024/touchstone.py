@@ -0,0 +1,419 @@
+"""N端口Touchstone（`.sNp`）文件的读写，以及从项目结果组装S矩阵。
+
+S参数保存为形状为(F, N, N)的复数数组。写入时整块格式化，读取时按块解析数值，因此
+数千个频点、几十个端口的文件也可以快速读写。各端口参考阻抗相同时写为Touchstone 1.0
+格式，否则写为2.0格式并记录`[Reference]`。
+
+Example::
+
+    ts = touchstone.from_results(project.get_3d(), run_id=3)
+    touchstone.write_touchstone("antenna.s4p", ts)
+    ts2 = touchstone.read_touchstone("antenna.s4p")
+"""
+
+import logging
+import os
+import re
+import typing
+
+import numpy
+
+_logger = logging.getLogger(__name__)
+
+__all__: list[str] = [
+    "TouchstoneData",
+    "complete_ports",
+    "from_results",
+    "read_touchstone",
+    "write_touchstone",
+]
+
+_FREQUENCY_SCALE: dict[str, float] = {
+    "hz": 1.0,
+    "khz": 1e3,
+    "mhz": 1e6,
+    "ghz": 1e9,
+    "thz": 1e12,
+}
+_UNIT_NAMES: dict[str, str] = {
+    "hz": "Hz",
+    "khz": "kHz",
+    "mhz": "MHz",
+    "ghz": "GHz",
+    "thz": "THz",
+}
+# 每行最多写入的复数个数（Touchstone规定为4）
+_PAIRS_PER_LINE: int = 4
+# 每次格式化或解析的频点数
+_FREQUENCIES_PER_BLOCK: int = 4096
+_S_ITEM = re.compile(r"^S(\d+)(?:\(1\))?,(\d+)(?:\(1\))?$")
+
+
+class TouchstoneData(typing.NamedTuple):
+    """网络参数。
+
+    Attributes:
+        frequency (numpy.ndarray): 频率（Hz），形状为(F,)。
+        data (numpy.ndarray): 网络参数，形状为(F, N, N)。
+        z0 (numpy.ndarray): 各端口参考阻抗，形状为(F, N)。
+        parameter (str): 参数类型，`"S"`、`"Y"`或`"Z"`. Defaults to "S".
+        comments (tuple[str, ...]): 注释. Defaults to ().
+    """
+
+    frequency: numpy.ndarray
+    data: numpy.ndarray
+    z0: numpy.ndarray
+    parameter: str = "S"
+    comments: tuple[str, ...] = ()
+
+    @property
+    def n_ports(self) -> int:
+        return self.data.shape[-1]
+
+
+def _impedance(ref: typing.Any, n_freq: int) -> numpy.ndarray:
+    """把`get_ref_imp_data`的返回值整理为长度为F的复数数组。"""
+    if ref is None or len(ref) == 0:
+        return numpy.full(n_freq, 50.0 + 0j)
+    a = numpy.asarray(ref)
+    if a.ndim == 2:  # (x, z)对
+        a = a[:, -1]
+    a = a.astype(numpy.complex128)
+    if len(a) == 1:
+        return numpy.full(n_freq, a[0])
+    if len(a) != n_freq:
+        _logger.warning(
+            "reference impedance has %d points for %d frequencies, "
+            "mean value used.",
+            len(a),
+            n_freq,
+        )
+        return numpy.full(n_freq, a.mean())
+    return a
+
+
+def _s_items(rm: typing.Any, filter_: str) -> dict[tuple[int, int], str]:
+    """`(i, j)` -> `S i,j`的树路径。"""
+    items: dict[tuple[int, int], str] = {}
+    for treepath in rm.get_tree_items(filter_):
+        m = _S_ITEM.match(re.split(r"[\\/]", treepath)[-1].replace(" ", ""))
+        if m and "S-Parameters" in treepath:
+            items.setdefault((int(m.group(1)), int(m.group(2))), treepath)
+    return items
+
+
+def _complete(
+    items: typing.Collection[tuple[int, int]], ports: list[int]
+) -> list[int]:
+    """逐个去掉缺失项最多的端口，直到剩余端口的S矩阵完整。"""
+    ports = list(ports)
+    while ports:
+        missing = {
+            p: sum(
+                ((p, q) not in items) + ((q, p) not in items and q != p)
+                for q in ports
+            )
+            for p in ports
+        }
+        worst = max(ports, key=lambda p: (missing[p], p))
+        if not missing[worst]:
+            break
+        ports.remove(worst)
+    return ports
+
+
+def complete_ports(rm: typing.Any, filter_: str = "0D/1D") -> list[int]:
+    """S矩阵完整的端口。
+
+    只激励部分端口时只有部分`S i,j`，此时逐个去掉缺失项最多的端口。
+
+    Args:
+        rm (results.ResultModule): 结果子模块。
+        filter_ (str, optional): 树路径过滤器. Defaults to "0D/1D".
+
+    Returns:
+        list[int]: 端口号，从小到大排列。
+    """
+    items = _s_items(rm, filter_)
+    ports = sorted({i for i, _ in items} | {j for _, j in items})
+    return _complete(items, ports)
+
+
+def from_results(
+    rm: typing.Any,
+    run_id: int = 0,
+    *,
+    ports: typing.Sequence[int] = None,
+    frequency_unit: str = "GHz",
+    filter_: str = "0D/1D",
+) -> TouchstoneData:
+    """从项目结果组装S矩阵。
+
+    收集名为`S i,j`（或`S i(1),j(1)`）的全部结果，参考阻抗取自`S i,i`的
+    `get_ref_imp_data`，缺少时为50欧姆。未指定`ports`而S矩阵不完整（只激励了部分
+    端口）时，只使用`complete_ports`给出的端口并记录警告。
+
+    Args:
+        rm (results.ResultModule): 结果子模块。
+        run_id (int, optional): run id. Defaults to 0.
+        ports (Sequence[int], optional): 端口号，按此顺序排列. Defaults to 全部端口.
+        frequency_unit (str, optional): 结果的频率单位. Defaults to "GHz".
+        filter_ (str, optional): 树路径过滤器. Defaults to "0D/1D".
+
+    Raises:
+        ValueError: 指定的端口缺少某个`S i,j`，没有完整的端口，或各结果的频点不一致。
+
+    Returns:
+        TouchstoneData: S参数。
+    """
+    items = _s_items(rm, filter_)
+    if ports is None:
+        found = sorted({i for i, _ in items} | {j for _, j in items})
+        ports = _complete(items, found)
+        if ports != found:
+            _logger.warning(
+                "incomplete S-matrix, ports %s dropped.",
+                sorted(set(found) - set(ports)),
+            )
+    ports = list(ports)
+    n = len(ports)
+    missing = [
+        f"S{i},{j}" for i in ports for j in ports if (i, j) not in items
+    ]
+    if not ports or missing:
+        raise ValueError(f"missing S-parameters: {', '.join(missing)}")
+
+    frequency = None
+    data = z0 = None
+    for a, i in enumerate(ports):
+        for b, j in enumerate(ports):
+            item = rm.get_result_item(items[i, j], run_id, i == j)
+            x, y = item.x_array(), item.y_array()
+            if frequency is None:
+                frequency = x * _FREQUENCY_SCALE[frequency_unit.lower()]
+                data = numpy.empty((len(x), n, n), dtype=numpy.complex128)
+                z0 = numpy.empty((len(x), n), dtype=numpy.complex128)
+            elif len(x) != len(frequency):
+                raise ValueError(
+                    f"S{i},{j} has {len(x)} frequencies, "
+                    f"expected {len(frequency)}"
+                )
+            data[:, a, b] = y
+            if i == j:
+                z0[:, a] = _impedance(item.get_ref_imp_data(), len(x))
+    return TouchstoneData(frequency, data, z0)
+
+
+def _reference(z0: numpy.ndarray) -> numpy.ndarray:
+    """写入文件的各端口实参考阻抗；随频率变化时取平均值。"""
+    z0 = numpy.asarray(z0)
+    if z0.ndim == 2:
+        if not numpy.allclose(z0, z0[:1], rtol=1e-6):
+            _logger.warning(
+                "frequency dependent reference impedance averaged for "
+                "Touchstone output."
+            )
+        z0 = z0.mean(axis=0)
+    if numpy.any(numpy.abs(z0.imag) > 1e-9 * numpy.abs(z0.real)):
+        _logger.warning("imaginary part of reference impedance dropped.")
+    return z0.real
+
+
+def _frequency_template(n: int) -> str:
+    """一个频点的格式串：频率和按行排列、每行至多4个复数的参数。"""
+    if n <= 2:
+        return "%.12g" + " %.12g %.12g" * (n * n) + "\n"
+    row_lines = []
+    for start in range(0, n, _PAIRS_PER_LINE):
+        count = min(_PAIRS_PER_LINE, n - start)
+        row_lines.append(" ".join(["%.12g %.12g"] * count))
+    row = "\n".join(row_lines)
+    return "%.12g " + "\n".join([row] * n) + "\n"
+
+
+def write_touchstone(
+    filename: str,
+    ts: TouchstoneData,
+    *,
+    fmt: str = "RI",
+    frequency_unit: str = "Hz",
+    version: str = None,
+) -> None:
+    """写入`.sNp`文件。
+
+    Args:
+        filename (str): 文件名，通常为`.sNp`。
+        ts (TouchstoneData): 网络参数。
+        fmt (str, optional): 数据格式，`"RI"`、`"MA"`或`"DB"`. Defaults to "RI".
+        frequency_unit (str, optional): 频率单位. Defaults to "Hz".
+        version (str, optional): `"1.0"`或`"2.0"`. Defaults to 各端口参考阻抗相同
+            时为1.0，否则为2.0.
+    """
+    fmt = fmt.upper()
+    if fmt not in ("RI", "MA", "DB"):
+        raise ValueError(f"fmt must be 'RI', 'MA' or 'DB': {fmt}")
+    data = numpy.asarray(ts.data, dtype=numpy.complex128)
+    n_freq, n, _ = data.shape
+    reference = _reference(ts.z0)
+    same = numpy.allclose(reference, reference[0])
+    if version is None:
+        version = "1.0" if same else "2.0"
+    if version == "1.0" and not same:
+        raise ValueError("Touchstone 1.0 needs equal reference impedances.")
+    r = float(reference[0])
+    values = data
+    if ts.parameter.upper() != "S" and version == "1.0":
+        # 1.0格式中Y、Z参数按参考阻抗归一化
+        values = data / r if ts.parameter.upper() == "Z" else data * r
+    if n == 2 and version == "1.0":
+        # 1.0格式的2端口数据按列排列：S11 S21 S12 S22
+        values = values.transpose(0, 2, 1)
+
+    if fmt == "RI":
+        a, b = values.real, values.imag
+    else:
+        mag = numpy.abs(values)
+        a = 20 * numpy.log10(mag) if fmt == "DB" else mag
+        b = numpy.degrees(numpy.angle(values))
+    columns = numpy.empty((n_freq, 1 + 2 * n * n))
+    columns[:, 0] = ts.frequency / _FREQUENCY_SCALE[frequency_unit.lower()]
+    columns[:, 1::2] = a.reshape(n_freq, -1)
+    columns[:, 2::2] = b.reshape(n_freq, -1)
+
+    unit = _UNIT_NAMES[frequency_unit.lower()]
+    header = [f"! {c}" for c in ts.comments]
+    if version == "2.0":
+        header.append("[Version] 2.0")
+    header.append(f"# {unit} {ts.parameter.upper()} {fmt} R {r:.12g}")
+    if version == "2.0":
+        header.append(f"[Number of Ports] {n}")
+        if n == 2:
+            header.append("[Two-Port Data Order] 12_21")
+        header.append(f"[Number of Frequencies] {n_freq}")
+        header.append(
+            "[Reference] " + " ".join(f"{z:.12g}" for z in reference)
+        )
+        header.append("[Network Data]")
+
+    folder = os.path.dirname(filename)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    template = _frequency_template(n)
+    with open(filename, "w") as f:
+        f.write("\n".join(header) + "\n")
+        for start in range(0, n_freq, _FREQUENCIES_PER_BLOCK):
+            block = columns[start : start + _FREQUENCIES_PER_BLOCK]
+            f.write((template * len(block)) % tuple(block.ravel()))
+        if version == "2.0":
+            f.write("[End]\n")
+    _logger.info("%d-port data written to %s.", n, filename)
+    return
+
+
+def _n_ports_from_name(filename: str) -> int | None:
+    m = re.search(r"\.s(\d+)p$", filename.lower())
+    return int(m.group(1)) if m else None
+
+
+def read_touchstone(filename: str) -> TouchstoneData:
+    """读取Touchstone 1.0或2.0文件（不读取噪声参数）。
+
+    数值按块解析，每块包含若干频点。
+
+    Args:
+        filename (str): 文件名。
+
+    Returns:
+        TouchstoneData: 网络参数，频率单位为Hz，Y、Z参数已反归一化。
+    """
+    n = _n_ports_from_name(filename)
+    comments: list[str] = []
+    option = ["ghz", "s", "ma", "r", "50"]
+    reference = None
+    version = "1.0"
+    order_12_21 = False
+    blocks: list[numpy.ndarray] = []
+
+    with open(filename, "r") as f:
+        # 头部：注释、选项行和2.0格式的关键字
+        line = ""
+        for line in f:
+            text, _, comment = line.partition("!")
+            text = text.strip()
+            if not text:
+                if comment.strip():
+                    comments.append(comment.strip())
+                continue
+            lowered = text.lower()
+            if (
+                reference is not None
+                and n is not None
+                and len(reference) < n
+                and not lowered.startswith("[")
+            ):
+                # [Reference]可以跨行
+                reference += [float(v) for v in text.split()]
+                continue
+            if lowered.startswith("#"):
+                option[: len(lowered[1:].split())] = lowered[1:].split()
+            elif lowered.startswith("[version]"):
+                version = text.split()[-1]
+            elif lowered.startswith("[number of ports]"):
+                n = int(text.split()[-1])
+            elif lowered.startswith("[two-port data order]"):
+                order_12_21 = text.split()[-1] == "12_21"
+            elif lowered.startswith("[reference]"):
+                reference = [float(v) for v in text.split()[1:]]
+            elif lowered.startswith("[network data]"):
+                line = ""
+                break
+            elif lowered.startswith("["):
+                continue
+            else:
+                break
+        if n is None:
+            raise ValueError(f"number of ports unknown: {filename}")
+
+        per_frequency = 1 + 2 * n * n
+        pending = [line.partition("!")[0]]
+        size = 0
+        for line in f:
+            text = line.partition("!")[0]
+            if text.lstrip().startswith("["):
+                break
+            if n == 2 and len(text.split()) == 5:
+                # 2端口文件末尾的噪声参数
+                break
+            pending.append(text)
+            size += 1
+            if size >= _FREQUENCIES_PER_BLOCK * max(1, n * n // 4):
+                blocks.append(numpy.fromstring(" ".join(pending), sep=" "))
+                pending, size = [], 0
+        blocks.append(numpy.fromstring(" ".join(pending), sep=" "))
+
+    values = numpy.concatenate(blocks)
+    if len(values) % per_frequency:
+        raise ValueError(
+            f"{len(values)} values is not a multiple of {per_frequency}"
+        )
+    values = values.reshape(-1, per_frequency)
+    unit, parameter, fmt = option[0], option[1].upper(), option[2]
+    r = float(option[4]) if len(option) > 4 and option[3] == "r" else 50.0
+    a = values[:, 1::2].reshape(-1, n, n)
+    b = values[:, 2::2].reshape(-1, n, n)
+    if fmt == "ri":
+        data = a + 1j * b
+    else:
+        mag = 10 ** (a / 20) if fmt == "db" else a
+        data = mag * numpy.exp(1j * numpy.radians(b))
+    if n == 2 and not order_12_21:
+        # 2端口数据默认按列排列：S11 S21 S12 S22
+        data = data.transpose(0, 2, 1)
+    if version.startswith("1") and parameter != "S":
+        data = data * r if parameter == "Z" else data / r
+    z = numpy.asarray(reference if reference else [r] * n, dtype=float)
+    z0 = numpy.broadcast_to(z.astype(numpy.complex128), (len(data), n))
+    frequency = values[:, 0] * _FREQUENCY_SCALE[unit]
+    return TouchstoneData(
+        frequency, data, z0.copy(), parameter, tuple(comments)
+    )
@@ -2,12 +2,20 @@ import enum
 import logging
 import typing
 
+import numpy
+
 from . import interface
 from ._global import BaseObject, Parameter
-from .common import NEW_LINE, OPERATION_FAILED, OPERATION_SUCCESS, quoted
+from .common import (
+    NEW_LINE,
+    OPERATION_FAILED,
+    OPERATION_SUCCESS,
+    format_numbers,
+    quoted,
+)
 from .shape_operations import Solid
 
-__all__: list[str] = []
+__all__: list[str] = ["WCS", "WCSStack", "PickSet", "PickCache"]
 
 _logger = logging.getLogger(__name__)
 
@@ -78,6 +86,72 @@ class WCS:
                 _logger.error("Invalid WCS type.")
         return
 
+    @classmethod
+    def from_frames(
+        cls,
+        names: typing.Iterable[str],
+        origins: numpy.ndarray,
+        normals: numpy.ndarray,
+        u_vectors: numpy.ndarray,
+    ) -> list["WCS"]:
+        """由局部标架批量构造坐标系对象，数值一次性格式化。
+
+        Args:
+            names (Iterable[str]): 坐标系名称。
+            origins (numpy.ndarray): 原点，形状为(N, 3)。
+            normals (numpy.ndarray): 法向量，形状为(N, 3)。
+            u_vectors (numpy.ndarray): u方向向量，形状为(N, 3)。
+
+        Returns:
+            list[WCS]: 坐标系对象。
+        """
+        names = list(names)
+        text = [
+            format_numbers(numpy.asarray(a, dtype=float)).reshape(-1, 3)
+            for a in (normals, origins, u_vectors)
+        ]
+        if not len(names) == len(text[0]) == len(text[1]) == len(text[2]):
+            raise ValueError("names and frames must have the same length.")
+        rows = numpy.hstack(text).tolist()
+        return [cls(n, *r) for n, r in zip(names, rows)]
+
+    @classmethod
+    def store_many(
+        cls,
+        modeler: "interface.Model3D",
+        frames: typing.Sequence["WCS"],
+        *,
+        chunk_size: int = 500,
+    ) -> None:
+        """批量设置并存储坐标系，每`chunk_size`个坐标系只占用一条历史记录。
+
+        之后可以用`restore`切换到已存储的坐标系。
+
+        Args:
+            modeler (interface.Model3D): 当前建模环境
+            frames (Sequence[WCS]): 坐标系。
+            chunk_size (int, optional): 每条历史记录包含的坐标系数. Defaults to 500.
+
+        Returns:
+            None:
+        """
+        for start in range(0, len(frames), chunk_size):
+            chunk = frames[start : start + chunk_size]
+            sCommand: list[str] = []
+            for w in chunk:
+                sCommand += [
+                    f'WCS.SetNormal "{w.normal_x}", "{w.normal_y}", "{w.normal_z}"',
+                    f'WCS.SetOrigin "{w.origin_x}", "{w.origin_y}", "{w.origin_z}"',
+                    f'WCS.SetUVector "{w.uVector_x}", "{w.uVector_y}", "{w.uVector_z}"',
+                    f'WCS.Store "{w.name}"',
+                ]
+            modeler.add_to_history(
+                f"store wcs: {chunk[0].name} ... {chunk[-1].name}",
+                NEW_LINE.join(sCommand),
+            )
+        _logger.info("%d WCS stored.", len(frames))
+        return
+
     # endregion
     # ↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑↑
 
@@ -172,6 +246,20 @@ class WCS:
         )
         return self
 
+    def restore(self, modeler: "interface.Model3D") -> "WCS":
+        """把已存储的同名坐标系设为当前坐标系。
+
+        Args:
+            modeler (interface.Model3D): 当前建模环境
+
+        Returns:
+            WCS: self
+        """
+        modeler.add_to_history(
+            f"restore wcs: {self._name}", f'WCS.Restore "{self._name}"'
+        )
+        return self
+
     def rename(self, n: str) -> "WCS":
         """重命名
 
@@ -206,6 +294,275 @@ class WCS:
         return self
 
 
+class WCSStack:
+    """在Python侧跟踪当前工作坐标系，只向CST发送真正发生变化的设置。
+
+    - `set`只写出变化了的`SetNormal`/`SetOrigin`/`SetUVector`；
+    - `activate`跳过与当前状态相同的激活；
+    - `store`跳过内容未变的同名存储；
+    - `push`/`pop`保存和恢复状态，也可以用作上下文管理器。
+
+    Example::
+
+        with WCSStack(m3d) as ws:
+            for frame in frames:
+                ws.set(frame)
+                ...  # 在frame中建模
+        # 退出时恢复进入前的坐标系
+
+    Attributes:
+        active (str | None): 当前激活的坐标系类型，`"local"`或`"global"`。
+        elided (int): 被省略的CST调用次数。
+    """
+
+    _KEYS: tuple[str, str, str] = ("normal", "origin", "u_vector")
+    _METHODS: dict[str, str] = {
+        "normal": "SetNormal",
+        "origin": "SetOrigin",
+        "u_vector": "SetUVector",
+    }
+
+    def __init__(
+        self,
+        modeler: "interface.Model3D",
+        *,
+        assume_default: bool = False,
+        initial: WCS = None,
+        active: str = None,
+    ):
+        """初始化
+
+        默认不假定CST中局部坐标系的状态，第一次`set`写出全部分量并激活局部坐标系。
+
+        Args:
+            modeler (interface.Model3D): 建模环境。
+            assume_default (bool, optional): 为`True`时假定CST处于默认状态（全局坐
+                标系激活，局部坐标系与全局重合）。只有在同一历史中此前没有修改过
+                坐标系时才能使用. Defaults to False.
+            initial (WCS, optional): 已知的当前局部坐标系，优先于`assume_default`.
+            active (str, optional): 已知的当前激活状态，`"local"`或`"global"`.
+        """
+        self._modeler = modeler
+        self._active: str | None = None
+        self._state: dict[str, tuple[str, str, str] | None] = dict.fromkeys(
+            self._KEYS
+        )
+        if assume_default:
+            self._active = "global"
+            self._state = {
+                "normal": ("0", "0", "1"),
+                "origin": ("0", "0", "0"),
+                "u_vector": ("1", "0", "0"),
+            }
+        if initial is not None:
+            self._state = self._components(initial)
+        if active is not None:
+            self._active = active
+        self._stored: dict[str, dict] = {}
+        self._stack: list[tuple[str | None, dict]] = []
+        self._elided: int = 0
+        return
+
+    @staticmethod
+    def _components(wcs: WCS) -> dict[str, tuple[str, str, str]]:
+        return {
+            "normal": (wcs.normal_x, wcs.normal_y, wcs.normal_z),
+            "origin": (wcs.origin_x, wcs.origin_y, wcs.origin_z),
+            "u_vector": (wcs.uVector_x, wcs.uVector_y, wcs.uVector_z),
+        }
+
+    @property
+    def active(self) -> str | None:
+        return self._active
+
+    @property
+    def elided(self) -> int:
+        return self._elided
+
+    @property
+    def current(self) -> WCS:
+        """当前局部坐标系（未知的分量为空字符串）。"""
+        values = [c for k in self._KEYS for c in (self._state[k] or ("",) * 3)]
+        return WCS("", *values)
+
+    def __enter__(self) -> "WCSStack":
+        self.push()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.pop()
+        return
+
+    def activate(self, c: str) -> "WCSStack":
+        """激活全局或局部坐标系，状态未变时不写历史记录。
+
+        Args:
+            c (str): 坐标系类型，可选 `"local"` 和 `"global"`。
+
+        Returns:
+            WCSStack: self
+        """
+        if c == self._active:
+            self._elided += 1
+            return self
+        WCS.activate(self._modeler, c)
+        self._active = c
+        return self
+
+    def set(
+        self,
+        wcs: WCS = None,
+        *,
+        normal: tuple = None,
+        origin: tuple = None,
+        u_vector: tuple = None,
+        title: str = "",
+    ) -> "WCSStack":
+        """设置局部坐标系并激活，只写出发生变化的分量。
+
+        Args:
+            wcs (WCS, optional): 目标坐标系。
+            normal, origin, u_vector (tuple, optional): 单独指定的分量，优先于`wcs`。
+            title (str, optional): 历史记录标题中的名称.
+
+        Returns:
+            WCSStack: self
+        """
+        target: dict[str, tuple[str, str, str] | None] = dict.fromkeys(
+            self._KEYS
+        )
+        if wcs is not None:
+            target = self._components(wcs)
+            title = title or wcs.name
+        for key, value in zip(self._KEYS, (normal, origin, u_vector)):
+            if value is not None:
+                target[key] = tuple(str(getattr(c, "name", c)) for c in value)
+        return self._apply(target, "local", title)
+
+    def _apply(
+        self,
+        target: dict[str, tuple[str, str, str] | None],
+        active: str | None,
+        title: str,
+    ) -> "WCSStack":
+        """写出与当前状态不同的分量和激活状态（`None`表示不改变激活状态）。"""
+        sCommand: list[str] = []
+        for key in self._KEYS:
+            value = target[key]
+            if value is None:
+                continue
+            if _same_vector(value, self._state[key]):
+                self._elided += 1
+                continue
+            x, y, z = value
+            sCommand.append(f'.{self._METHODS[key]} "{x}", "{y}", "{z}"')
+            self._state[key] = value
+        if active is not None:
+            if active != self._active:
+                sCommand.append(f'.ActivateWCS "{active}"')
+                self._active = active
+            else:
+                self._elided += 1
+        if sCommand:
+            self._modeler.add_to_history(
+                f"set wcs properties: {title}",
+                NEW_LINE.join(["With WCS", *sCommand, "End With"]),
+            )
+        return self
+
+    def store(self, name: str) -> "WCSStack":
+        """以`name`存储当前局部坐标系，内容未变时不写历史记录。
+
+        Args:
+            name (str): 坐标系名称。
+
+        Returns:
+            WCSStack: self
+        """
+        snapshot = dict(self._state)
+        known = None not in snapshot.values()
+        if known and _same_state(self._stored.get(name), snapshot):
+            self._elided += 1
+            return self
+        self._modeler.add_to_history(
+            f"store wcs: {name}", f'WCS.Store "{name}"'
+        )
+        if known:
+            self._stored[name] = snapshot
+        return self
+
+    def restore(self, name: str) -> "WCSStack":
+        """恢复已存储的坐标系（CST同时激活局部坐标系）。已知其内容且与当前相同、
+        局部坐标系已激活时不写历史记录。
+
+        Args:
+            name (str): 坐标系名称。
+
+        Returns:
+            WCSStack: self
+        """
+        stored = self._stored.get(name)
+        if (
+            stored is not None
+            and self._active == "local"
+            and _same_state(stored, self._state)
+        ):
+            self._elided += 1
+            return self
+        self._modeler.add_to_history(
+            f"restore wcs: {name}", f'WCS.Restore "{name}"'
+        )
+        self._state = (
+            dict(stored) if stored is not None else dict.fromkeys(self._KEYS)
+        )
+        self._active = "local"
+        return self
+
+    def push(self, wcs: WCS = None) -> "WCSStack":
+        """保存当前状态，并可选地切换到`wcs`。
+
+        Args:
+            wcs (WCS, optional): 新的坐标系.
+
+        Returns:
+            WCSStack: self
+        """
+        self._stack.append((self._active, dict(self._state)))
+        if wcs is not None:
+            self.set(wcs)
+        return self
+
+    def pop(self) -> "WCSStack":
+        """恢复到最近一次`push`时的状态，只写出差异，没有变化时不写历史记录。
+
+        Returns:
+            WCSStack: self
+        """
+        active, state = self._stack.pop()
+        return self._apply(state, active, "restore")
+
+
+def _same_vector(a: tuple | None, b: tuple | None) -> bool:
+    """比较两个三维向量的表达式。数值按大小比较，其它按字符串比较。"""
+    if a is None or b is None:
+        return False
+    for x, y in zip(a, b):
+        if x.strip() == y.strip():
+            continue
+        try:
+            if float(x) != float(y):
+                return False
+        except ValueError:
+            return False
+    return True
+
+
+def _same_state(a: dict | None, b: dict) -> bool:
+    if a is None:
+        return False
+    return all(_same_vector(a[k], b[k]) for k in WCSStack._KEYS)
+
+
 class Pick(BaseObject):
     """Offers a set of tools to find or set specific points, edges or areas.
 
@@ -227,6 +584,166 @@ class Pick(BaseObject):
         return
 
 
+class PickSet:
+    """收集面、边和点的选取，与使用这些选取的操作一起写入同一条历史记录。
+
+    Example::
+
+        picks = PickSet().faces(sheet, [3, 5, 7])
+        BendShape(sheet, solid, "3,5,7").define(modeler, picks=picks)
+    """
+
+    def __init__(self, *, clear_first: bool = True):
+        self._clear_first = clear_first
+        self._lines: list[str] = []
+        self._solids: set[str] = set()
+        return
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    @property
+    def solids(self) -> set[str]:
+        """被选取的实体全名。"""
+        return set(self._solids)
+
+    def _add(self, method: str, shape: Solid, *ids: int | str) -> "PickSet":
+        args = ", ".join(quoted(str(i)) for i in ids)
+        self._lines.append(f'.{method} "{shape.full_name}", {args}')
+        self._solids.add(shape.full_name)
+        return self
+
+    def face(self, shape: Solid, id_: int | str) -> "PickSet":
+        """`PickFaceFromId`：选取实体的一个面。"""
+        return self._add("PickFaceFromId", shape, id_)
+
+    def faces(
+        self, shape: Solid, ids: typing.Iterable[int | str]
+    ) -> "PickSet":
+        """选取实体的多个面。"""
+        for i in ids:
+            self.face(shape, i)
+        return self
+
+    def edge(
+        self, shape: Solid, edge_id: int | str, vertex_id: int | str
+    ) -> "PickSet":
+        """`PickEdgeFromId`：选取实体的一条边。"""
+        return self._add("PickEdgeFromId", shape, edge_id, vertex_id)
+
+    def end_point(self, shape: Solid, id_: int | str) -> "PickSet":
+        """`PickEndpointFromId`：选取一条边的端点。"""
+        return self._add("PickEndpointFromId", shape, id_)
+
+    def mid_point(self, shape: Solid, id_: int | str) -> "PickSet":
+        """`PickMidpointFromId`：选取一条边的中点。"""
+        return self._add("PickMidpointFromId", shape, id_)
+
+    def vba(self) -> list[str]:
+        """生成选取语句。
+
+        Returns:
+            list[str]: VBA代码行。
+        """
+        sCommand = ["With Pick"]
+        if self._clear_first:
+            sCommand.append(".ClearAllPicks")
+        sCommand += self._lines
+        sCommand.append("End With")
+        return sCommand
+
+    def emit(
+        self,
+        modeler: "interface.Model3D",
+        operation: str | list[str] = None,
+        *,
+        title: str = "pick",
+    ) -> "PickSet":
+        """把所有选取和使用它们的操作写入同一条历史记录。
+
+        Args:
+            modeler (interface.Model3D): 建模环境。
+            operation (str | list[str], optional): 使用选取的VBA代码.
+            title (str, optional): 历史记录标题. Defaults to "pick".
+
+        Returns:
+            self (PickSet): self。
+        """
+        sCommand = self.vba()
+        if isinstance(operation, str):
+            sCommand.append(operation)
+        elif operation is not None:
+            sCommand += list(operation)
+        modeler.add_to_history(title, NEW_LINE.join(sCommand))
+        _logger.info("%s: %d picks", title, len(self._lines))
+        return self
+
+
+class PickCache:
+    """按实体缓存选取编号。实体被修改（`Solid.history`变长）后，其缓存自动失效。
+
+    Example::
+
+        cache = PickCache()
+        top = cache.get(sheet, "top faces", lambda s: find_top_faces(s))
+    """
+
+    def __init__(self):
+        # 实体全名 -> (修订号, {键: 编号})
+        self._entries: dict[str, tuple[int, dict[str, typing.Any]]] = {}
+        return
+
+    @staticmethod
+    def _revision(shape: Solid) -> int:
+        return len(shape.history)
+
+    def _current(self, shape: Solid) -> dict[str, typing.Any]:
+        """实体当前修订版本的编号表，版本改变时清空。"""
+        revision = self._revision(shape)
+        entry = self._entries.get(shape.full_name)
+        if entry is None or entry[0] != revision:
+            entry = (revision, {})
+            self._entries[shape.full_name] = entry
+        return entry[1]
+
+    def get(
+        self,
+        shape: Solid,
+        key: str,
+        resolver: typing.Callable[[Solid], typing.Any] = None,
+    ) -> typing.Any:
+        """读取缓存的编号；缓存失效或不存在时调用`resolver`重新计算。
+
+        Args:
+            shape (Solid): 实体。
+            key (str): 编号的名称。
+            resolver (Callable[[Solid], Any], optional): 计算编号的函数.
+
+        Raises:
+            KeyError: 缓存中没有有效的编号，且未提供`resolver`。
+
+        Returns:
+            Any: 编号或编号列表。
+        """
+        ids = self._current(shape)
+        if key not in ids:
+            if resolver is None:
+                raise KeyError(f"no valid pick ids {key} for {shape.full_name}")
+            ids[key] = resolver(shape)
+        return ids[key]
+
+    def put(self, shape: Solid, key: str, ids: typing.Any) -> None:
+        """保存实体当前修订版本的编号，覆盖已有的值。"""
+        self._current(shape)[key] = ids
+        return
+
+    def invalidate(self, shape: Solid = None) -> None:
+        """清除某个实体（或全部实体）的缓存。"""
+        if shape is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(shape.full_name, None)
+        return
 
 
 def pick_face_from_id(
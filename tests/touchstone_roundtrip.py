@@ -0,0 +1,74 @@
+import os
+import tempfile
+
+import numpy
+
+from mzcst_2024 import network, touchstone
+
+
+def random_network(n_freq: int, n: int, seed: int) -> numpy.ndarray:
+    rng = numpy.random.default_rng(seed)
+    s = rng.normal(size=(n_freq, n, n)) + 1j * rng.normal(size=(n_freq, n, n))
+    return 0.3 * s
+
+
+def roundtrip(folder: str, n: int, fmt: str, version: str, z: list[float]):
+    frequency = numpy.linspace(1e9, 10e9, 11)
+    s = random_network(len(frequency), n, seed=n)
+    z0 = numpy.broadcast_to(
+        numpy.asarray(z, dtype=complex), (len(frequency), n)
+    )
+    ts = touchstone.TouchstoneData(frequency, s, z0, "S", ("roundtrip",))
+    filename = os.path.join(folder, f"{fmt}_v{version[0]}.s{n}p")
+    touchstone.write_touchstone(
+        filename, ts, fmt=fmt, frequency_unit="GHz", version=version
+    )
+    back = touchstone.read_touchstone(filename)
+    assert back.n_ports == n
+    assert numpy.allclose(back.frequency, frequency, rtol=1e-10)
+    assert numpy.allclose(back.data, s, rtol=1e-9, atol=1e-10)
+    assert numpy.allclose(back.z0.real, z0.real)
+    assert back.comments == ("roundtrip",)
+    print(f"{n:3d} ports  {fmt}  v{version}  ok")
+    return
+
+
+def check_two_port_order(folder: str):
+    # 1.0格式的2端口数据按列排列：S11 S21 S12 S22
+    s = numpy.array([[[1, 2], [3, 4]]], dtype=complex)
+    z0 = numpy.full((1, 2), 50, dtype=complex)
+    ts = touchstone.TouchstoneData(numpy.array([1e9]), s, z0)
+    filename = os.path.join(folder, "order.s2p")
+    touchstone.write_touchstone(filename, ts, version="1.0")
+    with open(filename, "r") as f:
+        row = [float(v) for v in f.read().splitlines()[-1].split()]
+    assert row[1::2] == [1, 3, 2, 4], row
+    assert numpy.allclose(touchstone.read_touchstone(filename).data, s)
+    print("  2 ports  v1.0 column order S11 S21 S12 S22  ok")
+    return
+
+
+def check_network(n: int):
+    s = random_network(5, n, seed=10 + n)
+    z0 = numpy.linspace(25, 75, n)
+    assert numpy.allclose(network.z_to_s(network.s_to_z(s, z0), z0), s)
+    assert numpy.allclose(network.y_to_s(network.s_to_y(s, z0), z0), s)
+    back = network.renormalize(network.renormalize(s, z0, 50.0), 50.0, z0)
+    assert numpy.allclose(back, s)
+    if n == 2:
+        abcd = network.s_to_abcd(s, 50.0)
+        assert numpy.allclose(network.abcd_to_s(abcd, 50.0), s)
+    print(f"{n:3d} ports  network conversions  ok")
+    return
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as folder:
+        for n in (1, 2, 3, 32):
+            for fmt in ("RI", "MA", "DB"):
+                roundtrip(folder, n, fmt, "1.0", [50.0] * n)
+                # 2.0格式：每个端口的参考阻抗不同
+                roundtrip(folder, n, fmt, "2.0", list(range(40, 40 + n)))
+            check_network(n)
+        check_two_port_order(folder)
+    pass